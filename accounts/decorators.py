@@ -1,5 +1,8 @@
 # accounts/decorators.py
+import hashlib
 from django.shortcuts import redirect
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import etag
 from functools import wraps
 
 def role_required(allowed_roles=[]):
@@ -14,3 +17,85 @@ def role_required(allowed_roles=[]):
             return view_func(request, *args, **kwargs)
         return wrapper
     return decorator
+
+
+def etag_from_version(version_func):
+    """
+    ETag / 304 untuk endpoint JSON yang sering di-poll.
+
+    version_func(request, *args, **kwargs) mengembalikan token versi murah
+    (mis. max(updated_at), max(id), count) TANPA membangun payload. Token
+    di-hash bersama user & query string; kalau cocok dengan If-None-Match,
+    view tidak dijalankan dan client dapat 304. Return None = tanpa ETag.
+    """
+    def compute_etag(request, *args, **kwargs):
+        version = version_func(request, *args, **kwargs)
+        if version is None:
+            return None
+        raw = f"{request.user.pk}|{request.get_full_path()}|{version}"
+        return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    def decorator(view_func):
+        conditional_view = etag(compute_etag)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            # Data per-user: browser wajib revalidate (kirim If-None-Match) tiap request
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
+
+
+def idempotent(scope):
+    """
+    Header Idempotency-Key untuk POST yang menulis (accounts/idempotency.py).
+
+    Retry dengan key & body yang sama mendapat respons pertama (header
+    Idempotent-Replayed: true) tanpa menjalankan view lagi. Key yang dipakai
+    ulang dengan request berbeda -> 422; retry saat request pertama masih
+    jalan -> 409. Respons 5xx / exception tidak disimpan, jadi boleh diulang.
+    Tanpa header, view berjalan seperti biasa.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            from django.http import HttpResponse, JsonResponse
+            from . import idempotency
+
+            key = request.headers.get('Idempotency-Key')
+            if request.method != 'POST' or not key:
+                return view_func(request, *args, **kwargs)
+            if len(key) > idempotency.MAX_KEY_LENGTH:
+                return JsonResponse({'error': 'Idempotency-Key too long'}, status=400)
+
+            row_key = idempotency.store_key(scope, request.user.pk, key)
+            request_fingerprint = idempotency.fingerprint(request)
+            entry = idempotency.begin(row_key, request_fingerprint)
+            if entry is not None:
+                stored_fingerprint, stored = entry
+                if stored_fingerprint != request_fingerprint:
+                    return JsonResponse({'error': 'Idempotency-Key reused with a different request'}, status=422)
+                if stored is None:
+                    return JsonResponse({'error': 'Request with this Idempotency-Key is in progress'}, status=409)
+                status, headers, body = idempotency.stored_response(stored)
+                response = HttpResponse(body, status=status)
+                for name, value in headers:
+                    response[name] = value
+                response['Idempotent-Replayed'] = 'true'
+                return response
+
+            try:
+                response = view_func(request, *args, **kwargs)
+            except Exception:
+                idempotency.release(row_key)
+                raise
+            if response.status_code >= 500 or response.streaming:
+                idempotency.release(row_key)
+            else:
+                idempotency.save(row_key, request_fingerprint, response)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,251 @@
+"""
+Export data admin (CSV / JSONL) secara streaming.
+
+Baris dibaca per chunk dengan keyset pagination di primary key
+(WHERE id > last_id ORDER BY id LIMIT n), jadi memori konstan berapa pun
+jumlah datanya, tidak ada transaksi baca yang ditahan selama download, dan
+export bisa dilanjutkan dari id terakhir yang diterima (after_id). Tiap chunk
+di-format lalu di-yield sekaligus; gzip (opsional) dikompres on the fly.
+
+Dipakai oleh view accounts.views.export_data dan `manage.py export_data`.
+Pesan chat yang sudah dipindah ke cold storage (chats/archive.py) tidak ikut.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, time, timedelta
+
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ('csv', 'jsonl')
+# batas INTEGER SQLite / bigint; id di luar rentang ini gagal saat query dijalankan
+MAX_ID = 2 ** 63 - 1
+
+# dataset -> model, kolom (nama, lookup values()), field tanggal untuk
+# date_from/date_to, dan filter query string -> lookup
+DATASETS = {
+    'orders': {
+        'model': 'orders.Order',
+        'columns': [
+            ('id', 'id'),
+            ('customer', 'customer__username'),
+            ('restaurant', 'restaurant__username'),
+            ('driver', 'driver__username'),
+            ('status', 'status'),
+            ('payment_status', 'payment_status'),
+            ('total_price', 'total_price'),
+            ('created_at', 'created_at'),
+            ('picked_at', 'picked_at'),
+            ('delivered_at', 'delivered_at'),
+            ('completed_at', 'completed_at'),
+            ('notes', 'notes'),
+        ],
+        'date_field': 'created_at',
+        'filters': {'status': 'status', 'restaurant': 'restaurant_id', 'driver': 'driver_id'},
+        'with_items': True,
+    },
+    'payments': {
+        'model': 'orders.Payment',
+        'columns': [
+            ('id', 'id'),
+            ('order_id', 'order_id'),
+            ('amount', 'amount'),
+            ('method', 'method'),
+            ('status', 'status'),
+            ('paid_at', 'paid_at'),
+        ],
+        'date_field': 'paid_at',
+        'filters': {'status': 'status', 'method': 'method'},
+    },
+    'tickets': {
+        'model': 'chats.SupportTicket',
+        'columns': [
+            ('id', 'id'),
+            ('user', 'user__username'),
+            ('subject', 'subject'),
+            ('description', 'description'),
+            ('status', 'status'),
+            ('priority', 'priority'),
+            ('assigned_to', 'assigned_to__username'),
+            ('created_at', 'created_at'),
+            ('updated_at', 'updated_at'),
+            ('resolved_at', 'resolved_at'),
+        ],
+        'date_field': 'created_at',
+        'filters': {'status': 'status', 'priority': 'priority'},
+    },
+    'chat_messages': {
+        'model': 'chats.ChatMessage',
+        'columns': [
+            ('id', 'id'),
+            ('room_id', 'room_id'),
+            ('sender', 'sender__username'),
+            ('message', 'message'),
+            ('is_read', 'is_read'),
+            ('created_at', 'created_at'),
+        ],
+        'date_field': 'created_at',
+        'filters': {'room': 'room_id'},
+    },
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _day_start(value):
+    day = parse_date(value or '')
+    if day is None:
+        raise ExportError(f"Invalid date: {value}")
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _int_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ExportError(f"Invalid {name}: {value}")
+    if not -MAX_ID <= number <= MAX_ID:
+        raise ExportError(f"Invalid {name}: {value}")
+    return number
+
+
+def build_queryset(dataset, params):
+    """
+    Queryset terfilter untuk dataset. params (dict / QueryDict): date_from,
+    date_to (YYYY-MM-DD, inklusif), filter per dataset, after_id, until_id.
+    Raise ExportError kalau dataset atau parameter tidak valid.
+    """
+    spec = DATASETS.get(dataset)
+    if spec is None:
+        raise ExportError(f"Unknown dataset: {dataset}")
+
+    queryset = apps.get_model(spec['model']).objects.all()
+    date_field = spec['date_field']
+    if params.get('date_from'):
+        queryset = queryset.filter(**{f'{date_field}__gte': _day_start(params['date_from'])})
+    if params.get('date_to'):
+        queryset = queryset.filter(**{f'{date_field}__lt': _day_start(params['date_to']) + timedelta(days=1)})
+    for name, lookup in spec['filters'].items():
+        # filter id divalidasi di sini: queryset baru dijalankan saat streaming,
+        # error di sana jadi 500 di tengah download
+        value = _int_param(params, name) if lookup.endswith('_id') else params.get(name)
+        if value not in (None, ''):
+            queryset = queryset.filter(**{lookup: value})
+
+    # rentang id untuk melanjutkan export yang terputus / membagi export
+    after_id = _int_param(params, 'after_id')
+    until_id = _int_param(params, 'until_id')
+    if after_id is not None:
+        queryset = queryset.filter(id__gt=after_id)
+    if until_id is not None:
+        queryset = queryset.filter(id__lte=until_id)
+    return queryset
+
+
+def _attach_items(rows):
+    from orders.models import OrderItem
+    items = {}
+    for item in (
+        # chunk urut id: rentang id lebih murah dari IN (...) ribuan parameter;
+        # item order di luar filter ikut terbaca lalu diabaikan
+        OrderItem.objects.filter(order_id__gte=rows[0]['id'], order_id__lte=rows[-1]['id'])
+        .order_by('order_id', 'id')
+        .values('order_id', 'item_name', 'quantity', 'price')
+    ):
+        order_id = item.pop('order_id')
+        items.setdefault(order_id, []).append(item)
+    for row in rows:
+        row['items'] = items.get(row['id'], [])
+
+
+def iter_chunks(dataset, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield list dict baris per chunk, urut id (keyset, tanpa OFFSET)."""
+    spec = DATASETS[dataset]
+    lookups = [lookup for _, lookup in spec['columns']]
+    names = [name for name, _ in spec['columns']]
+    last_id = None
+    while True:
+        page = queryset.order_by('id')
+        if last_id is not None:
+            page = page.filter(id__gt=last_id)
+        rows = [dict(zip(names, values)) for values in page.values_list(*lookups)[:chunk_size]]
+        if not rows:
+            return
+        if spec.get('with_items'):
+            _attach_items(rows)
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1]['id']
+
+
+def header(dataset):
+    names = [name for name, _ in DATASETS[dataset]['columns']]
+    if DATASETS[dataset].get('with_items'):
+        names.append('items')
+    return names
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        return json.dumps(value, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return value
+
+
+def format_csv(dataset, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    names = header(dataset)
+    writer.writerow(names)
+    for rows in chunks:
+        for row in rows:
+            writer.writerow([_csv_value(row[name]) for name in names])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def format_jsonl(chunks):
+    for rows in chunks:
+        yield ''.join(json.dumps(row, cls=DjangoJSONEncoder, separators=(',', ':')) + '\n' for row in rows)
+
+
+def gzip_stream(parts):
+    """Kompres gzip on the fly; output bisa langsung dibaca `gunzip`."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for part in parts:
+        data = compressor.compress(part)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(dataset, params, fmt='csv', compress=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """Generator bytes hasil export. Validasi (ExportError) terjadi sebelum generator dibuat."""
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown format: {fmt}")
+    chunks = iter_chunks(dataset, build_queryset(dataset, params), chunk_size)
+    text = format_csv(dataset, chunks) if fmt == 'csv' else format_jsonl(chunks)
+    parts = (part.encode('utf-8') for part in text)
+    return gzip_stream(parts) if compress else parts
+
+
+def filename(dataset, fmt, compress=False):
+    stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+    return f"{dataset}-{stamp}.{fmt}" + ('.gz' if compress else '')
@@ -0,0 +1,118 @@
+"""
+Store Idempotency-Key untuk POST yang menulis (buat order, konfirmasi
+pembayaran, checkout).
+
+Client mengirim header Idempotency-Key (mis. UUID) yang sama saat retry.
+Hasil request pertama disimpan per (scope, user, key) bersama fingerprint
+request (method, path, body); retry dengan fingerprint sama mendapat
+respons tersimpan tanpa menyentuh tabel bisnis.
+
+Store-nya tabel IdempotencyKey, bukan cache: cache default (LocMem) hanya
+per proses, jadi retry yang masuk ke worker lain atau setelah restart akan
+menjalankan view lagi. Baris dibuat di awal request dengan constraint
+unik (scope, user_id, key_hash), jadi dari semua request bersamaan dengan
+key yang sama hanya satu yang menang di database; yang lain mendapat 409
+selama status_code masih NULL.
+
+Satu baris berisi fingerprint, status, header penting dan body terkompres,
+bukan objek HttpResponse. Baris kedaluwarsa setelah IDEMPOTENCY_KEY_TTL
+(penanda request yang masih berjalan: IDEMPOTENCY_PENDING_TTL, supaya
+request yang mati di tengah jalan tidak mengunci key selamanya) dan
+dihapus oleh `manage.py purge_idempotency_keys`; baris kedaluwarsa juga
+langsung ditimpa kalau key-nya dipakai lagi.
+"""
+import hashlib
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+# Header respons yang ikut disimpan & diputar ulang
+REPLAY_HEADERS = ('Content-Type', 'Location')
+MAX_KEY_LENGTH = 255
+
+
+def _ttl():
+    return getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+
+
+def _pending_ttl():
+    return getattr(settings, 'IDEMPOTENCY_PENDING_TTL', 60)
+
+
+def store_key(scope, user_id, key):
+    """Identitas baris: (scope, user_id, hash key). user_id None = anonim."""
+    return scope, user_id or 0, hashlib.md5(key.encode('utf-8')).hexdigest()
+
+
+def fingerprint(request):
+    digest = hashlib.sha256()
+    digest.update(f'{request.method} {request.path}\n'.encode('utf-8'))
+    digest.update(request.body)
+    return digest.hexdigest()[:32]
+
+
+def _lookup(key):
+    scope, user_id, key_hash = key
+    return IdempotencyKey.objects.filter(scope=scope, user_id=user_id, key_hash=key_hash)
+
+
+def begin(key, request_fingerprint):
+    """
+    Tandai key sedang diproses. Return None kalau berhasil (request harus
+    dijalankan), atau entri yang sudah ada: (fingerprint, None) selama
+    request pertama masih jalan, (fingerprint, respons) kalau sudah selesai.
+    """
+    scope, user_id, key_hash = key
+    now = timezone.now()
+    # entri kedaluwarsa diperlakukan seperti tidak ada
+    _lookup(key).filter(expires_at__lte=now).delete()
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(
+                scope=scope, user_id=user_id, key_hash=key_hash,
+                fingerprint=request_fingerprint,
+                expires_at=now + timedelta(seconds=_pending_ttl()),
+            )
+        return None
+    except IntegrityError:
+        pass
+
+    row = _lookup(key).values('fingerprint', 'status_code', 'headers', 'body').first()
+    if row is None:
+        # baru dihapus oleh request lain (gagal / kedaluwarsa); anggap masih berjalan
+        return request_fingerprint, None
+    if row['status_code'] is None:
+        return row['fingerprint'], None
+    return row['fingerprint'], (row['status_code'], row['headers'], bytes(row['body']))
+
+
+def save(key, request_fingerprint, response):
+    headers = [[name, response[name]] for name in REPLAY_HEADERS if response.has_header(name)]
+    _lookup(key).filter(fingerprint=request_fingerprint).update(
+        status_code=response.status_code,
+        headers=headers,
+        body=zlib.compress(response.content),
+        expires_at=timezone.now() + timedelta(seconds=_ttl()),
+    )
+
+
+def release(key):
+    """Hapus penanda pending supaya retry menjalankan request lagi (respons gagal)."""
+    _lookup(key).filter(status_code__isnull=True).delete()
+
+
+def stored_response(stored):
+    """Return (status, headers, body) dari respons tersimpan."""
+    status, headers, body = stored
+    return status, headers, zlib.decompress(body)
+
+
+def purge_expired():
+    """Hapus entri kedaluwarsa. Return jumlah baris."""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,50 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from accounts import exports
+
+class Command(BaseCommand):
+    help = "Export order/payment/ticket/chat ke CSV atau JSONL secara streaming (memori konstan)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(exports.DATASETS))
+        parser.add_argument('--format', choices=exports.EXPORT_FORMATS, default='csv')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--output', '-o', help="Path file tujuan (default: stdout)")
+        parser.add_argument('--date-from', help="YYYY-MM-DD")
+        parser.add_argument('--date-to', help="YYYY-MM-DD (inklusif)")
+        parser.add_argument('--after-id', type=int, help="Lanjutkan setelah id ini")
+        parser.add_argument('--until-id', type=int)
+        parser.add_argument('--filter', action='append', default=[], metavar='NAME=VALUE',
+                            help="Filter dataset, mis. status=completed (boleh berulang)")
+        parser.add_argument('--chunk-size', type=int, default=exports.EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        params = {
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+            'after_id': options['after_id'],
+            'until_id': options['until_id'],
+        }
+        for item in options['filter']:
+            name, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f"Invalid filter: {item}")
+            params[name] = value
+
+        try:
+            content = exports.stream(
+                options['dataset'], params, options['format'], options['gzip'], options['chunk_size'],
+            )
+        except exports.ExportError as e:
+            raise CommandError(str(e))
+
+        out = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for part in content:
+                out.write(part)
+        finally:
+            if options['output']:
+                out.close()
+            else:
+                out.flush()
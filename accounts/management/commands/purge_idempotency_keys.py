@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from accounts import idempotency
+
+class Command(BaseCommand):
+    help = "Hapus entri Idempotency-Key yang sudah kedaluwarsa (jalankan berkala, mis. via cron)"
+
+    def handle(self, *args, **options):
+        deleted = idempotency.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired idempotency keys."))
@@ -33,6 +33,9 @@ class RestaurantProfile(models.Model):
     phone = models.CharField(max_length=50, blank=True, null=True)
     # status buka/tutup bisa di model ini
     is_open = models.BooleanField(default=True)
+    # lokasi penjemputan, dipakai dispatcher driver
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
 
     def __str__(self):
         return self.name
@@ -43,6 +46,10 @@ class DriverProfile(models.Model):
     vehicle_info = models.CharField(max_length=255, blank=True, null=True)
     # contoh field skors / punishment counter
     suspended_until = models.DateTimeField(blank=True, null=True)
+    # posisi terakhir yang diketahui
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    location_updated_at = models.DateTimeField(blank=True, null=True)
 
     def __str__(self):
         return f"Driver {self.user.username}"
@@ -54,6 +61,32 @@ class CustomerProfile(models.Model):
     def __str__(self):
         return f"Customer {self.user.username}"
 
+
+class IdempotencyKey(models.Model):
+    """
+    Hasil POST per Idempotency-Key (accounts/idempotency.py). Disimpan di
+    database, bukan cache, supaya retry yang masuk ke worker lain atau
+    setelah restart tetap mendapat respons yang sama. status_code NULL =
+    request pertama masih berjalan.
+    """
+    scope = models.CharField(max_length=32)
+    # 0 = anonim
+    user_id = models.BigIntegerField(default=0)
+    key_hash = models.CharField(max_length=32)
+    fingerprint = models.CharField(max_length=32)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    headers = models.JSONField(default=list)
+    body = models.BinaryField(default=b'')
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'user_id', 'key_hash'], name='idempotency_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.user_id}:{self.key_hash}"
+
 # Create your models here.
 
 
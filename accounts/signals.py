@@ -1,6 +1,9 @@
 # accounts/signals.py
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from orders.signals import order_status_changed
+from . import stats
 from .models import User, RestaurantProfile, DriverProfile, CustomerProfile
 
 @receiver(post_save, sender=User)
@@ -12,3 +15,28 @@ def create_profile(sender, instance, created, **kwargs):
             DriverProfile.objects.create(user=instance)
         else:
             CustomerProfile.objects.create(user=instance)
+
+
+# Invalidasi cache statistik dashboard admin (accounts/stats.py)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_stats(sender, update_fields=None, **kwargs):
+    # login hanya update last_login, tidak mengubah statistik
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    stats.invalidate(stats.USER_STATS_KEY)
+    # setelah commit, supaya ETag versi baru tidak dipasang ke data lama
+    transaction.on_commit(stats.bump_users_version)
+
+
+@receiver(post_save, sender='orders.Order')
+@receiver(post_delete, sender='orders.Order')
+@receiver(order_status_changed)
+def invalidate_order_stats(sender, **kwargs):
+    stats.invalidate(stats.ORDER_STATS_KEY)
+
+
+@receiver(post_save, sender='chats.SupportTicket')
+@receiver(post_delete, sender='chats.SupportTicket')
+def invalidate_ticket_stats(sender, **kwargs):
+    stats.invalidate(stats.TICKET_STATS_KEY)
@@ -0,0 +1,90 @@
+"""
+Statistik dashboard admin.
+
+Semua counter satu model dihitung dengan satu query conditional aggregation
+(COUNT ... FILTER), lalu di-cache sebentar (ADMIN_STATS_CACHE_TTL detik).
+Cache dihapus oleh signal di accounts/signals.py saat User, Order atau
+SupportTicket berubah; TTL membatasi data basi dari proses lain atau dari
+queryset.update() yang tidak mengirim signal.
+
+Versi daftar user (users_version) dipakai sebagai ETag endpoint daftar user
+form order: counter di cache yang dinaikkan signal setiap User disimpan /
+dihapus, jadi poll yang tidak berubah cukup satu cache.get.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import User
+
+STATS_CACHE_TTL = getattr(settings, 'ADMIN_STATS_CACHE_TTL', 30)
+
+USER_STATS_KEY = 'admin_stats:users'
+ORDER_STATS_KEY = 'admin_stats:orders'
+TICKET_STATS_KEY = 'admin_stats:tickets'
+USERS_VERSION_KEY = 'admin_stats:users_version'
+
+OPEN_TICKET_STATUSES = ['open', 'in_progress']
+
+
+def _cached(key, compute):
+    data = cache.get(key)
+    if data is None:
+        data = compute()
+        cache.set(key, data, STATS_CACHE_TTL)
+    return data
+
+
+def user_stats():
+    pending = Q(is_approved=False, role__in=['driver', 'restaurant'])
+    return _cached(USER_STATS_KEY, lambda: User.objects.aggregate(
+        pending_count=Count('id', filter=pending),
+        pending_drivers=Count('id', filter=pending & Q(role='driver')),
+        pending_restaurants=Count('id', filter=pending & Q(role='restaurant')),
+        drivers_count=Count('id', filter=Q(role='driver')),
+        restaurants_count=Count('id', filter=Q(role='restaurant')),
+    ))
+
+
+def order_stats():
+    from orders.models import Order
+    return _cached(ORDER_STATS_KEY, lambda: Order.objects.aggregate(
+        total_orders=Count('id'),
+        pending_orders=Count('id', filter=Q(status='pending')),
+        delivering_orders=Count('id', filter=Q(status='delivering')),
+        completed_orders=Count('id', filter=Q(status='completed')),
+        active_orders=Count('id', filter=Q(status__in=Order.ACTIVE_STATUSES)),
+    ))
+
+
+def ticket_stats():
+    from chats.models import SupportTicket
+    return _cached(TICKET_STATS_KEY, lambda: SupportTicket.objects.aggregate(
+        total_tickets=Count('id'),
+        open_tickets=Count('id', filter=Q(status='open')),
+        in_progress_tickets=Count('id', filter=Q(status='in_progress')),
+        resolved_tickets=Count('id', filter=Q(status='resolved')),
+        support_count=Count('id', filter=Q(status__in=OPEN_TICKET_STATUSES)),
+    ))
+
+
+def invalidate(*keys):
+    cache.delete_many(keys)
+
+
+def users_version():
+    version = cache.get(USERS_VERSION_KEY)
+    if version is None:
+        # key hilang (restart/eviction): mulai dari angka baru supaya ETag lama tidak cocok
+        cache.add(USERS_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(USERS_VERSION_KEY)
+    return version
+
+
+def bump_users_version():
+    try:
+        cache.incr(USERS_VERSION_KEY)
+    except ValueError:
+        users_version()
@@ -1,3 +1,66 @@
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from orders.models import Order, OrderEvent
+from .models import User
+
+
+class AssignDriverTests(TestCase):
+    """Assign driver + auto-accept dalam satu transaksi (accounts.views.assign_driver)."""
+
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', role='admin')
+        self.driver = User.objects.create(username='driver', role='driver', is_approved=True)
+        customer = User.objects.create(username='customer', role='customer')
+        restaurant = User.objects.create(username='resto', role='restaurant', is_approved=True)
+        self.order = Order.objects.create(customer=customer, restaurant=restaurant, total_price=10)
+        self.client.force_login(self.admin)
+
+    def assign(self, driver_id):
+        return self.client.post(reverse('accounts:assign_driver', args=[self.order.id]), {'driver_id': driver_id})
+
+    def test_assign_pending_order_accepts_it(self):
+        self.assign(self.driver.id)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.driver_id, self.driver.id)
+        self.assertEqual(self.order.status, Order.STATUS_ACCEPTED)
+        events = list(self.order.events.exclude(event_type=OrderEvent.TYPE_CREATED).order_by('id')
+                      .values_list('event_type', 'old_value', 'new_value'))
+        self.assertEqual(events, [
+            (OrderEvent.TYPE_DRIVER, '', str(self.driver.id)),
+            (OrderEvent.TYPE_STATUS, Order.STATUS_PENDING, Order.STATUS_ACCEPTED),
+        ])
+
+    def test_unassignable_order_is_left_alone(self):
+        Order.objects.filter(id=self.order.id).update(status=Order.STATUS_DELIVERED)
+        self.assign(self.driver.id)
+        self.order.refresh_from_db()
+        self.assertIsNone(self.order.driver_id)
+        self.assertFalse(self.order.events.filter(event_type=OrderEvent.TYPE_DRIVER).exists())
+
+    def test_unknown_driver_is_rejected(self):
+        self.assign('abc')
+        self.assign(self.admin.id)
+        self.order.refresh_from_db()
+        self.assertIsNone(self.order.driver_id)
+        self.assertEqual(self.order.status, Order.STATUS_PENDING)
+
+
+class UsersForOrderETagTests(TestCase):
+    """ETag daftar user form order berubah saat data user diedit."""
+
+    def test_edit_changes_etag(self):
+        admin = User.objects.create(username='admin', role='admin')
+        customer = User.objects.create(username='customer', role='customer', email='a@example.com')
+        self.client.force_login(admin)
+        url = reverse('accounts:users_for_order_api')
+
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        customer.email = 'b@example.com'
+        with self.captureOnCommitCallbacks(execute=True):
+            customer.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'b@example.com')
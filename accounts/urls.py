@@ -41,6 +41,11 @@ urlpatterns = [
     path("orders/assign-driver/<int:order_id>/", views.assign_driver, name="assign_driver"),
     path("orders/delete/<int:order_id>/", views.delete_order, name="delete_order"),
     path("api/order/<int:order_id>/", views.get_order_api, name="get_order_api"),
+    path("api/order-claims/stats/", views.get_claim_stats_api, name="get_claim_stats_api"),
+    path("api/order-analytics/", views.get_order_analytics_api, name="get_order_analytics_api"),
+    path("api/orders/sync/", views.order_sync_api, name="order_sync_api"),
+    path("api/orders/bulk/", views.bulk_create_orders_api, name="bulk_create_orders_api"),
+    path("api/export/<str:dataset>/", views.export_data, name="export_data"),
     
 
     # USERS FOR ORDER API (TIDAK ADA DUPLIKAT)
@@ -6,9 +6,17 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from .forms import CustomerRegisterForm, DriverRegisterForm, RestaurantRegisterForm
 from .models import User
 from django.http import JsonResponse
+from django.views.decorators.http import require_POST
 from django.contrib.auth.hashers import make_password
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from datetime import datetime, time, timedelta
+import json
 from orders.models import Order
+from . import stats
+from .decorators import etag_from_version, idempotent
 
 
 # =============================
@@ -119,26 +127,14 @@ def admin_required(view_func):
 # =============================
 @admin_required
 def admin_dashboard(request):
-    from orders.models import Order
-    from chats.models import SupportTicket
-    
-    # Count statistics
-    pending_count = User.objects.filter(is_approved=False, role__in=["driver", "restaurant"]).count()
-    drivers_count = User.objects.filter(role="driver").count()
-    restaurants_count = User.objects.filter(role="restaurant").count()
-    
-    # Active orders
-    active_orders = Order.objects.filter(status__in=['pending', 'confirmed', 'preparing', 'delivering']).count()
-    
-    # Support tickets
-    support_count = SupportTicket.objects.filter(status__in=['open', 'in_progress']).count()
+    user_counts = stats.user_stats()
     
     context = {
-        'pending_count': pending_count,
-        'drivers_count': drivers_count,
-        'restaurants_count': restaurants_count,
-        'active_orders': active_orders,
-        'support_count': support_count,
+        'pending_count': user_counts['pending_count'],
+        'drivers_count': user_counts['drivers_count'],
+        'restaurants_count': user_counts['restaurants_count'],
+        'active_orders': stats.order_stats()['active_orders'],
+        'support_count': stats.ticket_stats()['support_count'],
     }
     
     return render(request, "adminpanel/dashboard.html", context)
@@ -155,15 +151,13 @@ def account_approvals(request):
     pending = User.objects.filter(is_approved=False, role__in=["driver", "restaurant"])
     
     # Statistics
-    pending_count = pending.count()
-    pending_drivers = pending.filter(role='driver').count()
-    pending_restaurants = pending.filter(role='restaurant').count()
+    user_counts = stats.user_stats()
     
     context = {
         "pending": pending,
-        "pending_count": pending_count,
-        "pending_drivers": pending_drivers,
-        "pending_restaurants": pending_restaurants,
+        "pending_count": user_counts['pending_count'],
+        "pending_drivers": user_counts['pending_drivers'],
+        "pending_restaurants": user_counts['pending_restaurants'],
     }
     
     return render(request, "adminpanel/approvals.html", context)
@@ -217,38 +211,106 @@ def manage_restaurants(request):
 # =============================
 # MANAGE ORDERS
 # =============================
+ORDER_PAGE_SIZE = 50
+
+# Maksimal order per request bulk API (batch lebih besar: `manage.py ingest_orders`)
+BULK_ORDER_LIMIT = 5000
+
+
+def _day_start(value):
+    day = parse_date(value or '')
+    if day is None:
+        return None
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
 @admin_required
 # GANTI fungsi manage_orders yang lama dengan ini
 # DAN TAMBAHKAN fungsi-fungsi baru di bawahnya
 
 @admin_required
 def manage_orders(request):
-    """Halaman manage orders untuk admin"""
-    from orders.models import Order
+    """Halaman manage orders untuk admin (keyset pagination + filter)"""
+    from orders.models import Order, OrderItem
     
-    # Get all orders
-    orders = Order.objects.select_related('customer', 'restaurant', 'driver').prefetch_related('items').all()
+    # Jumlah item lewat subquery per baris (bukan GROUP BY) supaya ORDER BY + LIMIT tetap pakai index
+    item_count = OrderItem.objects.filter(order=OuterRef('pk')).values('order').annotate(c=Count('id')).values('c')
+    orders = (
+        Order.objects.select_related('customer', 'restaurant', 'driver')
+        .annotate(item_count=Coalesce(Subquery(item_count), 0))
+        .order_by('-created_at', '-id')
+    )
     
-    # Statistics
-    total_orders = orders.count()
-    pending_orders = orders.filter(status='pending').count()
-    delivering_orders = orders.filter(status='delivering').count()
-    completed_orders = orders.filter(status='completed').count()
-    active_orders = orders.filter(status__in=['pending', 'confirmed', 'preparing', 'delivering']).count()
+    # Filters
+    status = request.GET.get('status', '')
+    restaurant_id = request.GET.get('restaurant', '')
+    driver_id = request.GET.get('driver', '')
+    date_from = _day_start(request.GET.get('date_from'))
+    date_to = _day_start(request.GET.get('date_to'))
+    
+    if status and status != 'all':
+        orders = orders.filter(status=status)
+    if restaurant_id.isdigit():
+        orders = orders.filter(restaurant_id=restaurant_id)
+    if driver_id == 'none':
+        orders = orders.filter(driver__isnull=True)
+    elif driver_id.isdigit():
+        orders = orders.filter(driver_id=driver_id)
+    if date_from:
+        orders = orders.filter(created_at__gte=date_from)
+    if date_to:
+        orders = orders.filter(created_at__lt=date_to + timedelta(days=1))
+    
+    # Keyset cursor: "<created_at iso>|<id>"
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            created_at, order_id = cursor.split('|')
+            created_at = datetime.fromisoformat(created_at)
+            orders = orders.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=int(order_id)))
+        except ValueError:
+            messages.error(request, "Invalid page cursor!")
+            return redirect('accounts:orders')
+    
+    page = list(orders[:ORDER_PAGE_SIZE + 1])
+    next_query = None
+    if len(page) > ORDER_PAGE_SIZE:
+        page = page[:ORDER_PAGE_SIZE]
+        params = request.GET.copy()
+        params['cursor'] = f"{page[-1].created_at.isoformat()}|{page[-1].id}"
+        next_query = params.urlencode()
+    
+    first_params = request.GET.copy()
+    first_params.pop('cursor', None)
+    
+    # Statistics (satu query aggregate, di-cache)
+    order_counts = stats.order_stats()
     
     context = {
-        'orders': orders,
-        'total_orders': total_orders,
-        'pending_orders': pending_orders,
-        'delivering_orders': delivering_orders,
-        'completed_orders': completed_orders,
-        'active_orders': active_orders,
+        'orders': page,
+        'next_query': next_query,
+        'first_page_query': first_params.urlencode() if cursor else None,
+        'filters': {
+            'status': status or 'all',
+            'restaurant': restaurant_id,
+            'driver': driver_id,
+            'date_from': request.GET.get('date_from', ''),
+            'date_to': request.GET.get('date_to', ''),
+        },
+        'restaurants': User.objects.filter(role='restaurant').order_by('username').values('id', 'username'),
+        'drivers': User.objects.filter(role='driver').order_by('username').values('id', 'username'),
+        'total_orders': order_counts['total_orders'],
+        'pending_orders': order_counts['pending_orders'],
+        'delivering_orders': order_counts['delivering_orders'],
+        'completed_orders': order_counts['completed_orders'],
+        'active_orders': order_counts['active_orders'],
     }
     
     return render(request, "adminpanel/orders.html", context)
 
 
 @admin_required
+@idempotent('add_order')
 def add_order(request):
     """Tambah order baru (manual oleh admin)"""
     if request.method == 'POST':
@@ -286,18 +348,20 @@ def add_order(request):
 def update_order_status(request, order_id):
     """Update status order"""
     if request.method == 'POST':
-        from orders.models import Order
+        from orders.models import Order, InvalidTransition
         
         try:
             order = Order.objects.get(id=order_id)
             new_status = request.POST.get('status')
             
-            if new_status in dict(Order.STATUS_CHOICES):
-                order.status = new_status
-                order.save()
+            if new_status not in dict(Order.STATUS_CHOICES):
+                messages.error(request, "Invalid status!")
+            elif order.transition_to(new_status, actor=request.user):
                 messages.success(request, f"Order #{order_id} status updated to {new_status}!")
             else:
-                messages.error(request, "Invalid status!")
+                messages.error(request, f"Order #{order_id} was changed by someone else, please retry.")
+        except InvalidTransition as e:
+            messages.error(request, str(e))
         except Order.DoesNotExist:
             messages.error(request, "Order not found!")
         except Exception as e:
@@ -308,26 +372,47 @@ def update_order_status(request, order_id):
 
 @admin_required
 def assign_driver(request, order_id):
-    """Assign driver ke order"""
+    """
+    Assign driver ke order. UPDATE driver, event driver dan auto-accept
+    (pending -> accepted) satu transaksi, dengan baris order dibaca ulang
+    (dikunci) di dalamnya supaya tidak bentrok dengan klaim / transisi lain.
+    """
     if request.method == 'POST':
-        from orders.models import Order
-        
-        try:
-            order = Order.objects.get(id=order_id)
-            driver_id = request.POST.get('driver_id')
-            
-            if driver_id:
-                order.driver_id = driver_id
-                order.status = 'confirmed'  # Auto confirm when driver assigned
-                order.save()
-                messages.success(request, f"Driver assigned to Order #{order_id}!")
-            else:
-                messages.error(request, "Please select a driver!")
-        except Order.DoesNotExist:
-            messages.error(request, "Order not found!")
-        except Exception as e:
-            messages.error(request, f"Error: {str(e)}")
-    
+        from django.db import transaction
+        from orders import events
+        from orders.models import Order, OrderEvent
+        from orders.claims import CLAIMABLE_STATUSES
+
+        driver_id = request.POST.get('driver_id', '')
+        if not driver_id:
+            messages.error(request, "Please select a driver!")
+            return redirect('accounts:orders')
+        if not driver_id.isdigit() or not User.objects.filter(id=int(driver_id), role='driver').exists():
+            messages.error(request, "Driver not found!")
+            return redirect('accounts:orders')
+        driver_id = int(driver_id)
+
+        with transaction.atomic():
+            order = Order.objects.select_for_update().filter(id=order_id).first()
+            if order is None:
+                messages.error(request, "Order not found!")
+                return redirect('accounts:orders')
+            if order.status not in CLAIMABLE_STATUSES:
+                messages.error(request, f"Order #{order_id} can no longer be assigned!")
+                return redirect('accounts:orders')
+
+            old_driver_id = order.driver_id
+            now = timezone.now()
+            Order.objects.filter(id=order_id, status=order.status).update(driver_id=driver_id, updated_at=now)
+            order.driver_id, order.updated_at = driver_id, now
+            events.record(order_id, OrderEvent.TYPE_DRIVER, old_driver_id, driver_id, actor=request.user)
+
+            # Auto accept when driver assigned
+            if order.status == Order.STATUS_PENDING:
+                order.transition_to(Order.STATUS_ACCEPTED, actor=request.user)
+
+        messages.success(request, f"Driver assigned to Order #{order_id}!")
+
     return redirect('accounts:orders')
 
 
@@ -349,7 +434,19 @@ def delete_order(request, order_id):
     return redirect('accounts:orders')
 
 
+def _order_api_version(request, order_id):
+    from orders.models import Order
+    order = Order.objects.filter(id=order_id).annotate(
+        last_item_id=Max('items__id'),
+        item_count=Count('items'),
+    ).values_list('updated_at', 'last_item_id', 'item_count').first()
+    if order is None:
+        return None
+    return '|'.join(str(value) for value in order)
+
+
 @admin_required
+@etag_from_version(_order_api_version)
 def get_order_api(request, order_id):
     """API untuk ambil detail order"""
     from orders.models import Order
@@ -395,6 +492,121 @@ def get_order_api(request, order_id):
         return JsonResponse({'error': 'Order not found'}, status=404)
 
 
+@admin_required
+def get_claim_stats_api(request):
+    """API counter kontensi klaim order oleh driver"""
+    from orders.claims import claim_stats
+    return JsonResponse(claim_stats())
+
+
+@login_required
+def order_sync_api(request):
+    """
+    Delta sync order untuk app driver/restoran: ?token=<token dari respons
+    sebelumnya>, kosong untuk sync pertama; halaman snapshot berikutnya:
+    ?token=<token>&cursor=<next_cursor> (lihat orders/sync.py)
+    """
+    from orders import sync
+
+    if request.user.role not in sync.SYNC_ROLES:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    try:
+        return JsonResponse(sync.sync(request.user, request.GET.get('token'), raw_cursor=request.GET.get('cursor')))
+    except sync.InvalidSyncToken:
+        return JsonResponse({'error': 'Invalid token'}, status=400)
+
+
+@admin_required
+@require_POST
+def bulk_create_orders_api(request):
+    """
+    Ingest order massal (orders/ingest.py): {"orders": [{customer_id,
+    restaurant_id, driver_id?, status?, payment_status?, notes?, created_at?,
+    items: [{item_name, quantity, price}]}, ...]}. Baris yang tidak valid
+    dilaporkan per index tanpa membatalkan baris lain.
+    """
+    from orders import ingest
+
+    try:
+        body = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    rows = body.get('orders') if isinstance(body, dict) else body
+    if not isinstance(rows, list) or not rows:
+        return JsonResponse({'error': 'Expected a non-empty list of orders'}, status=400)
+    if len(rows) > BULK_ORDER_LIMIT:
+        return JsonResponse({'error': f'At most {BULK_ORDER_LIMIT} orders per request'}, status=400)
+
+    result = ingest.ingest(rows)
+    return JsonResponse({
+        'created_count': len(result['created']),
+        'error_count': len(result['errors']),
+        'created': result['created'],
+        'errors': result['errors'],
+    })
+
+
+@admin_required
+def export_data(request, dataset):
+    """
+    Export streaming (accounts/exports.py): ?format=csv|jsonl&gzip=1, filter
+    date_from/date_to + filter per dataset, after_id/until_id untuk melanjutkan.
+    """
+    from django.http import StreamingHttpResponse
+    from . import exports
+
+    fmt = request.GET.get('format', 'csv')
+    compress = request.GET.get('gzip') in ('1', 'true')
+    try:
+        content = exports.stream(dataset, request.GET, fmt, compress)
+    except exports.ExportError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(content, content_type='application/gzip' if compress else content_type)
+    response['Content-Disposition'] = f'attachment; filename="{exports.filename(dataset, fmt, compress)}"'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@admin_required
+def get_order_analytics_api(request):
+    """API statistik order dari proyeksi OrderEvent (tanpa scan tabel Order)"""
+    from orders.models import DriverDeliveryStats, HourlyOrderStats, RestaurantPrepStats
+
+    try:
+        hours = min(max(int(request.GET.get('hours', 24)), 1), 24 * 14)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid hours'}, status=400)
+    since = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+
+    restaurants = RestaurantPrepStats.objects.select_related('restaurant').order_by('-prepared_count')[:50]
+    drivers = DriverDeliveryStats.objects.select_related('driver').order_by('-delivered_count')[:50]
+    hourly = HourlyOrderStats.objects.filter(hour__gte=since).order_by('hour')
+
+    return JsonResponse({
+        'restaurants': [{
+            'id': row.restaurant_id,
+            'name': row.restaurant.username,
+            'prepared_count': row.prepared_count,
+            'avg_prep_seconds': row.avg_prep_seconds(),
+        } for row in restaurants],
+        'drivers': [{
+            'id': row.driver_id,
+            'name': row.driver.username,
+            'delivered_count': row.delivered_count,
+            'avg_delivery_seconds': row.avg_delivery_seconds(),
+        } for row in drivers],
+        'hourly': [{
+            'hour': row.hour.isoformat(),
+            'created': row.created_count,
+            'completed': row.completed_count,
+            'cancelled': row.cancelled_count,
+        } for row in hourly],
+    })
+
+
 @admin_required
 def get_users_for_order(request):
     """API untuk ambil list users (customer, restaurant, driver) untuk form add order"""
@@ -408,7 +620,13 @@ def get_users_for_order(request):
         'drivers': list(drivers),
     })
 
+def _users_for_order_version(request):
+    """Versi daftar user di cache, naik setiap User disimpan/dihapus (accounts/signals.py)"""
+    return stats.users_version()
+
+
 @admin_required
+@etag_from_version(_users_for_order_version)
 def users_for_order_api(request):
     customers = User.objects.filter(role="customer")
     restaurants = User.objects.filter(role="restaurant")
@@ -575,6 +793,7 @@ def get_restaurant_api(request, user_id):
         return JsonResponse({'error': 'Restaurant not found'}, status=404)
 
 @admin_required
+@etag_from_version(_users_for_order_version)
 def get_users_for_order(request):
     """API untuk ambil list users (customer, restaurant, driver) untuk form add order"""
     customers = User.objects.filter(role='customer').values('id', 'username', 'email')
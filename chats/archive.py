@@ -0,0 +1,180 @@
+"""
+Cold storage pesan chat & balasan ticket lama.
+
+Pesan dipindah per batch dari tabel "panas" (ChatMessage / TicketReply) ke
+ArchivedChatBatch / ArchivedTicketBatch sebagai JSON terkompresi, dalam format
+yang sama dengan output API (to_dict), sehingga bisa langsung dikembalikan
+saat riwayat lama diminta. Tabel panas dan index-nya tetap kecil.
+
+Pesan & balasan hanya diarsip kalau lebih tua dari cutoff, dan di transaksi
+yang sama di-index ke tabel FTS arsip (chats/search.py) supaya tetap bisa
+dicari setelah baris panasnya dihapus.
+"""
+import json
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import search
+from .models import (
+    ArchivedChatBatch, ArchivedTicketBatch, ChatMessage, ChatRoom,
+    SupportTicket, TicketReply,
+)
+
+ARCHIVABLE_TICKET_STATUSES = ('resolved', 'closed')
+
+
+def _pack(items):
+    return zlib.compress(json.dumps(items, separators=(',', ':')).encode('utf-8'))
+
+
+def _unpack(data):
+    return json.loads(zlib.decompress(bytes(data)).decode('utf-8'))
+
+
+def default_cutoff():
+    days = getattr(settings, 'CHAT_ARCHIVE_AFTER_DAYS', 90)
+    return timezone.now() - timedelta(days=days)
+
+
+# =============================
+# TULIS ARSIP
+# =============================
+def archive_room(room, cutoff, batch_size=500):
+    """
+    Arsipkan pesan room yang sudah dibaca dan lebih tua dari cutoff.
+    Pesan belum dibaca dan last_message room tetap di tabel panas.
+    Return jumlah pesan yang diarsip.
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            messages = list(
+                ChatMessage.objects.filter(room=room, created_at__lt=cutoff, is_read=True)
+                .exclude(id=room.last_message_id)
+                .select_related('sender')
+                .order_by('id')[:batch_size]
+            )
+            if not messages:
+                return total
+
+            ArchivedChatBatch.objects.create(
+                room=room,
+                first_message_id=messages[0].id,
+                last_message_id=messages[-1].id,
+                message_count=len(messages),
+                data=_pack([msg.to_dict() for msg in messages]),
+            )
+            search.index_archived(messages)
+            ChatMessage.objects.filter(id__in=[msg.id for msg in messages]).delete()
+            total += len(messages)
+
+
+def archive_ticket(ticket, cutoff, batch_size=500):
+    """Arsipkan balasan ticket yang lebih tua dari cutoff. Return jumlah balasan."""
+    total = 0
+    while True:
+        with transaction.atomic():
+            replies = list(
+                ticket.replies.filter(created_at__lt=cutoff)
+                .select_related('user')
+                .order_by('id')[:batch_size]
+            )
+            if not replies:
+                return total
+
+            ArchivedTicketBatch.objects.create(
+                ticket=ticket,
+                first_reply_id=replies[0].id,
+                last_reply_id=replies[-1].id,
+                reply_count=len(replies),
+                data=_pack([reply.to_dict() for reply in replies]),
+            )
+            search.index_archived(replies)
+            TicketReply.objects.filter(id__in=[reply.id for reply in replies]).delete()
+            total += len(replies)
+
+
+def archive_old_chats(cutoff=None, batch_size=500):
+    """Arsipkan semua pesan chat & ticket lama. Return (jumlah pesan, jumlah balasan)."""
+    cutoff = cutoff or default_cutoff()
+
+    room_ids = (
+        ChatMessage.objects.filter(created_at__lt=cutoff, is_read=True)
+        .values_list('room_id', flat=True)
+        .distinct()
+    )
+    messages = 0
+    for room in ChatRoom.objects.filter(id__in=list(room_ids)).iterator():
+        messages += archive_room(room, cutoff, batch_size)
+
+    tickets = SupportTicket.objects.filter(
+        status__in=ARCHIVABLE_TICKET_STATUSES,
+        updated_at__lt=cutoff,
+        replies__created_at__lt=cutoff,
+    ).distinct()
+    replies = 0
+    for ticket in tickets.iterator():
+        replies += archive_ticket(ticket, cutoff, batch_size)
+
+    return messages, replies
+
+
+# =============================
+# BACA ARSIP
+# =============================
+def load_chat_messages(room_id, before_id=None, limit=50, after_id=None):
+    """
+    Ambil pesan arsip room (id < before_id, id > after_id), terbaru dulu.
+    Return (messages urut lama -> baru, has_more).
+    """
+    batches = ArchivedChatBatch.objects.filter(room_id=room_id).order_by('-last_message_id')
+    if before_id is not None:
+        batches = batches.filter(first_message_id__lt=before_id)
+    if after_id is not None:
+        batches = batches.filter(last_message_id__gt=after_id)
+
+    collected = []
+    has_more = False
+    for batch in batches.iterator():
+        if len(collected) >= limit:
+            has_more = True
+            break
+        items = [
+            item for item in _unpack(batch.data)
+            if (before_id is None or item['id'] < before_id)
+            and (after_id is None or item['id'] > after_id)
+        ]
+        collected = items + collected
+
+    if len(collected) > limit:
+        has_more = True
+        collected = collected[-limit:]
+    return collected, has_more
+
+
+def merge_chat_page(room_id, hot, hot_has_more, before_id=None, limit=50):
+    """
+    Gabungkan satu halaman pesan dari tabel panas (urut naik) dengan arsip.
+    Pesan belum dibaca / last_message tidak ikut diarsip, jadi id keduanya
+    bisa berselang-seling; halaman diambil dari gabungan yang terbaru.
+    """
+    # Halaman panas penuh: arsip hanya relevan kalau ada yang lebih baru dari pesan tertuanya
+    after_id = hot[0]['id'] if hot_has_more and hot else None
+    archived, archived_more = load_chat_messages(room_id, before_id, limit, after_id)
+    if not archived:
+        return hot, hot_has_more or archived_more
+
+    merged = sorted(archived + hot, key=lambda item: item['id'])
+    has_more = hot_has_more or archived_more or len(merged) > limit
+    return merged[-limit:], has_more
+
+
+def load_ticket_replies(ticket_id):
+    replies = []
+    for batch in ArchivedTicketBatch.objects.filter(ticket_id=ticket_id).order_by('first_reply_id'):
+        replies.extend(_unpack(batch.data))
+    return replies
@@ -0,0 +1,28 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from chats import archive
+
+class Command(BaseCommand):
+    help = "Pindahkan pesan chat & balasan ticket lama ke cold storage (arsip terkompresi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'CHAT_ARCHIVE_AFTER_DAYS', 90),
+                            help="Umur minimal pesan (hari) yang diarsip")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help="Jalan terus secara periodik")
+        parser.add_argument('--interval', type=int, default=3600, help="Jeda antar run (detik) untuk --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            cutoff = timezone.now() - timedelta(days=options['days'])
+            messages, replies = archive.archive_old_chats(cutoff, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Archived {messages} chat messages and {replies} ticket replies older than {options['days']} days."
+            ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
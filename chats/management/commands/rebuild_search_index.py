@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from chats import search
+
+class Command(BaseCommand):
+    help = "Bangun ulang index full-text search pesan chat & balasan ticket (SQLite FTS5)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if not search.is_enabled():
+            self.stdout.write(self.style.WARNING("Full-text search hanya tersedia di SQLite."))
+            return
+
+        total = search.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt: {total} rows."))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_counters(apps, schema_editor):
+    ChatRoom = apps.get_model('chats', 'ChatRoom')
+    ChatMessage = apps.get_model('chats', 'ChatMessage')
+    for room in ChatRoom.objects.all().iterator():
+        messages = ChatMessage.objects.filter(room=room)
+        unread = messages.filter(is_read=False)
+        ChatRoom.objects.filter(pk=room.pk).update(
+            last_message=messages.order_by('-id').first(),
+            admin_unread_count=unread.exclude(sender_id=room.admin_id).count(),
+            user_unread_count=unread.filter(sender_id=room.admin_id).count(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0002_supportticket_ticketreply'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='admin_unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chats.chatmessage'),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='user_unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
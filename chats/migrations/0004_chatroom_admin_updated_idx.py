@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-18 09:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0003_chatroom_denormalized_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatroom',
+            index=models.Index(fields=['admin', '-updated_at', '-id'], name='chatroom_admin_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:00
+
+from django.db import migrations
+
+# DDL ditulis langsung di sini (bukan chats.search.create_tables) supaya
+# migrasi ini tidak ikut berubah saat modul search menambah tabel
+FTS_TABLES = ('chats_chatmessage_fts', 'chats_ticketreply_fts')
+
+
+def create_fts_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in FTS_TABLES:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} "
+                f"USING fts5(message, tokenize='unicode61 remove_diacritics 2')"
+            )
+
+
+def drop_fts_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in FTS_TABLES:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def populate_fts_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("INSERT INTO chats_chatmessage_fts (rowid, message) SELECT id, message FROM chats_chatmessage")
+        cursor.execute("INSERT INTO chats_ticketreply_fts (rowid, message) SELECT id, message FROM chats_ticketreply")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0004_chatroom_admin_updated_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_tables, drop_fts_tables),
+        migrations.RunPython(populate_fts_tables, migrations.RunPython.noop),
+    ]
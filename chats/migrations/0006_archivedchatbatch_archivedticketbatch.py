@@ -0,0 +1,45 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0005_search_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedChatBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_message_id', models.BigIntegerField()),
+                ('last_message_id', models.BigIntegerField()),
+                ('message_count', models.PositiveIntegerField()),
+                ('data', models.BinaryField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_batches', to='chats.chatroom')),
+            ],
+            options={
+                'ordering': ['room', '-last_message_id'],
+                'indexes': [models.Index(fields=['room', '-last_message_id'], name='archchat_room_last_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedTicketBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_reply_id', models.BigIntegerField()),
+                ('last_reply_id', models.BigIntegerField()),
+                ('reply_count', models.PositiveIntegerField()),
+                ('data', models.BinaryField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_batches', to='chats.supportticket')),
+            ],
+            options={
+                'ordering': ['ticket', 'first_reply_id'],
+            },
+        ),
+    ]
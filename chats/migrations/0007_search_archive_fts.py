@@ -0,0 +1,62 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:00
+
+import json
+import zlib
+
+from django.db import migrations
+
+# DDL ditulis langsung di sini (bukan chats.search.create_tables), seperti 0005
+ARCHIVE_FTS_TABLES = {
+    'chats_archivedchat_fts': 'room_id',
+    'chats_archivedticket_fts': 'ticket_id',
+}
+
+
+def create_fts_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, owner in ARCHIVE_FTS_TABLES.items():
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} "
+                f"USING fts5(message, {owner} UNINDEXED, created_at UNINDEXED, "
+                f"tokenize='unicode61 remove_diacritics 2')"
+            )
+
+
+def drop_fts_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in ARCHIVE_FTS_TABLES:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def populate_archive_fts_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    batches = {
+        'chats_archivedchat_fts': apps.get_model('chats', 'ArchivedChatBatch'),
+        'chats_archivedticket_fts': apps.get_model('chats', 'ArchivedTicketBatch'),
+    }
+    with schema_editor.connection.cursor() as cursor:
+        for table, owner in ARCHIVE_FTS_TABLES.items():
+            for batch in batches[table].objects.order_by('id').iterator():
+                # format arsip: JSON terkompresi zlib (chats/archive.py)
+                items = json.loads(zlib.decompress(bytes(batch.data)).decode('utf-8'))
+                cursor.executemany(
+                    f"INSERT INTO {table} (rowid, message, {owner}) VALUES (%s, %s, %s)",
+                    [(item['id'], item['message'], getattr(batch, owner)) for item in items],
+                )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0006_archivedchatbatch_archivedticketbatch'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_tables, drop_fts_tables),
+        migrations.RunPython(populate_archive_fts_tables, migrations.RunPython.noop),
+    ]
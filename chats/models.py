@@ -1,4 +1,7 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
 from accounts.models import User
 
 class ChatRoom(models.Model):
@@ -10,19 +13,59 @@ class ChatRoom(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalisasi: dijaga oleh ChatMessage.save() dan mark_read()
+    last_message = models.ForeignKey('ChatMessage', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    admin_unread_count = models.PositiveIntegerField(default=0)  # pesan dari user yang belum dibaca admin
+    user_unread_count = models.PositiveIntegerField(default=0)   # pesan dari admin yang belum dibaca user
+
     class Meta:
         unique_together = ('admin', 'user')
         ordering = ['-updated_at']
+        indexes = [
+            # keyset pagination sidebar chat: (updated_at, id) per admin
+            models.Index(fields=['admin', '-updated_at', '-id'], name='chatroom_admin_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Chat: Admin-{self.admin.username} with {self.user.username}"
 
     def get_last_message(self):
-        return self.messages.last()
+        return self.last_message
 
     def get_unread_count(self, user):
-        """Hitung pesan yang belum dibaca oleh user tertentu"""
-        return self.messages.filter(is_read=False).exclude(sender=user).count()
+        """Jumlah pesan yang belum dibaca oleh user tertentu"""
+        if user.id == self.admin_id:
+            return self.admin_unread_count
+        return self.user_unread_count
+
+    def _unread_field(self, reader_id):
+        return 'admin_unread_count' if reader_id == self.admin_id else 'user_unread_count'
+
+    def mark_read(self, reader, after_id=None):
+        """Tandai pesan dari lawan bicara sudah dibaca dan reset counter reader"""
+        unread = self.messages.filter(is_read=False).exclude(sender=reader)
+        if after_id:
+            unread = unread.filter(id__gt=after_id)
+        field = self._unread_field(reader.id)
+        with transaction.atomic():
+            updated = unread.update(is_read=True)
+            if updated:
+                ChatRoom.objects.filter(pk=self.pk).update(**{field: Greatest(F(field) - updated, 0)})
+        return updated
+
+    def refresh_counters(self):
+        """Hitung ulang field denormalisasi dari tabel pesan (mis. setelah hapus pesan)"""
+        unread = self.messages.filter(is_read=False)
+        self.last_message = self.messages.order_by('-id').first()
+        self.admin_unread_count = unread.exclude(sender_id=self.admin_id).count()
+        self.user_unread_count = unread.filter(sender_id=self.admin_id).count()
+        self.updated_at = timezone.now()
+        ChatRoom.objects.filter(pk=self.pk).update(
+            last_message=self.last_message,
+            admin_unread_count=self.admin_unread_count,
+            user_unread_count=self.user_unread_count,
+            updated_at=self.updated_at,
+        )
 
 
 class ChatMessage(models.Model):
@@ -41,6 +84,32 @@ class ChatMessage(models.Model):
     def __str__(self):
         return f"{self.sender.username}: {self.message[:50]}"
 
+    def save(self, *args, **kwargs):
+        created = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if created:
+                # Update last_message & counter room dalam transaksi yang sama
+                # counter milik penerima, bukan pengirim
+                field = 'user_unread_count' if self.sender_id == self.room.admin_id else 'admin_unread_count'
+                update = {'last_message': self, 'updated_at': timezone.now()}
+                if not self.is_read:
+                    update[field] = F(field) + 1
+                ChatRoom.objects.filter(pk=self.room_id).update(**update)
+
+    def to_dict(self):
+        """Format JSON pesan untuk API dan stream realtime"""
+        return {
+            'id': self.id,
+            'room_id': self.room_id,
+            'sender_id': self.sender_id,
+            'sender_name': self.sender.username,
+            'message': self.message,
+            'is_admin': self.sender.role == 'admin',
+            'created_at': self.created_at.strftime('%I:%M %p'),
+            'is_read': self.is_read,
+        }
+
 class SupportTicket(models.Model):
     STATUS_CHOICES = [
         ('open', 'Open'),
@@ -93,3 +162,52 @@ class TicketReply(models.Model):
     
     def __str__(self):
         return f"Reply on Ticket #{self.ticket.id} by {self.user.username}"
+
+    def to_dict(self):
+        """Format JSON balasan ticket untuk API"""
+        return {
+            'id': self.id,
+            'user': self.user.username,
+            'user_role': self.user.role,
+            'message': self.message,
+            'created_at': self.created_at.strftime('%d %b %Y %H:%M'),
+        }
+
+
+class ArchivedChatBatch(models.Model):
+    """
+    Cold storage: satu batch pesan lama dari satu room, disimpan sebagai JSON
+    terkompresi (zlib). Ditulis oleh `manage.py archive_chats`, dibaca lagi
+    secara transparan oleh API riwayat chat (lihat chats/archive.py).
+    """
+    room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name='archived_batches')
+    first_message_id = models.BigIntegerField()
+    last_message_id = models.BigIntegerField()
+    message_count = models.PositiveIntegerField()
+    data = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['room', '-last_message_id']
+        indexes = [
+            models.Index(fields=['room', '-last_message_id'], name='archchat_room_last_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archive room #{self.room_id} ({self.first_message_id}-{self.last_message_id})"
+
+
+class ArchivedTicketBatch(models.Model):
+    """Cold storage balasan ticket yang sudah resolved/closed"""
+    ticket = models.ForeignKey(SupportTicket, on_delete=models.CASCADE, related_name='archived_batches')
+    first_reply_id = models.BigIntegerField()
+    last_reply_id = models.BigIntegerField()
+    reply_count = models.PositiveIntegerField()
+    data = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['ticket', 'first_reply_id']
+
+    def __str__(self):
+        return f"Archive ticket #{self.ticket_id} ({self.first_reply_id}-{self.last_reply_id})"
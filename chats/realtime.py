@@ -0,0 +1,107 @@
+"""
+Broker realtime untuk chat (Server-Sent Events).
+
+Setiap proses worker punya satu ChatBroker. Koneksi SSE mendaftar per room dan
+menerima pesan lewat asyncio.Queue. Fan-out antar proses memakai tabel
+ChatMessage di database sebagai log bersama: satu task per proses membaca pesan
+baru (id > last_id) untuk semua room yang sedang di-subscribe dalam satu query,
+lalu membagikannya ke queue lokal. Pesan yang dibuat di proses yang sama
+membangunkan task itu lewat signal, jadi langsung terkirim tanpa menunggu
+interval polling.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+def _latest_message_id():
+    from .models import ChatMessage
+    return ChatMessage.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def _fetch_new_messages(after_id, room_ids):
+    from .models import ChatMessage
+    messages = (
+        ChatMessage.objects.filter(id__gt=after_id, room_id__in=room_ids)
+        .select_related('sender')
+        .order_by('id')
+    )
+    return [msg.to_dict() for msg in messages]
+
+
+class ChatBroker:
+    """Pub/sub in-process per room, disuplai dari database bersama."""
+
+    def __init__(self, poll_interval=None):
+        self.poll_interval = poll_interval or getattr(settings, 'CHAT_STREAM_POLL_INTERVAL', 1.0)
+        self.subscribers = {}  # room_id -> set(asyncio.Queue)
+        self.last_id = None
+        self._loop = None
+        self._wakeup = None
+        self._task = None
+
+    async def subscribe(self, room_id):
+        self._ensure_started()
+        queue = asyncio.Queue()
+        self.subscribers.setdefault(room_id, set()).add(queue)
+        if self.last_id is None:
+            self.last_id = await sync_to_async(_latest_message_id)()
+        return queue
+
+    def unsubscribe(self, room_id, queue):
+        queues = self.subscribers.get(room_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[room_id]
+
+    def notify(self):
+        """Bangunkan task fan-out. Aman dipanggil dari thread mana pun."""
+        if self._loop is None or self._wakeup is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            # event loop sudah ditutup
+            pass
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self.last_id = None
+        self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            if not self.subscribers:
+                # Tidak ada yang mendengarkan: jangan query, mulai ulang cursor nanti
+                self.last_id = None
+                continue
+
+            if self.last_id is None:
+                # cursor awal masih diambil oleh subscribe()
+                continue
+
+            try:
+                messages = await sync_to_async(_fetch_new_messages)(self.last_id, list(self.subscribers))
+            except Exception:
+                continue
+
+            for msg in messages:
+                self.last_id = max(self.last_id, msg['id'])
+                for queue in self.subscribers.get(msg['room_id'], ()):
+                    queue.put_nowait(msg)
+
+
+chat_broker = ChatBroker()
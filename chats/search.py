@@ -0,0 +1,277 @@
+"""
+Full-text search pesan chat & balasan ticket (SQLite FTS5).
+
+Tiap model punya virtual table FTS5 sendiri dengan rowid = id baris aslinya,
+jadi update/hapus index cukup lookup rowid. Index dijaga oleh signal di
+chats/signals.py dan bisa dibangun ulang dengan `manage.py rebuild_search_index`.
+
+Pesan yang dipindah ke cold storage (chats/archive.py) hilang dari tabel
+panas dan index-nya, jadi di-index ulang ke tabel FTS arsip sendiri di
+transaksi yang sama. Karena baris aslinya sudah tidak ada, tabel arsip ikut
+menyimpan room/ticket dan created_at (kolom UNINDEXED) untuk filter & hasil.
+"""
+import datetime
+import html
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+CHAT_FTS_TABLE = 'chats_chatmessage_fts'
+TICKET_FTS_TABLE = 'chats_ticketreply_fts'
+ARCHIVED_CHAT_FTS_TABLE = 'chats_archivedchat_fts'
+ARCHIVED_TICKET_FTS_TABLE = 'chats_archivedticket_fts'
+
+# Kolom tiap tabel FTS; kolom pertama selalu teks yang di-index
+_FTS_COLUMNS = {
+    CHAT_FTS_TABLE: 'message',
+    TICKET_FTS_TABLE: 'message',
+    ARCHIVED_CHAT_FTS_TABLE: 'message, room_id UNINDEXED, created_at UNINDEXED',
+    ARCHIVED_TICKET_FTS_TABLE: 'message, ticket_id UNINDEXED, created_at UNINDEXED',
+}
+
+# Penanda highlight di snippet; diganti <mark> setelah teks di-escape
+_HL_START = '\x02'
+_HL_END = '\x03'
+
+
+def is_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def create_tables(schema_editor=None):
+    cursor_owner = schema_editor.connection if schema_editor else connection
+    if cursor_owner.vendor != 'sqlite':
+        return
+    with cursor_owner.cursor() as cursor:
+        for table, columns in _FTS_COLUMNS.items():
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} "
+                f"USING fts5({columns}, tokenize='unicode61 remove_diacritics 2')"
+            )
+
+
+def drop_tables(schema_editor=None):
+    cursor_owner = schema_editor.connection if schema_editor else connection
+    if cursor_owner.vendor != 'sqlite':
+        return
+    with cursor_owner.cursor() as cursor:
+        for table in _FTS_COLUMNS:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def _table_for(instance):
+    from .models import ChatMessage, TicketReply
+    if isinstance(instance, ChatMessage):
+        return CHAT_FTS_TABLE
+    if isinstance(instance, TicketReply):
+        return TICKET_FTS_TABLE
+    raise TypeError(f"{type(instance).__name__} tidak di-index")
+
+
+def index_object(instance):
+    if not is_enabled():
+        return
+    table = _table_for(instance)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [instance.pk])
+        cursor.execute(f"INSERT INTO {table} (rowid, message) VALUES (%s, %s)", [instance.pk, instance.message])
+
+
+def remove_object(instance):
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {_table_for(instance)} WHERE rowid = %s", [instance.pk])
+
+
+def _archived_rows(instances):
+    from .models import ChatMessage
+
+    if isinstance(instances[0], ChatMessage):
+        table, owner = ARCHIVED_CHAT_FTS_TABLE, 'room_id'
+    else:
+        table, owner = ARCHIVED_TICKET_FTS_TABLE, 'ticket_id'
+    adapt = connection.ops.adapt_datetimefield_value
+    rows = [(obj.pk, obj.message, getattr(obj, owner), adapt(obj.created_at)) for obj in instances]
+    return table, owner, rows
+
+
+def index_archived(instances):
+    """
+    Index pesan/balasan yang sedang diarsip ke tabel FTS arsip. Dipanggil
+    chats/archive.py sebelum baris panasnya dihapus, di transaksi yang sama.
+    """
+    if not instances or not is_enabled():
+        return
+    table, owner, rows = _archived_rows(instances)
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {table} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {table} (rowid, message, {owner}, created_at) VALUES (%s, %s, %s, %s)", rows,
+        )
+
+
+def _insert_batches(cursor, table, columns, rows, batch_size):
+    placeholders = ', '.join(['%s'] * len(columns))
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            cursor.executemany(sql, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+        total += len(batch)
+    return total
+
+
+def _archived_batch_rows(model, owner, created):
+    from .archive import _unpack
+
+    # created_at di JSON arsip sudah format tampilan; waktu aslinya diambil
+    # dari index lama (created: {id: created_at}) kalau ada
+    for batch in model.objects.order_by('id').iterator(chunk_size=50):
+        owner_id = getattr(batch, owner)
+        for item in _unpack(batch.data):
+            yield item['id'], item['message'], owner_id, created.get(item['id'])
+
+
+def rebuild(batch_size=2000):
+    """Kosongkan lalu isi ulang semua index dari tabel sumber & arsip. Return jumlah baris."""
+    from .models import ArchivedChatBatch, ArchivedTicketBatch, ChatMessage, TicketReply
+
+    create_tables()
+    total = 0
+    with connection.cursor() as cursor:
+        for model, table in ((ChatMessage, CHAT_FTS_TABLE), (TicketReply, TICKET_FTS_TABLE)):
+            cursor.execute(f"DELETE FROM {table}")
+            rows = model.objects.order_by('id').values_list('id', 'message').iterator(chunk_size=batch_size)
+            total += _insert_batches(cursor, table, ('rowid', 'message'), rows, batch_size)
+
+        for model, table, owner in (
+            (ArchivedChatBatch, ARCHIVED_CHAT_FTS_TABLE, 'room_id'),
+            (ArchivedTicketBatch, ARCHIVED_TICKET_FTS_TABLE, 'ticket_id'),
+        ):
+            cursor.execute(f"SELECT rowid, created_at FROM {table} WHERE created_at IS NOT NULL")
+            created = dict(cursor.fetchall())
+            cursor.execute(f"DELETE FROM {table}")
+            rows = _archived_batch_rows(model, owner, created)
+            total += _insert_batches(cursor, table, ('rowid', 'message', owner, 'created_at'), rows, batch_size)
+    return total
+
+
+def build_match_query(text):
+    """
+    Ubah input bebas user jadi query FTS5 yang aman: tiap kata di-quote
+    (operator FTS5 tidak ikut ditafsirkan), kata terakhir jadi prefix match.
+    """
+    terms = [term.replace('"', '""') for term in text.split()]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def _parse_created_at(value):
+    # Raw cursor SQLite mengembalikan string; simpanan USE_TZ selalu UTC
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if value is not None and settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value, datetime.timezone.utc)
+    return value
+
+
+def _format_snippet(raw):
+    escaped = html.escape(raw)
+    return escaped.replace(_HL_START, '<mark>').replace(_HL_END, '</mark>')
+
+
+def search(text, admin, limit=20):
+    """
+    Cari di pesan chat (hanya room milik admin ini) dan balasan ticket,
+    termasuk yang sudah diarsip (archived=True). Hasil diurutkan berdasarkan
+    skor bm25 (semakin kecil semakin relevan).
+    """
+    match = build_match_query(text)
+    if match is None or not is_enabled():
+        return []
+
+    snippet = "snippet({table}, 0, '%s', '%s', '…', 12)" % (_HL_START, _HL_END)
+    # (tabel FTS, JOIN ke baris asli, kolom room/ticket, kolom created_at, archived)
+    chat_sources = (
+        (CHAT_FTS_TABLE, f"JOIN chats_chatmessage m ON m.id = {CHAT_FTS_TABLE}.rowid",
+         'm.room_id', 'm.created_at', False),
+        (ARCHIVED_CHAT_FTS_TABLE, '',
+         f'{ARCHIVED_CHAT_FTS_TABLE}.room_id', f'{ARCHIVED_CHAT_FTS_TABLE}.created_at', True),
+    )
+    ticket_sources = (
+        (TICKET_FTS_TABLE, f"JOIN chats_ticketreply t ON t.id = {TICKET_FTS_TABLE}.rowid",
+         't.ticket_id', 't.created_at', False),
+        (ARCHIVED_TICKET_FTS_TABLE, '',
+         f'{ARCHIVED_TICKET_FTS_TABLE}.ticket_id', f'{ARCHIVED_TICKET_FTS_TABLE}.created_at', True),
+    )
+
+    results = []
+    with connection.cursor() as cursor:
+        for table, join, room_col, created_col, archived in chat_sources:
+            cursor.execute(
+                f"""
+                SELECT {table}.rowid, {room_col}, r.user_id, u.username, {created_col},
+                       {snippet.format(table=table)}, bm25({table})
+                FROM {table}
+                {join}
+                JOIN chats_chatroom r ON r.id = {room_col}
+                JOIN accounts_user u ON u.id = r.user_id
+                WHERE {table} MATCH %s AND r.admin_id = %s
+                ORDER BY bm25({table})
+                LIMIT %s
+                """,
+                [match, admin.id, limit],
+            )
+            for msg_id, room_id, user_id, username, created_at, raw, rank in cursor.fetchall():
+                results.append({
+                    'type': 'chat',
+                    'id': msg_id,
+                    'room_id': room_id,
+                    'user_id': user_id,
+                    'title': username,
+                    'snippet': _format_snippet(raw),
+                    'created_at': _parse_created_at(created_at),
+                    'archived': archived,
+                    'rank': rank,
+                })
+
+        for table, join, ticket_col, created_col, archived in ticket_sources:
+            cursor.execute(
+                f"""
+                SELECT {table}.rowid, {ticket_col}, s.subject, {created_col},
+                       {snippet.format(table=table)}, bm25({table})
+                FROM {table}
+                {join}
+                JOIN chats_supportticket s ON s.id = {ticket_col}
+                WHERE {table} MATCH %s
+                ORDER BY bm25({table})
+                LIMIT %s
+                """,
+                [match, limit],
+            )
+            for reply_id, ticket_id, subject, created_at, raw, rank in cursor.fetchall():
+                results.append({
+                    'type': 'ticket',
+                    'id': reply_id,
+                    'ticket_id': ticket_id,
+                    'title': subject,
+                    'snippet': _format_snippet(raw),
+                    'created_at': _parse_created_at(created_at),
+                    'archived': archived,
+                    'rank': rank,
+                })
+
+    results.sort(key=lambda r: r['rank'])
+    return results[:limit]
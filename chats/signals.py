@@ -0,0 +1,28 @@
+# chats/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import search
+from .models import ChatMessage, TicketReply
+from .realtime import chat_broker
+
+@receiver(post_save, sender=ChatMessage)
+def push_new_message(sender, instance, created, **kwargs):
+    if created:
+        # Bangunkan stream SSE di proses ini setelah pesan ter-commit
+        transaction.on_commit(chat_broker.notify)
+
+
+# Full-text search index (lihat chats/search.py)
+@receiver(post_save, sender=ChatMessage)
+@receiver(post_save, sender=TicketReply)
+def index_searchable(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'message' not in update_fields:
+        return
+    search.index_object(instance)
+
+
+@receiver(post_delete, sender=ChatMessage)
+@receiver(post_delete, sender=TicketReply)
+def unindex_searchable(sender, instance, **kwargs):
+    search.remove_object(instance)
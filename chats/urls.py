@@ -5,9 +5,12 @@ app_name = 'chats'
 
 urlpatterns = [
     path('admin/', views.admin_chat_view, name='admin_chat'),
+    path('api/conversations/', views.get_conversations, name='get_conversations'),
     path('api/messages/<int:user_id>/', views.get_chat_messages, name='get_messages'),
     path('api/send/', views.send_chat_message, name='send_message'),
     path('api/delete/<int:message_id>/', views.delete_chat_message, name='delete_message'),
+    path('api/stream/<int:room_id>/', views.chat_stream, name='chat_stream'),
+    path('api/search/', views.search_messages, name='search_messages'),
 
     # Admin Support
     path('support/', views.admin_support_view, name='admin_support'),
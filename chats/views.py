@@ -1,10 +1,120 @@
+import asyncio
+import json
+from datetime import datetime
+
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.urls import reverse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from .models import ChatRoom, ChatMessage
+from . import archive, search
+from .realtime import chat_broker
+from accounts import stats
+from accounts.decorators import etag_from_version
 from accounts.models import User
-from django.db.models import Q
+from django.db.models import Count, Max, Q
+
+# Kirim komentar keepalive supaya proxy tidak memutus stream yang idle
+STREAM_KEEPALIVE = 15
+
+# Jumlah pesan per halaman riwayat chat (window terbaru / scroll ke atas)
+MESSAGE_PAGE_SIZE = 50
+
+# Ukuran halaman daftar percakapan di sidebar chat
+CONVERSATION_PAGE_SIZE = 30
+CONVERSATION_PAGE_MAX = 100
+
+
+def _parse_conversation_cursor(cursor):
+    """
+    Cursor keyset: "r|<updated_at>|<room_id>" untuk room chat, lalu
+    "u|<date_joined>|<user_id>" untuk user yang belum punya room.
+    """
+    if not cursor:
+        return 'r', None, None
+    try:
+        phase, value, pk = cursor.split('|')
+        if phase not in ('r', 'u'):
+            raise ValueError
+        if not value:
+            return phase, None, None
+        return phase, datetime.fromisoformat(value), int(pk)
+    except ValueError:
+        raise ValueError('Invalid cursor')
+
+
+def get_conversation_page(admin, cursor=None, role=None, unread_only=False, limit=CONVERSATION_PAGE_SIZE):
+    """
+    Satu halaman daftar percakapan admin, diurutkan dari aktivitas terbaru.
+    Room chat dipaging dengan keyset (updated_at, id) di atas index
+    chatroom_admin_updated_idx; setelah room habis dilanjutkan user yang
+    belum pernah di-chat (date_joined, id). Return (items, next_cursor).
+    """
+    phase, value, pk = _parse_conversation_cursor(cursor)
+    items = []
+
+    if phase == 'r':
+        rooms = (
+            ChatRoom.objects.filter(admin=admin)
+            .exclude(user__role='admin')
+            .select_related('user', 'last_message')
+            .order_by('-updated_at', '-id')
+        )
+        if role:
+            rooms = rooms.filter(user__role=role)
+        if unread_only:
+            rooms = rooms.filter(admin_unread_count__gt=0)
+        if value is not None:
+            rooms = rooms.filter(Q(updated_at__lt=value) | Q(updated_at=value, id__lt=pk))
+
+        rooms = list(rooms[:limit + 1])
+        for room in rooms[:limit]:
+            items.append({
+                'user_id': room.user_id,
+                'username': room.user.username,
+                'role': room.user.role,
+                'room_id': room.id,
+                'unread_count': room.admin_unread_count,
+                'last_message': room.last_message.message if room.last_message else None,
+            })
+        if len(rooms) > limit:
+            last = rooms[limit - 1]
+            return items, f'r|{last.updated_at.isoformat()}|{last.id}'
+        if unread_only:
+            # User tanpa room tidak mungkin punya pesan belum dibaca
+            return items, None
+        phase, value, pk = 'u', None, None
+        limit -= len(items)
+        if limit <= 0:
+            return items, 'u||'
+
+    users = (
+        User.objects.exclude(role='admin').exclude(id=admin.id)
+        .exclude(user_chats__admin=admin)
+        .order_by('-date_joined', '-id')
+    )
+    if role:
+        users = users.filter(role=role)
+    if value is not None:
+        users = users.filter(Q(date_joined__lt=value) | Q(date_joined=value, id__lt=pk))
+
+    users = list(users[:limit + 1])
+    for user in users[:limit]:
+        items.append({
+            'user_id': user.id,
+            'username': user.username,
+            'role': user.role,
+            'room_id': None,
+            'unread_count': 0,
+            'last_message': None,
+        })
+    if len(users) > limit:
+        last = users[limit - 1]
+        return items, f'u|{last.date_joined.isoformat()}|{last.id}'
+    return items, None
+
 
 @login_required
 def admin_chat_view(request):
@@ -14,41 +124,66 @@ def admin_chat_view(request):
     if request.user.role != 'admin':
         return redirect('home')
     
-    # Ambil semua user yang pernah chat atau bisa di-chat
-    users = User.objects.exclude(role='admin').exclude(id=request.user.id)
-    
-    # Ambil chat rooms yang sudah ada
-    chat_rooms = ChatRoom.objects.filter(admin=request.user)
-    
-    # Buat dictionary untuk unread count
-    users_with_chats = []
-    for user in users:
-        room = chat_rooms.filter(user=user).first()
-        unread_count = 0
-        last_message = None
-        
-        if room:
-            unread_count = room.get_unread_count(request.user)
-            last_message = room.get_last_message()
-        
-        users_with_chats.append({
-            'user': user,
-            'room': room,
-            'unread_count': unread_count,
-            'last_message': last_message
-        })
-    
-    # Sort by last message time
-    users_with_chats.sort(key=lambda x: x['room'].updated_at if x['room'] else x['user'].date_joined, reverse=True)
+    # Halaman pertama dirender server, sisanya di-load lewat get_conversations saat scroll
+    conversations, next_cursor = get_conversation_page(request.user)
     
     context = {
-        'users_with_chats': users_with_chats,
+        'conversations': conversations,
+        'next_cursor': next_cursor,
     }
     
     return render(request, 'adminpanel/chat.html', context)
 
 
 @login_required
+def get_conversations(request):
+    """
+    API daftar percakapan sidebar (keyset pagination).
+    Query: cursor, role, unread=1, limit
+    """
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+
+    role = request.GET.get('role') or None
+    if role is not None and role not in dict(User.ROLE_CHOICES):
+        return JsonResponse({'error': 'Invalid role'}, status=400)
+
+    try:
+        limit = min(int(request.GET.get('limit', CONVERSATION_PAGE_SIZE)), CONVERSATION_PAGE_MAX)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit'}, status=400)
+
+    try:
+        conversations, next_cursor = get_conversation_page(
+            request.user,
+            cursor=request.GET.get('cursor'),
+            role=role,
+            unread_only=request.GET.get('unread') == '1',
+            limit=max(limit, 1),
+        )
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+    return JsonResponse({
+        'conversations': conversations,
+        'next_cursor': next_cursor,
+    })
+
+
+def _chat_messages_version(request, user_id):
+    """Token versi room dari field denormalisasi (tanpa query ke tabel pesan)"""
+    if request.user.role != 'admin':
+        return None
+    room = ChatRoom.objects.filter(admin=request.user, user_id=user_id).values_list(
+        'updated_at', 'last_message_id', 'admin_unread_count', 'user_unread_count'
+    ).first()
+    if room is None:
+        return None
+    return '|'.join(str(value) for value in room)
+
+
+@login_required
+@etag_from_version(_chat_messages_version)
 def get_chat_messages(request, user_id):
     """
     API untuk ambil pesan chat dengan user tertentu
@@ -64,34 +199,66 @@ def get_chat_messages(request, user_id):
         user=other_user
     )
     
-    # Ambil semua pesan
-    messages = room.messages.all()
-    
-    # Mark sebagai sudah dibaca
-    room.messages.filter(is_read=False).exclude(sender=request.user).update(is_read=True)
-    
+    # Cursor: ?after=<id> -> pesan baru (polling/catch-up),
+    #         ?before=<id> -> halaman pesan lama (scroll ke atas),
+    #         tanpa cursor -> MESSAGE_PAGE_SIZE pesan terbaru
+    try:
+        after = int(request.GET['after']) if request.GET.get('after') else None
+        before = int(request.GET['before']) if request.GET.get('before') else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+    base = room.messages.select_related('sender')
+    has_more = False
+    if after is not None:
+        messages = list(base.filter(id__gt=after).order_by('id'))
+    else:
+        window = base.order_by('-id')
+        if before is not None:
+            window = window.filter(id__lt=before)
+        messages = list(window[:MESSAGE_PAGE_SIZE + 1])
+        has_more = len(messages) > MESSAGE_PAGE_SIZE
+        messages = messages[:MESSAGE_PAGE_SIZE][::-1]
+
     # Format response
     messages_data = []
+    has_unread = before is None and after is None and room.get_unread_count(request.user) > 0
     for msg in messages:
-        messages_data.append({
-            'id': msg.id,
-            'sender_id': msg.sender.id,
-            'sender_name': msg.sender.username,
-            'message': msg.message,
-            'is_admin': msg.sender.role == 'admin',
-            'created_at': msg.created_at.strftime('%I:%M %p'),
-            'is_read': msg.is_read
-        })
-    
+        if not msg.is_read and msg.sender_id != request.user.id:
+            has_unread = True
+        messages_data.append(msg.to_dict())
+
+    # Gabungkan dengan riwayat lama di arsip (cold storage)
+    if after is None:
+        messages_data, has_more = archive.merge_chat_page(
+            room.id, messages_data, has_more, before_id=before, limit=MESSAGE_PAGE_SIZE
+        )
+
+    # Mark sebagai sudah dibaca (UPDATE hanya jika memang ada pesan yang belum dibaca)
+    if has_unread:
+        room.mark_read(request.user, after_id=after)
+
+    # Read-state delta: id terbaru pesan admin yang sudah dibaca user
+    last_read_id = (
+        room.messages.filter(sender=request.user, is_read=True)
+        .order_by('-id')
+        .values_list('id', flat=True)
+        .first()
+    )
+
     return JsonResponse({
         'messages': messages_data,
+        'first_id': messages_data[0]['id'] if messages_data else None,
+        'last_id': messages_data[-1]['id'] if messages_data else after,
+        'has_more': has_more,
+        'last_read_id': last_read_id,
         'room_id': room.id,
         'other_user': {
             'id': other_user.id,
             'name': other_user.username,
             'role': other_user.role
         }
-    })
+    }, json_dumps_params={'separators': (',', ':')})
 
 
 @require_POST
@@ -126,17 +293,84 @@ def send_chat_message(request):
     
     return JsonResponse({
         'success': True,
-        'message': {
-            'id': msg.id,
-            'sender_id': msg.sender.id,
-            'sender_name': msg.sender.username,
-            'message': msg.message,
-            'is_admin': True,
-            'created_at': msg.created_at.strftime('%I:%M %p'),
-        }
+        'message': msg.to_dict()
     })
 
 
+@login_required
+async def chat_stream(request, room_id):
+    """
+    Stream Server-Sent Events: pesan baru di room dikirim langsung ke admin
+    dan user room tersebut. Perlu dijalankan lewat ASGI (foodorder.asgi).
+
+    Di WSGI (runserver, foodorder.wsgi) generator async dijalankan lewat
+    async_to_sync: respons tidak pernah di-flush dan satu thread worker
+    tertahan selamanya. Di sana dijawab 204, EventSource berhenti reconnect
+    dan halaman chat memakai polling ?after= sebagai gantinya.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    user = await request.auser()
+    room = await ChatRoom.objects.filter(
+        Q(admin=user) | Q(user=user),
+        id=room_id,
+    ).afirst()
+    if room is None:
+        return JsonResponse({'error': 'Room not found'}, status=404)
+
+    async def event_stream():
+        queue = await chat_broker.subscribe(room.id)
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    msg = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f'event: message\ndata: {json.dumps(msg)}\n\n'
+        finally:
+            chat_broker.unsubscribe(room.id, queue)
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+def search_messages(request):
+    """
+    API full-text search (FTS5) pesan chat & balasan ticket untuk admin.
+    Query: q, limit
+    """
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'error': 'Query is required'}, status=400)
+
+    try:
+        limit = min(int(request.GET.get('limit', 20)), 100)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit'}, status=400)
+
+    chat_url = reverse('chats:admin_chat')
+    support_url = reverse('chats:admin_support')
+
+    results = search.search(query, request.user, limit=max(limit, 1))
+    for result in results:
+        created_at = result['created_at']
+        result['created_at'] = timezone.localtime(created_at).strftime('%d %b %Y %H:%M') if created_at else ''
+        if result['type'] == 'chat':
+            result['url'] = f"{chat_url}?user={result['user_id']}"
+        else:
+            result['url'] = f"{support_url}?ticket={result['ticket_id']}"
+
+    return JsonResponse({'results': results})
+
+
 @require_POST
 @login_required
 def delete_chat_message(request, message_id):
@@ -152,7 +386,9 @@ def delete_chat_message(request, message_id):
     if message.room.admin != request.user:
         return JsonResponse({'error': 'Unauthorized'}, status=403)
     
+    room = message.room
     message.delete()
+    room.refresh_counters()
     
     return JsonResponse({'success': True})
 
@@ -168,24 +404,34 @@ def admin_support_view(request):
     # Get all tickets
     tickets = SupportTicket.objects.select_related('user', 'assigned_to').all()
     
-    # Statistics
-    total_tickets = tickets.count()
-    open_tickets = tickets.filter(status='open').count()
-    in_progress_tickets = tickets.filter(status='in_progress').count()
-    resolved_tickets = tickets.filter(status='resolved').count()
+    # Statistics (satu query aggregate, di-cache)
+    ticket_counts = stats.ticket_stats()
     
     context = {
         'tickets': tickets,
-        'total_tickets': total_tickets,
-        'open_tickets': open_tickets,
-        'in_progress_tickets': in_progress_tickets,
-        'resolved_tickets': resolved_tickets,
+        'total_tickets': ticket_counts['total_tickets'],
+        'open_tickets': ticket_counts['open_tickets'],
+        'in_progress_tickets': ticket_counts['in_progress_tickets'],
+        'resolved_tickets': ticket_counts['resolved_tickets'],
     }
     
     return render(request, 'adminpanel/support.html', context)
 
 
+def _ticket_details_version(request, ticket_id):
+    if request.user.role != 'admin':
+        return None
+    ticket = SupportTicket.objects.filter(id=ticket_id).annotate(
+        last_reply_id=Max('replies__id'),
+        reply_count=Count('replies'),
+    ).values_list('updated_at', 'last_reply_id', 'reply_count').first()
+    if ticket is None:
+        return None
+    return '|'.join(str(value) for value in ticket)
+
+
 @login_required
+@etag_from_version(_ticket_details_version)
 def get_ticket_details(request, ticket_id):
     """API untuk ambil detail ticket dan replies"""
     if request.user.role != 'admin':
@@ -194,15 +440,10 @@ def get_ticket_details(request, ticket_id):
     try:
         ticket = SupportTicket.objects.select_related('user', 'assigned_to').get(id=ticket_id)
         
-        replies_data = []
+        # Balasan yang sudah diarsip (cold storage) lebih tua dari yang masih di tabel
+        replies_data = archive.load_ticket_replies(ticket.id)
         for reply in ticket.replies.select_related('user').all():
-            replies_data.append({
-                'id': reply.id,
-                'user': reply.user.username,
-                'user_role': reply.user.role,
-                'message': reply.message,
-                'created_at': reply.created_at.strftime('%d %b %Y %H:%M'),
-            })
+            replies_data.append(reply.to_dict())
         
         data = {
             'id': ticket.id,
@@ -277,13 +518,7 @@ def reply_to_ticket(request, ticket_id):
         
         return JsonResponse({
             'success': True,
-            'reply': {
-                'id': reply.id,
-                'user': reply.user.username,
-                'user_role': reply.user.role,
-                'message': reply.message,
-                'created_at': reply.created_at.strftime('%d %b %Y %H:%M'),
-            }
+            'reply': reply.to_dict()
         })
     except SupportTicket.DoesNotExist:
         return JsonResponse({'error': 'Ticket not found'}, status=404)
@@ -0,0 +1,314 @@
+"""
+Dispatcher order -> driver.
+
+Setiap tick, semua order READY tanpa driver dan semua driver idle diambil
+sekaligus, lalu dicari assignment global dengan biaya minimum:
+
+1. Kandidat: untuk tiap order, DISPATCH_CANDIDATES driver terdekat ke
+   restoran (maks. DISPATCH_MAX_PICKUP_KM), lewat index driver aktif per
+   proses (drivers/geoindex.py). Index tidak dibangun ulang tiap tick:
+   posisi driver idle yang dibaca tick ini hanya memindahkan driver yang
+   berpindah sel. Driver/restoran tanpa posisi dianggap sejauh batas
+   maksimum.
+2. Matching: min-cost bipartite matching (Hungarian per baris dengan
+   potensial + Dijkstra di graf kandidat yang sparse). Order diproses dari
+   yang paling lama menunggu; order yang sudah dapat driver tidak pernah
+   dilepas lagi, jadi saat driver kurang, order terlama yang dilayani.
+3. Apply: satu transaksi, UPDATE bersyarat (driver masih NULL, status masih
+   READY) per chunk dengan CASE, lalu OrderEvent driver lewat bulk insert.
+
+Fungsi build_candidates() dan min_cost_matching() murni (tanpa database)
+supaya bisa di-benchmark: `manage.py dispatch_orders --benchmark`.
+"""
+import heapq
+import random
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.utils import timezone
+
+from accounts.models import User
+from orders import events
+from orders.models import Order, OrderEvent
+from .geoindex import DriverGridIndex, driver_index, haversine_km
+
+DISPATCH_CANDIDATES = getattr(settings, 'DISPATCH_CANDIDATES', 10)
+DISPATCH_MAX_PICKUP_KM = getattr(settings, 'DISPATCH_MAX_PICKUP_KM', 15.0)
+DISPATCH_BATCH_SIZE = getattr(settings, 'DISPATCH_BATCH_SIZE', 1000)
+
+UPDATE_CHUNK_SIZE = 500
+
+
+# =============================
+# DATA
+# =============================
+def idle_drivers(now=None):
+    """Driver approved & aktif, tidak di-suspend, dan tidak sedang memegang order aktif."""
+    now = now or timezone.now()
+    busy = Order.objects.filter(driver__isnull=False, status__in=Order.ACTIVE_STATUSES).values('driver_id')
+    return (
+        User.objects.filter(role='driver', is_approved=True, is_active=True)
+        .exclude(driver_profile__suspended_until__gt=now)
+        .exclude(driver__is_active=False)
+        .exclude(id__in=busy)
+    )
+
+
+def ready_orders():
+    """Order siap diambil tanpa driver, yang paling lama menunggu dulu."""
+    return Order.objects.filter(
+        status=Order.STATUS_READY,
+        driver__isnull=True,
+    ).order_by('updated_at', 'id')
+
+
+# =============================
+# MATCHING (murni)
+# =============================
+def build_candidates(orders, drivers, k=DISPATCH_CANDIDATES, max_km=DISPATCH_MAX_PICKUP_KM, index=None):
+    """
+    orders / drivers: list (id, lat, lon); lat/lon boleh None.
+    index: ActiveDriverIndex berisi posisi driver (key = id driver); tanpa
+    index, grid sementara dibangun dari posisi di drivers.
+    Return list per order: [(biaya_km, index_driver), ...] maksimal k item.
+    """
+    if index is None:
+        grid = DriverGridIndex()
+        for j, (_, lat, lon) in enumerate(drivers):
+            if lat is not None and lon is not None:
+                grid.update(j, lat, lon)
+        unlocated = [j for j, (_, lat, lon) in enumerate(drivers) if lat is None or lon is None]
+
+        def nearest_drivers(lat, lon):
+            return [(km, j) for j, km in grid.nearest(lat, lon, k, max_km)]
+    else:
+        slot = {driver_id: j for j, (driver_id, _, _) in enumerate(drivers)}
+        located = index.ids()
+        # driver di index yang tidak idle tick ini (sibuk, belum approved, ...)
+        busy = located - slot.keys()
+        unlocated = [j for j, (driver_id, _, _) in enumerate(drivers) if driver_id not in located]
+
+        def nearest_drivers(lat, lon):
+            return [
+                (km, slot[driver_id])
+                for driver_id, km in index.nearest_active(lat, lon, k, max_km, busy)
+                if driver_id in slot
+            ]
+
+    candidates = []
+    for i, (_, lat, lon) in enumerate(orders):
+        if lat is None or lon is None:
+            # lokasi restoran tidak diketahui: semua driver sama mahalnya, sebar supaya tidak bentrok
+            start = (i * k) % len(drivers) if drivers else 0
+            picked = [(start + step) % len(drivers) for step in range(min(k, len(drivers)))]
+            candidates.append([(max_km, j) for j in picked])
+            continue
+
+        nearest = nearest_drivers(lat, lon)
+        if len(nearest) < k and unlocated:
+            nearest.extend((max_km, j) for j in unlocated[:k - len(nearest)])
+        candidates.append(nearest)
+    return candidates
+
+
+def min_cost_matching(candidates, n_drivers):
+    """
+    candidates[i]: [(biaya >= 0, index_driver), ...] untuk order i (urut prioritas).
+    Return dict index_order -> index_driver.
+
+    Tiap order dicarikan shortest augmenting path (Dijkstra dengan biaya tereduksi
+    c - u[i] - v[j] >= 0), lalu potensial node yang sudah final disesuaikan supaya
+    invarian tetap berlaku. Kebanyakan order langsung bertemu driver bebas di
+    antara kandidatnya, jadi pencarian berhenti sangat cepat.
+    """
+    inf = float('inf')
+    u = [0.0] * len(candidates)
+    v = [0.0] * n_drivers
+    driver_order = [-1] * n_drivers
+    order_driver = [-1] * len(candidates)
+
+    free_drivers = n_drivers
+    for source, edges in enumerate(candidates):
+        if not free_drivers:
+            break
+        if not edges:
+            continue
+        dist_order = {source: 0.0}
+        dist_driver = {}
+        pred = {}
+        done_orders = []
+        done_drivers = []
+        seen_orders = set()
+        seen_drivers = set()
+        heap = [(0.0, 0, source)]  # (jarak, 0=order / 1=driver, index)
+        end = None
+        end_dist = 0.0
+
+        while heap:
+            dist, kind, node = heapq.heappop(heap)
+            if kind == 0:
+                if node in seen_orders:
+                    continue
+                seen_orders.add(node)
+                done_orders.append(node)
+                for cost, j in candidates[node]:
+                    if j in seen_drivers:
+                        continue
+                    reduced = dist + cost - u[node] - v[j]
+                    if reduced < dist_driver.get(j, inf):
+                        dist_driver[j] = reduced
+                        pred[j] = node
+                        heapq.heappush(heap, (reduced, 1, j))
+            else:
+                if node in seen_drivers:
+                    continue
+                seen_drivers.add(node)
+                if driver_order[node] == -1:
+                    end, end_dist = node, dist
+                    break
+                done_drivers.append(node)
+                matched = driver_order[node]
+                if matched not in seen_orders and dist < dist_order.get(matched, inf):
+                    dist_order[matched] = dist
+                    heapq.heappush(heap, (dist, 0, matched))
+
+        if end is None:
+            # tidak ada driver bebas yang terjangkau
+            continue
+
+        for i in done_orders:
+            u[i] += end_dist - dist_order[i]
+        for j in done_drivers:
+            v[j] -= end_dist - dist_driver[j]
+
+        free_drivers -= 1
+        j = end
+        while True:
+            i = pred[j]
+            previous = order_driver[i]
+            order_driver[i] = j
+            driver_order[j] = i
+            if i == source:
+                break
+            j = previous
+
+    return {i: j for i, j in enumerate(order_driver) if j != -1}
+
+
+def plan(orders, drivers, k=DISPATCH_CANDIDATES, max_km=DISPATCH_MAX_PICKUP_KM, index=None):
+    """Return list (order_id, driver_id) untuk satu tick."""
+    if not orders or not drivers:
+        return []
+    candidates = build_candidates(orders, drivers, k, max_km, index)
+    matching = min_cost_matching(candidates, len(drivers))
+    return [(orders[i][0], drivers[j][0]) for i, j in sorted(matching.items())]
+
+
+# =============================
+# APPLY
+# =============================
+def apply_assignments(pairs, now=None):
+    """
+    Tulis assignment dalam satu transaksi. Order yang sudah diambil/berubah
+    status di antara plan dan apply dilewati. Return list (order_id, driver_id)
+    yang benar-benar ter-assign.
+    """
+    if not pairs:
+        return []
+    now = now or timezone.now()
+    wanted = dict(pairs)
+
+    with transaction.atomic():
+        for start in range(0, len(pairs), UPDATE_CHUNK_SIZE):
+            chunk = pairs[start:start + UPDATE_CHUNK_SIZE]
+            Order.objects.filter(
+                id__in=[order_id for order_id, _ in chunk],
+                driver__isnull=True,
+                status=Order.STATUS_READY,
+            ).update(
+                driver_id=Case(
+                    *[When(id=order_id, then=Value(driver_id)) for order_id, driver_id in chunk],
+                    output_field=IntegerField(),
+                ),
+                updated_at=now,
+            )
+
+        assigned = [
+            (order_id, driver_id)
+            for order_id, driver_id in Order.objects.filter(id__in=list(wanted)).values_list('id', 'driver_id')
+            if wanted[order_id] == driver_id
+        ]
+        events.record_many([
+            OrderEvent(order_id=order_id, event_type=OrderEvent.TYPE_DRIVER, new_value=str(driver_id), created_at=now)
+            for order_id, driver_id in assigned
+        ])
+    return assigned
+
+
+def dispatch_once(batch_size=DISPATCH_BATCH_SIZE):
+    """Satu tick dispatcher. Return dict ringkasan (jumlah & durasi tiap tahap)."""
+    started = time.perf_counter()
+    orders = list(ready_orders().values_list(
+        'id', 'restaurant__restaurant_profile__latitude', 'restaurant__restaurant_profile__longitude',
+    )[:batch_size])
+    drivers = []
+    index = driver_index()
+    if orders:
+        drivers = list(idle_drivers().values_list(
+            'id', 'driver_profile__latitude', 'driver_profile__longitude',
+        ))
+        index.ensure_loaded()
+        # query idle_drivers() yang menentukan status aktif/suspend tick ini;
+        # posisi terbaru dari DriverProfile (di-flush proses penerima ping),
+        # driver yang tidak berpindah sel hanya ditimpa koordinatnya
+        for driver_id, lat, lon in drivers:
+            index.set_active(driver_id, True)
+            index.set_suspended_until(driver_id, None)
+            if lat is not None and lon is not None:
+                index.update(driver_id, lat, lon)
+    loaded = time.perf_counter()
+
+    pairs = plan(orders, drivers, index=index)
+    planned = time.perf_counter()
+
+    assigned = apply_assignments(pairs)
+    applied = time.perf_counter()
+
+    return {
+        'orders': len(orders),
+        'drivers': len(drivers),
+        'planned': len(pairs),
+        'assigned': len(assigned),
+        'load_ms': (loaded - started) * 1000,
+        'plan_ms': (planned - loaded) * 1000,
+        'apply_ms': (applied - planned) * 1000,
+    }
+
+
+def benchmark(n_orders=1000, n_drivers=1000, seed=0, k=DISPATCH_CANDIDATES, max_km=DISPATCH_MAX_PICKUP_KM):
+    """Ukur build_candidates + min_cost_matching dengan posisi acak dalam satu kota."""
+    rng = random.Random(seed)
+
+    def point():
+        return rng.uniform(-6.35, -6.10), rng.uniform(106.70, 106.95)
+
+    orders = [(i, *point()) for i in range(n_orders)]
+    drivers = [(j, *point()) for j in range(n_drivers)]
+
+    started = time.perf_counter()
+    candidates = build_candidates(orders, drivers, k, max_km)
+    built = time.perf_counter()
+    matching = min_cost_matching(candidates, n_drivers)
+    matched = time.perf_counter()
+
+    total_km = sum(haversine_km(*orders[i][1:], *drivers[j][1:]) for i, j in matching.items())
+    return {
+        'orders': n_orders,
+        'drivers': n_drivers,
+        'assigned': len(matching),
+        'avg_pickup_km': total_km / len(matching) if matching else 0.0,
+        'candidates_ms': (built - started) * 1000,
+        'matching_ms': (matched - built) * 1000,
+    }
@@ -0,0 +1,337 @@
+"""
+Index spasial (grid seragam) untuk query "N driver terdekat".
+
+Posisi driver dimasukkan ke sel grid berukuran DRIVER_GRID_CELL_KM. Query
+memeriksa sel di sekitar titik asal ring demi ring sampai N kandidat
+ditemukan dan ring berikutnya pasti lebih jauh dari kandidat ke-N, lalu
+jarak tepat (haversine) kandidat dihitung sekaligus dengan NumPy kalau
+tersedia (fallback Python murni).
+
+driver_index() adalah index per proses untuk driver aktif (Driver.is_active,
+tidak di-suspend lewat DriverProfile.suspended_until), dipakai dispatcher
+(drivers/dispatch.py) untuk mencari kandidat driver tiap tick. Index dibangun
+dari DriverProfile saat pertama dipakai dan dimuat ulang tiap
+DRIVER_INDEX_REFRESH_SECONDS; di antaranya diperbarui di tempat: posisi driver
+idle yang dibaca dispatcher tiap tick, ping lokasi yang diterima proses ini
+(drivers/locations.py) dan perubahan profil (drivers/signals.py). Proses yang
+belum pernah memakai index (mis. web worker tanpa dispatcher) tidak
+memuatnya hanya karena ada ping.
+"""
+import heapq
+import math
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+try:
+    import numpy as np
+except ImportError:  # NumPy opsional; refinement jatuh ke Python murni
+    np = None
+
+DRIVER_GRID_CELL_KM = getattr(settings, 'DRIVER_GRID_CELL_KM', 1.0)
+DRIVER_INDEX_REFRESH_SECONDS = getattr(settings, 'DRIVER_INDEX_REFRESH_SECONDS', 60)
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+# di bawah jumlah ini overhead membuat array lebih mahal dari loop biasa
+NUMPY_MIN_CANDIDATES = 64
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def refine(lat, lon, ids, lats, lons, n, max_km=None):
+    """Jarak tepat semua kandidat, return [(driver_id, km), ...] n terdekat urut naik."""
+    if not ids:
+        return []
+
+    if np is not None and len(ids) >= NUMPY_MIN_CANDIDATES:
+        lat1, lon1 = math.radians(lat), math.radians(lon)
+        lat2 = np.radians(np.asarray(lats, dtype=float))
+        lon2 = np.radians(np.asarray(lons, dtype=float))
+        a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        dist = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+        if max_km is not None:
+            keep = np.nonzero(dist <= max_km)[0]
+        else:
+            keep = np.arange(len(ids))
+        if len(keep) > n:
+            keep = keep[np.argpartition(dist[keep], n - 1)[:n]]
+        keep = keep[np.argsort(dist[keep], kind='stable')]
+        return [(ids[i], float(dist[i])) for i in keep]
+
+    best = heapq.nsmallest(n, (
+        (haversine_km(lat, lon, dlat, dlon), driver_id)
+        for driver_id, dlat, dlon in zip(ids, lats, lons)
+    ))
+    return [(driver_id, km) for km, driver_id in best if max_km is None or km <= max_km]
+
+
+class DriverGridIndex:
+    """Grid seragam posisi driver; update & hapus O(1)."""
+
+    def __init__(self, cell_km=None):
+        self.cell_km = cell_km or DRIVER_GRID_CELL_KM
+        self.cell_deg = self.cell_km / KM_PER_DEGREE
+        self.cells = {}      # (baris, kolom) -> {driver_id: (lat, lon)}
+        self.positions = {}  # driver_id -> (lat, lon, sel)
+        self.bounds = None   # (baris min, baris max, kolom min, kolom max) yang pernah terisi
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def ids(self):
+        """Snapshot id driver yang punya posisi di index."""
+        with self._lock:
+            return set(self.positions)
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def update(self, driver_id, lat, lon):
+        cell = self._cell(lat, lon)
+        with self._lock:
+            previous = self.positions.get(driver_id)
+            if previous is not None and previous[2] != cell:
+                bucket = self.cells.get(previous[2])
+                if bucket is not None:
+                    bucket.pop(driver_id, None)
+                    if not bucket:
+                        del self.cells[previous[2]]
+            self.cells.setdefault(cell, {})[driver_id] = (lat, lon)
+            self.positions[driver_id] = (lat, lon, cell)
+            if self.bounds is None:
+                self.bounds = (cell[0], cell[0], cell[1], cell[1])
+            else:
+                min_row, max_row, min_col, max_col = self.bounds
+                self.bounds = (min(min_row, cell[0]), max(max_row, cell[0]),
+                               min(min_col, cell[1]), max(max_col, cell[1]))
+
+    def remove(self, driver_id):
+        with self._lock:
+            previous = self.positions.pop(driver_id, None)
+            if previous is None:
+                return
+            bucket = self.cells.get(previous[2])
+            if bucket is not None:
+                bucket.pop(driver_id, None)
+                if not bucket:
+                    del self.cells[previous[2]]
+
+    def _ring(self, row, col, radius):
+        if radius == 0:
+            yield row, col
+            return
+        for c in range(col - radius, col + radius + 1):
+            yield row - radius, c
+            yield row + radius, c
+        for r in range(row - radius + 1, row + radius):
+            yield r, col - radius
+            yield r, col + radius
+
+    def _cell_min_km(self, lat, lon, cell, lon_factor):
+        """Batas bawah jarak (km) dari titik ke sel; lon_factor = cos lintang terbesar di sekitar."""
+        lat_lo, lon_lo = cell[0] * self.cell_deg, cell[1] * self.cell_deg
+        dy = max(0.0, lat_lo - lat, lat - (lat_lo + self.cell_deg)) * KM_PER_DEGREE
+        dx = max(0.0, lon_lo - lon, lon - (lon_lo + self.cell_deg)) * KM_PER_DEGREE * lon_factor
+        # sedikit margin: aproksimasi datar vs haversine
+        return math.hypot(dx, dy) * 0.999
+
+    def _collect(self, row, col, radius_from, radius_to, ids, lats, lons, exclude, within=None):
+        for radius in range(radius_from, radius_to + 1):
+            for cell in self._ring(row, col, radius):
+                bucket = self.cells.get(cell)
+                if not bucket:
+                    continue
+                if within is not None and self._cell_min_km(within[0], within[1], cell, within[2]) > within[3]:
+                    continue
+                for driver_id, (dlat, dlon) in bucket.items():
+                    if exclude and driver_id in exclude:
+                        continue
+                    ids.append(driver_id)
+                    lats.append(dlat)
+                    lons.append(dlon)
+
+    def nearest(self, lat, lon, n=10, max_km=None, exclude=None):
+        """n driver terdekat dari (lat, lon): [(driver_id, km), ...] urut naik."""
+        if n <= 0 or not self.positions:
+            return []
+        row, col = self._cell(lat, lon)
+        # lebar sel terkecil (km) di sekitar titik; kolom menyempit ke arah kutub
+        lon_factor = max(math.cos(math.radians(min(abs(lat) + self.cell_deg, 90.0))), 1e-6)
+        min_cell_km = self.cell_km * lon_factor
+        # tanpa batas jarak: cukup sampai semua sel yang pernah terisi tercakup
+        min_row, max_row, min_col, max_col = self.bounds
+        max_radius = max(abs(row - min_row), abs(row - max_row), abs(col - min_col), abs(col - max_col))
+        if max_km is not None:
+            max_radius = min(max_radius, int(math.ceil(max_km / min_cell_km)) + 1)
+
+        ids, lats, lons = [], [], []
+        with self._lock:
+            radius = 0
+            while radius <= max_radius and len(ids) < n:
+                self._collect(row, col, radius, radius, ids, lats, lons, exclude)
+                radius += 1
+            if not ids:
+                return []
+            # kandidat ke-n sudah ketemu; driver di ring > r berjarak >= (r - 1) * lebar sel,
+            # dan sel yang batas bawah jaraknya > kandidat ke-n dilewati
+            best = refine(lat, lon, ids, lats, lons, n, max_km)
+            if len(best) >= n:
+                limit_km = best[-1][1]
+                needed = int(math.ceil(limit_km / min_cell_km)) + 1
+            else:
+                limit_km = max_km
+                needed = max_radius
+            if needed >= radius:
+                within = None if limit_km is None else (lat, lon, lon_factor, limit_km)
+                self._collect(row, col, radius, min(needed, max_radius), ids, lats, lons, exclude, within)
+                best = refine(lat, lon, ids, lats, lons, n, max_km)
+        return best
+
+    def clear(self):
+        with self._lock:
+            self.cells = {}
+            self.positions = {}
+            self.bounds = None
+
+
+# =============================
+# INDEX DRIVER AKTIF PER PROSES
+# =============================
+class ActiveDriverIndex(DriverGridIndex):
+    """DriverGridIndex yang hanya berisi driver aktif & tidak di-suspend."""
+
+    def __init__(self, cell_km=None, refresh_seconds=None):
+        super().__init__(cell_km)
+        self.refresh_seconds = DRIVER_INDEX_REFRESH_SECONDS if refresh_seconds is None else refresh_seconds
+        self.active = set()   # driver aktif (boleh masuk index)
+        self.suspended = {}   # driver_id -> suspended_until, hanya yang pernah di-suspend
+        self.loaded_at = None
+
+    def load(self):
+        """Bangun ulang dari database: posisi terakhir di DriverProfile + status aktif."""
+        from accounts.models import DriverProfile, User
+
+        inactive = set(
+            User.objects.filter(role='driver')
+            .filter(driver__is_active=False)
+            .values_list('id', flat=True)
+        )
+        rows = DriverProfile.objects.filter(user__role='driver', user__is_active=True).values_list(
+            'user_id', 'latitude', 'longitude', 'suspended_until',
+        )
+        active = set()
+        suspended = {}
+        fresh = DriverGridIndex(self.cell_km)
+        for driver_id, lat, lon, suspended_until in rows.iterator(chunk_size=5000):
+            if driver_id in inactive:
+                continue
+            active.add(driver_id)
+            if suspended_until is not None:
+                suspended[driver_id] = suspended_until
+            if lat is not None and lon is not None:
+                fresh.update(driver_id, lat, lon)
+
+        with self._lock:
+            self.cells, self.positions, self.bounds = fresh.cells, fresh.positions, fresh.bounds
+            self.active = active
+            self.suspended = suspended
+            self.loaded_at = time.monotonic()
+
+    def ensure_loaded(self):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at >= self.refresh_seconds:
+            self.load()
+
+    def set_active(self, driver_id, is_active):
+        if is_active:
+            self.active.add(driver_id)
+        else:
+            self.active.discard(driver_id)
+            self.remove(driver_id)
+
+    def set_suspended_until(self, driver_id, suspended_until):
+        if suspended_until is None:
+            self.suspended.pop(driver_id, None)
+        else:
+            self.suspended[driver_id] = suspended_until
+
+    def update_location(self, driver_id, lat, lon):
+        """
+        Dipanggil setiap ping lokasi. Diabaikan selama index belum dimuat di
+        proses ini; driver yang belum dikenal menunggu load berikutnya.
+        """
+        if driver_id in self.active:
+            self.update(driver_id, lat, lon)
+
+    def nearest_active(self, lat, lon, n=10, max_km=None, exclude=None):
+        """nearest() tanpa driver yang sedang di-suspend; exclude: set id driver."""
+        self.ensure_loaded()
+        now = timezone.now()
+        # suspend jarang terjadi: saring saat query, bukan dengan menghapus dari grid
+        skip = {driver_id for driver_id, until in self.suspended.items() if until > now}
+        if exclude:
+            skip = skip | exclude if skip else exclude
+        return self.nearest(lat, lon, n, max_km, skip)
+
+
+_driver_index = ActiveDriverIndex()
+
+
+def driver_index():
+    return _driver_index
+
+
+def benchmark(n_drivers=50000, n_queries=1000, n=10, seed=0, cell_km=None):
+    """Ukur build, update dan query nearest pada driver acak dalam satu kota."""
+    rng = random.Random(seed)
+
+    def point():
+        return rng.uniform(-6.40, -6.05), rng.uniform(106.65, 107.00)
+
+    drivers = [(driver_id, *point()) for driver_id in range(n_drivers)]
+    index = DriverGridIndex(cell_km)
+
+    started = time.perf_counter()
+    for driver_id, lat, lon in drivers:
+        index.update(driver_id, lat, lon)
+    built = time.perf_counter()
+
+    moves = [(rng.randrange(n_drivers), *point()) for _ in range(n_queries)]
+    started_moves = time.perf_counter()
+    for driver_id, lat, lon in moves:
+        index.update(driver_id, lat, lon)
+    moved = time.perf_counter()
+
+    queries = [point() for _ in range(n_queries)]
+    timings = []
+    for lat, lon in queries:
+        t0 = time.perf_counter()
+        index.nearest(lat, lon, n)
+        timings.append(time.perf_counter() - t0)
+    timings.sort()
+
+    # pembanding: scan semua driver
+    scan_started = time.perf_counter()
+    for lat, lon in queries[:20]:
+        heapq.nsmallest(n, ((haversine_km(lat, lon, dlat, dlon), driver_id)
+                            for driver_id, (dlat, dlon, _) in index.positions.items()))
+    scan_ms = (time.perf_counter() - scan_started) * 1000 / min(20, len(queries))
+
+    return {
+        'drivers': n_drivers,
+        'queries': n_queries,
+        'numpy': np is not None,
+        'build_ms': (built - started) * 1000,
+        'update_us': (moved - started_moves) * 1e6 / max(len(moves), 1),
+        'query_p50_us': timings[len(timings) // 2] * 1e6,
+        'query_p99_us': timings[int(len(timings) * 0.99) - 1] * 1e6,
+        'scan_ms': scan_ms,
+    }
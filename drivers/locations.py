@@ -0,0 +1,172 @@
+"""
+Posisi driver realtime.
+
+Ping lokasi tidak ditulis ke database satu per satu. Setiap proses punya satu
+LocationStore:
+
+- latest: posisi terakhir per driver di memori, langsung dibaca tracking.
+- history: sampel maksimal satu titik per driver per LOCATION_SAMPLE_SECONDS.
+- index spasial driver aktif (drivers/geoindex.py) ikut diperbarui per ping.
+- flush tiap LOCATION_FLUSH_SECONDS: bulk insert DriverLocation, bulk update
+  posisi terakhir di DriverProfile (dipakai dispatcher) dan cache.set_many
+  supaya proses lain bisa membaca posisi terbaru.
+
+Flush dijalankan thread latar (daemon) per proses yang dimulai saat ping
+pertama, jadi titik yang tertunda tetap tertulis walau ping berhenti; request
+ping sendiri tidak pernah menunggu flush. Saat proses berhenti normal, sisa
+buffer di-flush sekali lagi (atexit). flush() juga bisa dipanggil langsung.
+"""
+import atexit
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .geoindex import driver_index
+
+LOCATION_SAMPLE_SECONDS = getattr(settings, 'LOCATION_SAMPLE_SECONDS', 10)
+LOCATION_FLUSH_SECONDS = getattr(settings, 'LOCATION_FLUSH_SECONDS', 5)
+LOCATION_CACHE_TTL = getattr(settings, 'LOCATION_CACHE_TTL', 300)
+
+# Batas buffer riwayat kalau database sedang gagal ditulis
+MAX_PENDING_HISTORY = 100000
+
+CACHE_KEY = 'driver_location:{}'
+
+
+def _to_datetime(ts):
+    return datetime.fromtimestamp(ts, tz=dt_timezone.utc)
+
+
+class LocationStore:
+    """Posisi terakhir per driver + buffer riwayat yang di-flush secara batch."""
+
+    def __init__(self, sample_seconds=None, flush_seconds=None):
+        self.sample_seconds = LOCATION_SAMPLE_SECONDS if sample_seconds is None else sample_seconds
+        self.flush_seconds = LOCATION_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self.latest = {}        # driver_id -> (lat, lon, ts)
+        self._last_sample = {}  # driver_id -> ts sampel riwayat terakhir
+        self._history = []      # (driver_id, lat, lon, ts)
+        self._dirty = set()     # driver yang posisi terakhirnya belum di-flush
+        self._lock = threading.Lock()
+        self._flusher = None
+        self.pings = 0
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._run_flusher, name='location-flush', daemon=True)
+        self._flusher.start()
+        atexit.register(self._flush_at_exit)
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_seconds or 1)
+            try:
+                self.flush()
+            except Exception:
+                # data sudah dikembalikan ke buffer, dicoba lagi di putaran berikutnya
+                pass
+            finally:
+                # koneksi database thread ini; jangan ditahan selama tidur
+                connections.close_all()
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def ingest(self, driver_id, points):
+        """
+        Terima titik (lat, lon, ts epoch) milik satu driver, urutan bebas.
+        Return jumlah titik yang diterima.
+        """
+        if not points:
+            return 0
+
+        if self._flusher is None:
+            self._start_flusher()
+
+        with self._lock:
+            current = self.latest.get(driver_id)
+            last_sample = self._last_sample.get(driver_id, 0.0)
+            for lat, lon, ts in sorted(points, key=lambda point: point[2]):
+                if current is None or ts >= current[2]:
+                    current = (lat, lon, ts)
+                if ts - last_sample >= self.sample_seconds:
+                    self._history.append((driver_id, lat, lon, ts))
+                    last_sample = ts
+            self.latest[driver_id] = current
+            self._last_sample[driver_id] = last_sample
+            self._dirty.add(driver_id)
+            self.pings += len(points)
+
+        driver_index().update_location(driver_id, current[0], current[1])
+        return len(points)
+
+    def flush(self):
+        """Tulis riwayat & posisi terakhir yang tertunda. Return jumlah titik riwayat."""
+        from accounts.models import DriverProfile
+        from .models import DriverLocation
+
+        with self._lock:
+            history, self._history = self._history, []
+            dirty, self._dirty = self._dirty, set()
+            latest = {driver_id: self.latest[driver_id] for driver_id in dirty}
+
+        if not history and not latest:
+            return 0
+
+        try:
+            DriverLocation.objects.bulk_create([
+                DriverLocation(driver_id=driver_id, latitude=lat, longitude=lon, recorded_at=_to_datetime(ts))
+                for driver_id, lat, lon, ts in history
+            ], batch_size=1000)
+
+            profiles = list(DriverProfile.objects.filter(user_id__in=list(latest)))
+            for profile in profiles:
+                lat, lon, ts = latest[profile.user_id]
+                profile.latitude, profile.longitude = lat, lon
+                profile.location_updated_at = _to_datetime(ts)
+            DriverProfile.objects.bulk_update(
+                profiles, ['latitude', 'longitude', 'location_updated_at'], batch_size=500,
+            )
+        except Exception:
+            # kembalikan ke buffer, dicoba lagi di flush berikutnya
+            with self._lock:
+                self._history = (history + self._history)[-MAX_PENDING_HISTORY:]
+                self._dirty |= dirty
+            raise
+
+        cache.set_many(
+            {CACHE_KEY.format(driver_id): position for driver_id, position in latest.items()},
+            LOCATION_CACHE_TTL,
+        )
+        return len(history)
+
+    def get(self, driver_id):
+        """Posisi terakhir (lat, lon, ts): yang terbaru dari memori & cache, lalu DriverProfile."""
+        local = self.latest.get(driver_id)
+        # ping driver bisa jatuh ke proses lain, yang mem-flush-nya ke cache
+        shared = cache.get(CACHE_KEY.format(driver_id))
+        if local is not None or shared is not None:
+            return max((p for p in (local, shared) if p is not None), key=lambda p: p[2])
+
+        from accounts.models import DriverProfile
+        row = (
+            DriverProfile.objects.filter(user_id=driver_id, latitude__isnull=False, longitude__isnull=False)
+            .values_list('latitude', 'longitude', 'location_updated_at')
+            .first()
+        )
+        if row is None:
+            return None
+        lat, lon, updated_at = row
+        return lat, lon, updated_at.timestamp() if updated_at else None
+
+
+location_store = LocationStore()
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from drivers import geoindex
+
+class Command(BaseCommand):
+    help = "Benchmark index spasial driver (grid + refinement) dengan posisi acak"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drivers', type=int, default=50000)
+        parser.add_argument('--queries', type=int, default=1000)
+        parser.add_argument('--nearest', type=int, default=10, help="Jumlah driver terdekat per query")
+        parser.add_argument('--cell-km', type=float, default=None)
+
+    def handle(self, *args, **options):
+        result = geoindex.benchmark(
+            options['drivers'], options['queries'], options['nearest'], cell_km=options['cell_km'],
+        )
+        self.stdout.write(
+            f"{result['drivers']} drivers ({'numpy' if result['numpy'] else 'pure python'} refinement): "
+            f"build {result['build_ms']:.1f} ms, update {result['update_us']:.1f} us, "
+            f"nearest p50 {result['query_p50_us']:.1f} us / p99 {result['query_p99_us']:.1f} us, "
+            f"full scan {result['scan_ms']:.1f} ms"
+        )
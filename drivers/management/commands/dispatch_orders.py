@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from drivers import dispatch
+
+class Command(BaseCommand):
+    help = "Assign order READY ke driver idle secara global (min-cost matching), per tick"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Jalan terus secara periodik (worker)")
+        parser.add_argument('--interval', type=float, default=getattr(settings, 'DISPATCH_INTERVAL', 5.0),
+                            help="Jeda antar tick (detik) untuk --loop")
+        parser.add_argument('--batch-size', type=int, default=dispatch.DISPATCH_BATCH_SIZE,
+                            help="Maksimal order per tick")
+        parser.add_argument('--benchmark', action='store_true',
+                            help="Ukur planner dengan data acak (tanpa database)")
+        parser.add_argument('--orders', type=int, default=1000, help="Jumlah order untuk --benchmark")
+        parser.add_argument('--drivers', type=int, default=1000, help="Jumlah driver untuk --benchmark")
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            result = dispatch.benchmark(options['orders'], options['drivers'])
+            self.stdout.write(
+                f"{result['orders']} orders x {result['drivers']} drivers: "
+                f"assigned {result['assigned']}, avg pickup {result['avg_pickup_km']:.2f} km, "
+                f"candidates {result['candidates_ms']:.1f} ms, matching {result['matching_ms']:.1f} ms"
+            )
+            return
+
+        while True:
+            result = dispatch.dispatch_once(batch_size=options['batch_size'])
+            if result['orders'] or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Dispatched {result['assigned']}/{result['planned']} "
+                    f"({result['orders']} ready orders, {result['drivers']} idle drivers) "
+                    f"load {result['load_ms']:.1f} ms, plan {result['plan_ms']:.1f} ms, apply {result['apply_ms']:.1f} ms"
+                ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
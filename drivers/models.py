@@ -8,3 +8,19 @@ class Driver(models.Model):
 
     def __str__(self):
         return self.user.username
+
+
+class DriverLocation(models.Model):
+    """Riwayat posisi driver (sampel, bukan setiap ping). Ditulis bulk oleh drivers/locations.py."""
+    driver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='locations')
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    recorded_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['driver', '-recorded_at'], name='driverloc_driver_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.driver.username} @ {self.latitude},{self.longitude}"
@@ -0,0 +1,22 @@
+# drivers/signals.py
+# Jaga index spasial driver aktif (drivers/geoindex.py) tetap sinkron dengan
+# status aktif / suspend driver.
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from accounts.models import DriverProfile
+from .geoindex import driver_index
+from .models import Driver
+
+
+@receiver(post_save, sender=Driver)
+def update_driver_active(sender, instance, **kwargs):
+    driver_index().set_active(instance.user_id, instance.is_active)
+
+
+@receiver(post_save, sender=DriverProfile)
+def update_driver_suspension(sender, instance, created=False, update_fields=None, **kwargs):
+    if created:
+        driver_index().set_active(instance.user_id, True)
+    if update_fields is not None and 'suspended_until' not in update_fields:
+        return
+    driver_index().set_suspended_until(instance.user_id, instance.suspended_until)
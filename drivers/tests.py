@@ -1,3 +1,45 @@
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from accounts.models import User
+from orders.models import Order
+
+
+class DriverDashboardTests(TestCase):
+    """Dashboard driver dengan order aktif (tombol status ke drivers:driver_update_status)."""
+
+    def setUp(self):
+        self.driver = User.objects.create(username='driver', role='driver', is_approved=True)
+        customer = User.objects.create(username='customer', role='customer')
+        restaurant = User.objects.create(username='resto', role='restaurant', is_approved=True)
+        self.order = Order.objects.create(
+            customer=customer, restaurant=restaurant, driver=self.driver,
+            total_price=10, status=Order.STATUS_READY,
+        )
+        self.client.force_login(self.driver)
+
+    def test_dashboard_renders_active_order_actions(self):
+        url = reverse('drivers:driver_update_status', args=[self.order.id])
+        for status, to in (
+            (Order.STATUS_READY, Order.STATUS_PICKED),
+            (Order.STATUS_PICKED, Order.STATUS_DELIVERING),
+            (Order.STATUS_DELIVERING, Order.STATUS_DELIVERED),
+        ):
+            Order.objects.filter(id=self.order.id).update(status=status)
+            response = self.client.get(reverse('drivers:driver_dashboard'))
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, f'action="{url}?to={to}"')
+
+    def test_accepted_order_has_no_driver_action(self):
+        Order.objects.filter(id=self.order.id).update(status=Order.STATUS_ACCEPTED)
+        response = self.client.get(reverse('drivers:driver_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, reverse('drivers:driver_update_status', args=[self.order.id]))
+
+    def test_status_buttons_post_legal_transitions(self):
+        url = reverse('drivers:driver_update_status', args=[self.order.id])
+        self.assertEqual(self.client.get(f'{url}?to=picked').status_code, 405)
+        for to in (Order.STATUS_PICKED, Order.STATUS_DELIVERING, Order.STATUS_DELIVERED):
+            self.client.post(f'{url}?to={to}')
+            self.order.refresh_from_db()
+            self.assertEqual(self.order.status, to)
@@ -7,6 +7,10 @@ urlpatterns = [
     path("dashboard/", views.driver_dashboard, name="driver_dashboard"),
     path("orders/available/", views.driver_available_orders, name="driver_available_orders"),
     path("take-order/<int:order_id>/", views.take_order, name="take_order"),
+    path("accept-order/<int:order_id>/", views.driver_accept_order, name="driver_accept_order"),
     path("update-status/<int:order_id>/", views.update_status, name="update_status"),
+    path("orders/<int:order_id>/status/", views.driver_update_status, name="driver_update_status"),
     path("history/", views.driver_history, name="driver_history"),
+    path("api/location/", views.location_ping, name="location_ping"),
+    path("api/location/order/<int:order_id>/", views.order_driver_location, name="order_driver_location"),
 ]
@@ -1,8 +1,28 @@
+import json
+import time
+from datetime import datetime
+
+from django.db.models import Q
 from django.http import JsonResponse
-from django.shortcuts import render, get_object_or_404
-from orders.models import Order
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib import messages
+from django.views.decorators.http import require_POST
+from orders.models import Order, InvalidTransition
+from orders.claims import claim_order
+from orders.feed import available_feed
 from django.contrib.auth.decorators import login_required
+from .locations import location_store
+
+# Riwayat antar per halaman; order yang sudah diantar atau selesai
+HISTORY_PAGE_SIZE = 20
+HISTORY_STATUSES = (Order.STATUS_DELIVERED, Order.STATUS_COMPLETED)
+
+# Status yang boleh di-set oleh driver; sisanya milik restoran / admin
+DRIVER_STATUSES = (Order.STATUS_PICKED, Order.STATUS_DELIVERING, Order.STATUS_DELIVERED)
 
+# Ping lokasi: maksimal titik per request, dan toleransi jam device (detik)
+MAX_LOCATION_POINTS = 500
+MAX_CLOCK_SKEW = 60
 
 
 @login_required
@@ -15,48 +35,78 @@ def driver_dashboard(request):
 
     active_order = Order.objects.filter(
         driver=driver,
-        status__in=["accepted", "picked", "delivering"]
-    ).first()
+        status__in=Order.ACTIVE_STATUSES
+    ).select_related("restaurant__restaurant_profile", "customer").first()
 
-    available_orders = Order.objects.filter(
-        driver__isnull=True,
-        status="waiting"
-    )
+    # feed sama untuk semua driver: di-cache per versi (orders/feed.py)
+    available_orders = available_feed()
 
-    history = Order.objects.filter(
-        driver=driver,
-        status="delivered"
-    )
+    history, next_cursor = _history_page(driver)
 
     return render(request, "dashboard/driver_dashboard.html", {
         "active_order": active_order,
         "available_orders": available_orders,
         "history": history,
+        "history_next_cursor": next_cursor,
     })
 
+
+def _history_page(driver, cursor=None):
+    """
+    Satu halaman riwayat antar driver, terbaru dulu. Keyset pagination di
+    (created_at, id) lewat index order_driver_created_idx; cursor
+    "<created_at iso>|<id>". Return (orders, cursor berikutnya atau None).
+    Raise ValueError kalau cursor tidak valid.
+    """
+    orders = Order.objects.filter(
+        driver=driver,
+        status__in=HISTORY_STATUSES,
+    ).select_related("restaurant__restaurant_profile").order_by("-created_at", "-id")
+
+    if cursor:
+        created_at, order_id = cursor.split("|")
+        created_at = datetime.fromisoformat(created_at)
+        orders = orders.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=int(order_id)))
+
+    page = list(orders[:HISTORY_PAGE_SIZE + 1])
+    if len(page) <= HISTORY_PAGE_SIZE:
+        return page, None
+    page = page[:HISTORY_PAGE_SIZE]
+    return page, f"{page[-1].created_at.isoformat()}|{page[-1].id}"
+
 @login_required
 def take_order(request, order_id):
-    order = get_object_or_404(Order, id=order_id)
+    if request.user.role != "driver":
+        return JsonResponse({"success": False, "message": "Access denied!"}, status=403)
 
-    if order.status != "waiting":
-        return JsonResponse({"success": False, "message": "Order no longer available."})
-
-    order.driver = request.user
-    order.status = "assigned"
-    order.save()
+    if not claim_order(order_id, request.user):
+        # cek keberadaan hanya di jalur gagal supaya klaim sukses tetap satu query
+        get_object_or_404(Order, id=order_id)
+        return JsonResponse({"success": False, "message": "Order no longer available."}, status=409)
 
     return JsonResponse({"success": True, "message": "Order taken!"})
 
 
 @login_required
 def update_status(request, order_id):
-    import json
-    body = json.loads(request.body)
+    try:
+        body = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"success": False, "message": "Invalid JSON."}, status=400)
 
     order = get_object_or_404(Order, id=order_id, driver=request.user)
+    new_status = body.get("status")
+
+    if new_status not in DRIVER_STATUSES:
+        return JsonResponse({"success": False, "message": "Invalid status."}, status=400)
 
-    order.status = body.get("status")
-    order.save()
+    try:
+        changed = order.transition_to(new_status, actor=request.user, driver=request.user)
+    except InvalidTransition as e:
+        return JsonResponse({"success": False, "message": str(e)}, status=400)
+
+    if not changed:
+        return JsonResponse({"success": False, "message": "Order was changed, please reload."}, status=409)
 
     return JsonResponse({"success": True, "message": "Status updated!"})
 
@@ -67,7 +117,7 @@ def update_status(request, order_id):
 
 @login_required
 def driver_available_orders(request):
-    orders = Order.objects.filter(assigned_driver=None, status="pending")
+    orders = available_feed()
     return render(request, "driver/available_orders.html", {"orders": orders})
 
 
@@ -77,74 +127,133 @@ def driver_available_orders(request):
 @login_required
 def driver_accept_order(request, order_id):
     driver = request.user
-    order = get_object_or_404(Order, id=order_id)
 
     if driver.role != 'driver':
         messages.error(request, "Access denied!")
         return redirect('accounts:dashboard')
 
-    if order.driver is not None:
+    # Driver ambil order (UPDATE bersyarat, status order tidak diubah)
+    if not claim_order(order_id, driver):
+        get_object_or_404(Order, id=order_id)
         messages.error(request, "Order already taken by another driver!")
-        return redirect('accounts:driver_dashboard')
+        return redirect('drivers:driver_dashboard')
 
-    # Driver ambil order
-    order.driver = driver
-    order.status = "confirmed"
-    order.save()
-
-    messages.success(request, f"You accepted order #{order.id}")
-    return redirect('accounts:driver_dashboard')
+    messages.success(request, f"You accepted order #{order_id}")
+    return redirect('drivers:driver_dashboard')
 
 # # Dashboard Order Aktif Driver
 
 @login_required
 def driver_my_orders(request):
     orders = Order.objects.filter(
-        assigned_driver=request.user,
-        status__in=["accepted", "delivering"]
+        driver=request.user,
+        status__in=Order.ACTIVE_STATUSES
     )
     return render(request, "driver/my_orders.html", {"orders": orders})
 
 # # Driver Update Status Pengantaran
 
 @login_required
+@require_POST
 def driver_update_status(request, order_id):
     driver = request.user
     order = get_object_or_404(Order, id=order_id)
 
     if order.driver != driver:
         messages.error(request, "You cannot update this order.")
-        return redirect('accounts:driver_dashboard')
+        return redirect('drivers:driver_dashboard')
 
     next_status = request.GET.get("to")
 
-    allowed = {
-        "confirmed": "preparing",
-        "preparing": "delivering",
-        "delivering": "completed",
-    }
-
-    if order.status not in allowed:
-        messages.error(request, "Invalid status change.")
-        return redirect('accounts:driver_dashboard')
-
-    # Status update
-    if allowed[order.status] == next_status:
-        order.status = next_status
-        order.save()
-        messages.success(request, f"Order status updated to {next_status}!")
+    # Status update (UPDATE bersyarat lewat state machine Order)
+    if next_status in DRIVER_STATUSES and order.can_transition_to(next_status):
+        if order.transition_to(next_status, actor=driver, driver=driver):
+            messages.success(request, f"Order status updated to {next_status}!")
+        else:
+            messages.error(request, "Order was changed, please reload.")
     else:
         messages.error(request, "Invalid status transition.")
 
-    return redirect('accounts:driver_dashboard')
+    return redirect('drivers:driver_dashboard')
 
 # # Riwayat Pengiriman Driver
 
 @login_required
 def driver_history(request):
-    orders = Order.objects.filter(
-        assigned_driver=request.user,
-        status="delivered"
-    )
-    return render(request, "driver/history.html", {"orders": orders})
+    try:
+        orders, next_cursor = _history_page(request.user, request.GET.get("cursor"))
+    except ValueError:
+        messages.error(request, "Invalid page cursor!")
+        return redirect("drivers:driver_history")
+    return render(request, "driver/history.html", {
+        "orders": orders,
+        "next_cursor": next_cursor,
+        "is_first_page": not request.GET.get("cursor"),
+    })
+
+
+# # Lokasi Driver (ping GPS batch & tracking)
+
+def _parse_location_points(raw, now):
+    """Validasi titik GPS dari body JSON. Return list (lat, lon, ts) atau None."""
+    points = []
+    for item in raw:
+        if not isinstance(item, dict):
+            return None
+        try:
+            lat = float(item["lat"])
+            lon = float(item.get("lng", item.get("lon")))
+            ts = float(item.get("ts") or now)
+        except (KeyError, TypeError, ValueError):
+            return None
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return None
+        # jam device yang terlalu maju dipotong ke waktu server
+        points.append((lat, lon, min(ts, now + MAX_CLOCK_SKEW)))
+    return points
+
 
+@login_required
+@require_POST
+def location_ping(request):
+    """
+    Terima satu atau banyak titik GPS driver:
+    {"points": [{"lat": .., "lng": .., "ts": epoch}, ...]} atau satu titik {"lat": .., "lng": ..}
+    """
+    if request.user.role != "driver":
+        return JsonResponse({"success": False, "message": "Access denied!"}, status=403)
+
+    try:
+        body = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"success": False, "message": "Invalid JSON."}, status=400)
+
+    raw = body.get("points", [body]) if isinstance(body, dict) else body
+    if not isinstance(raw, list) or not raw or len(raw) > MAX_LOCATION_POINTS:
+        return JsonResponse({"success": False, "message": "Invalid points."}, status=400)
+
+    points = _parse_location_points(raw, time.time())
+    if points is None:
+        return JsonResponse({"success": False, "message": "Invalid points."}, status=400)
+
+    accepted = location_store.ingest(request.user.id, points)
+    return JsonResponse({"success": True, "accepted": accepted})
+
+
+@login_required
+def order_driver_location(request, order_id):
+    """Posisi terakhir driver untuk order ini (customer, restoran pemilik order, atau admin)."""
+    user = request.user
+    order = get_object_or_404(Order.objects.only("customer_id", "restaurant_id", "driver_id"), id=order_id)
+
+    if user.role != "admin" and user.id not in (order.customer_id, order.restaurant_id, order.driver_id):
+        return JsonResponse({"error": "Unauthorized"}, status=403)
+    if order.driver_id is None:
+        return JsonResponse({"error": "No driver assigned"}, status=404)
+
+    position = location_store.get(order.driver_id)
+    if position is None:
+        return JsonResponse({"error": "Driver location unknown"}, status=404)
+
+    lat, lon, ts = position
+    return JsonResponse({"driver_id": order.driver_id, "lat": lat, "lng": lon, "ts": ts})
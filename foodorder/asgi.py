@@ -3,6 +3,11 @@ ASGI config for foodorder project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Stream realtime chat (chats.views.chat_stream) dan tracking order
+(orders.views.order_stream / restaurant_stream) memakai async view, jadi
+jalankan lewat server ASGI (mis. ``uvicorn foodorder.asgi:application``)
+supaya koneksi SSE tidak memakan satu thread per client.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -91,6 +92,21 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # WAL: pembaca tidak terblokir penulis (stream, dashboard) dan commit
+        # batch (ingest order, flush lokasi) jauh lebih murah
+        'OPTIONS': {
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            # transaksi yang membaca lalu menulis (checkout) mengambil lock tulis
+            # di awal; tanpa ini upgrade lock bisa gagal "database is locked"
+            # saat banyak checkout bersamaan
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # database test di file, bukan memori: test konkurensi (stok menu)
+        # menjalankan checkout dari banyak thread dengan koneksi sendiri
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
@@ -145,3 +161,79 @@ DJANGO_BROWSER_RELOAD_EXCLUDE = [
     # Ini akan mengecualikan semua path yang dimulai dengan /restaurants/
     '/restaurants/', 
 ]
+
+# Chat realtime (SSE): interval (detik) task fan-out membaca pesan baru dari
+# database untuk pesan yang dikirim dari proses worker lain
+CHAT_STREAM_POLL_INTERVAL = 1.0
+
+# Tracking order realtime (SSE, orders/realtime.py): interval (detik) task
+# fan-out membaca OrderEvent baru yang dicatat proses worker lain
+ORDER_STREAM_POLL_INTERVAL = 1.0
+
+# Arsip chat: pesan chat (sudah dibaca) & balasan ticket resolved/closed yang
+# lebih tua dari ini dipindah ke cold storage oleh `manage.py archive_chats`
+CHAT_ARCHIVE_AFTER_DAYS = 90
+
+# Cache dipakai sebagai state bersama antar proses: counter klaim order
+# (orders/claims.py), versi & lock feed driver (orders/feed.py), invalidasi
+# statistik admin (accounts/stats.py) dan posisi driver terbaru
+# (drivers/locations.py). Begitu ada lebih dari satu proses (beberapa worker
+# web, atau `dispatch_orders --loop` di samping web) cache WAJIB bersama:
+# set REDIS_URL (mis. redis://127.0.0.1:6379/1, butuh paket `redis`).
+# Tanpa REDIS_URL dipakai LocMem yang hanya berlaku per proses: cukup untuk
+# development dengan satu proses `runserver`, tapi antar proses counter
+# terpecah, feed driver basi sampai TTL dan posisi driver tidak terbaca.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Cache statistik dashboard admin (detik), lihat accounts/stats.py
+ADMIN_STATS_CACHE_TTL = 30
+
+# Dispatcher driver (`manage.py dispatch_orders --loop`): jeda antar tick
+# (detik), jumlah kandidat driver terdekat per order, jarak jemput maksimum
+# dan jumlah order READY maksimal per tick
+DISPATCH_INTERVAL = 5.0
+DISPATCH_CANDIDATES = 10
+DISPATCH_MAX_PICKUP_KM = 15.0
+DISPATCH_BATCH_SIZE = 1000
+
+# Lokasi driver (drivers/locations.py): riwayat disampel maksimal satu titik
+# per driver tiap LOCATION_SAMPLE_SECONDS, ditulis batch tiap
+# LOCATION_FLUSH_SECONDS; posisi terakhir disimpan di cache selama
+# LOCATION_CACHE_TTL detik untuk proses lain
+LOCATION_SAMPLE_SECONDS = 10
+LOCATION_FLUSH_SECONDS = 5
+LOCATION_CACHE_TTL = 300
+
+# Index spasial driver (drivers/geoindex.py): ukuran sel grid (km) dan
+# interval muat ulang dari DriverProfile (detik)
+DRIVER_GRID_CELL_KM = 1.0
+DRIVER_INDEX_REFRESH_SECONDS = 60
+
+# Feed order yang bisa diambil driver (orders/feed.py): di-cache per versi,
+# versi naik tiap order baru/perubahan status/assign driver; TTL (detik)
+# membatasi umur entri versi lama
+DRIVER_FEED_CACHE_TTL = 60
+
+# Delta sync order (orders/sync.py): token tidak dimajukan melewati event
+# yang lebih muda dari ini (detik), supaya event dari transaksi yang commit
+# belakangan tidak terlewat
+ORDER_SYNC_SETTLE_SECONDS = 2
+
+# Idempotency-Key (accounts/idempotency.py, tabel IdempotencyKey): lama
+# respons disimpan untuk retry (detik) dan batas penanda request yang masih
+# berjalan. Entri kedaluwarsa dihapus `manage.py purge_idempotency_keys` (cron)
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+IDEMPOTENCY_PENDING_TTL = 60
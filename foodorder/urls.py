@@ -29,5 +29,8 @@ urlpatterns = [
     # drivers
     path('drivers/', include('drivers.urls', namespace='drivers')), # PASTIKAN ADA INI
 
+    # orders (stream SSE tracking order)
+    path('orders/', include('orders.urls', namespace='orders')),
+
    
 ]
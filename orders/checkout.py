@@ -0,0 +1,142 @@
+"""
+Keranjang customer (di session) dan checkout atomik.
+
+Keranjang disimpan di session sebagai {'restaurant_id': id, 'items':
+{menu_item_id: qty}}; satu keranjang = satu restoran = satu order. Harga
+tidak disimpan di keranjang: saat checkout semua MenuItem diambil dengan
+satu query IN, total dihitung dengan Decimal, lalu Order dan semua
+OrderItem (snapshot nama & harga) ditulis di transaksi yang sama. Stok menu
+yang dihitung dikurangi terakhir dengan satu UPDATE bersyarat
+(restaurants/stock.py) tanpa mengunci baris menu saat membaca. Jumlah
+query tetap berapa pun baris keranjangnya.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+
+from restaurants import stock
+from restaurants.models import MenuItem
+from .models import Order, OrderItem
+
+CART_SESSION_KEY = 'cart'
+MAX_CART_LINES = 50
+MAX_QUANTITY = 99
+
+
+class CheckoutError(ValueError):
+    """Keranjang tidak bisa di-checkout. errors: {menu_item_id: pesan}."""
+
+    def __init__(self, message, errors=None):
+        self.errors = errors or {}
+        super().__init__(message)
+
+
+def get_cart(session):
+    cart = session.get(CART_SESSION_KEY) or {}
+    return {
+        'restaurant_id': cart.get('restaurant_id'),
+        # key JSON session selalu string
+        'items': {int(item_id): quantity for item_id, quantity in cart.get('items', {}).items()},
+    }
+
+
+def _save(session, cart):
+    if cart['items']:
+        session[CART_SESSION_KEY] = {
+            'restaurant_id': cart['restaurant_id'],
+            'items': {str(item_id): quantity for item_id, quantity in cart['items'].items()},
+        }
+    else:
+        session.pop(CART_SESSION_KEY, None)
+
+
+def clear_cart(session):
+    session.pop(CART_SESSION_KEY, None)
+
+
+def set_quantity(session, menu_item_id, quantity):
+    """
+    Set jumlah satu menu di keranjang (0 = hapus). Raise CheckoutError kalau
+    menu tidak ada / tidak tersedia atau dari restoran lain. Return keranjang.
+    """
+    if isinstance(quantity, bool) or not isinstance(quantity, int) or not 0 <= quantity <= MAX_QUANTITY:
+        raise CheckoutError(f"Quantity must be between 0 and {MAX_QUANTITY}.")
+
+    cart = get_cart(session)
+    if quantity == 0:
+        cart['items'].pop(menu_item_id, None)
+        _save(session, cart)
+        return cart
+
+    item = MenuItem.objects.filter(id=menu_item_id).values('restaurant_id', 'is_available', 'stock').first()
+    if item is None or not item['is_available']:
+        raise CheckoutError("Menu item is not available.", {menu_item_id: 'Not available.'})
+    if item['stock'] is not None and quantity > item['stock']:
+        raise CheckoutError(f"Only {item['stock']} left.", {menu_item_id: f"Only {item['stock']} left."})
+    if cart['items'] and cart['restaurant_id'] != item['restaurant_id']:
+        raise CheckoutError("Cart already contains items from another restaurant.")
+    if menu_item_id not in cart['items'] and len(cart['items']) >= MAX_CART_LINES:
+        raise CheckoutError(f"Cart is limited to {MAX_CART_LINES} items.")
+
+    cart['restaurant_id'] = item['restaurant_id']
+    cart['items'][menu_item_id] = quantity
+    _save(session, cart)
+    return cart
+
+
+def priced_lines(cart, menu):
+    """List (MenuItem, qty) dan total untuk keranjang; menu: {id: MenuItem}."""
+    lines = [(menu[item_id], quantity) for item_id, quantity in cart['items'].items() if item_id in menu]
+    total = sum((item.price * quantity for item, quantity in lines), Decimal('0.00'))
+    return lines, total
+
+
+def checkout(customer, cart, notes=None):
+    """
+    Buat Order + OrderItem dari keranjang dalam satu transaksi dan kurangi
+    stok. Raise CheckoutError kalau keranjang kosong, ada menu yang hilang /
+    tidak tersedia / kurang stok, atau menu dari lebih dari satu restoran.
+    Return order.
+    """
+    if not cart['items']:
+        raise CheckoutError("Cart is empty.")
+
+    with transaction.atomic():
+        menu = MenuItem.objects.only(
+            'id', 'restaurant_id', 'name', 'price', 'is_available', 'stock',
+        ).in_bulk(list(cart['items']))
+
+        errors = {}
+        for item_id, quantity in cart['items'].items():
+            item = menu.get(item_id)
+            if item is None or not item.is_available:
+                errors[item_id] = 'Not available.'
+            elif item.stock is not None and item.stock < quantity:
+                errors[item_id] = f'Only {item.stock} left.'
+        if errors:
+            raise CheckoutError("Some items are no longer available.", errors)
+        restaurant_ids = {item.restaurant_id for item in menu.values()}
+        if len(restaurant_ids) != 1:
+            raise CheckoutError("Cart contains items from more than one restaurant.")
+
+        lines, total = priced_lines(cart, menu)
+        # signal post_save mencatat event 'created' (orders/signals.py)
+        order = Order.objects.create(
+            customer=customer,
+            restaurant_id=restaurant_ids.pop(),
+            total_price=total,
+            notes=notes or None,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, menu_item=item, item_name=item.name, quantity=quantity, price=item.price)
+            for item, quantity in lines
+        ])
+
+        # terakhir, supaya baris menu terkunci sesingkat mungkin
+        try:
+            stock.reserve({item.id: quantity for item, quantity in lines if item.stock is not None})
+        except stock.OutOfStock as e:
+            raise CheckoutError("Some items are out of stock.", {
+                item_id: f'Only {left} left.' for item_id, left in e.shortages.items()
+            })
+    return order
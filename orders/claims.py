@@ -0,0 +1,81 @@
+"""
+Klaim order oleh driver.
+
+Klaim adalah satu UPDATE bersyarat (compare-and-set):
+
+    UPDATE orders_order SET driver_id = ?, updated_at = ?
+    WHERE id = ? AND driver_id IS NULL AND status IN (...)
+
+Database yang menjamin hanya satu driver menang; tidak ada read-modify-write
+di Python dan status order tidak ikut ditulis, jadi perubahan status dari
+restoran di saat yang sama tidak tertimpa. Klaim yang menang dicatat sebagai
+OrderEvent di transaksi yang sama.
+
+Counter kontensi disimpan di cache (cache.incr) supaya murah di jalur panas.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from . import events
+from .models import Order, OrderEvent
+
+# Order boleh diambil driver selama belum ada driver dan belum diantar
+CLAIMABLE_STATUSES = (
+    Order.STATUS_PENDING,
+    Order.STATUS_ACCEPTED,
+    Order.STATUS_PREPARING,
+    Order.STATUS_READY,
+)
+
+CLAIM_ATTEMPTS_KEY = 'order_claims:attempts'
+CLAIM_SUCCESS_KEY = 'order_claims:success'
+CLAIM_CONFLICT_KEY = 'order_claims:conflicts'
+CLAIM_STATS_KEYS = (CLAIM_ATTEMPTS_KEY, CLAIM_SUCCESS_KEY, CLAIM_CONFLICT_KEY)
+
+
+def _incr(key):
+    # add() tidak menimpa nilai yang sudah ada; incr() atomik di backend cache
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # key terhapus di antara add() dan incr()
+        cache.set(key, 1, timeout=None)
+
+
+def available_orders():
+    """Order yang masih bisa diklaim, terlama dulu."""
+    return Order.objects.filter(
+        driver__isnull=True,
+        status__in=CLAIMABLE_STATUSES,
+    ).order_by('created_at', 'id')
+
+
+def claim_order(order_id, driver):
+    """Coba klaim order untuk driver. Return True kalau driver ini yang menang."""
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = available_orders().filter(id=order_id).update(driver=driver, updated_at=now) == 1
+        if claimed:
+            events.record(order_id, OrderEvent.TYPE_DRIVER, new_value=driver.pk, actor=driver, at=now)
+
+    _incr(CLAIM_ATTEMPTS_KEY)
+    _incr(CLAIM_SUCCESS_KEY if claimed else CLAIM_CONFLICT_KEY)
+    return claimed
+
+
+def claim_stats():
+    values = cache.get_many(CLAIM_STATS_KEYS)
+    attempts = values.get(CLAIM_ATTEMPTS_KEY, 0)
+    conflicts = values.get(CLAIM_CONFLICT_KEY, 0)
+    return {
+        'attempts': attempts,
+        'success': values.get(CLAIM_SUCCESS_KEY, 0),
+        'conflicts': conflicts,
+        'conflict_rate': round(conflicts / attempts, 4) if attempts else 0.0,
+    }
+
+
+def reset_claim_stats():
+    cache.delete_many(CLAIM_STATS_KEYS)
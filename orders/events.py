@@ -0,0 +1,209 @@
+"""
+Log event order (OrderEvent) dan proyeksi statistiknya.
+
+Setiap perubahan status, driver dan pembayaran ditambahkan sebagai satu baris
+OrderEvent. Proyeksi (RestaurantPrepStats, DriverDeliveryStats,
+HourlyOrderStats) diperbarui di transaksi yang sama dengan UPDATE ... F() + n,
+jadi biayanya konstan per event. Dashboard membaca proyeksi, bukan scan Order.
+
+projection_deltas() adalah fungsi murni yang dipakai bersama oleh update
+inkremental dan rebuild_projections() (replay seluruh log).
+
+Setelah commit, event order baru/status/driver menaikkan versi feed order
+yang bisa diambil driver (orders/feed.py), dan semua event membangunkan
+stream SSE order (orders/realtime.py).
+"""
+from types import SimpleNamespace
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (
+    DriverDeliveryStats, HourlyOrderStats, Order, OrderEvent, RestaurantPrepStats,
+)
+from .realtime import order_broker
+
+PROJECTION_MODELS = (RestaurantPrepStats, DriverDeliveryStats, HourlyOrderStats)
+
+# Event yang bisa mengubah daftar order yang bisa diambil driver (orders/feed.py)
+FEED_EVENT_TYPES = (OrderEvent.TYPE_CREATED, OrderEvent.TYPE_STATUS, OrderEvent.TYPE_DRIVER)
+
+
+def hour_bucket(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def projection_deltas(event, order, entered_at=None):
+    """
+    Efek satu event ke proyeksi: list (model, key, {field: delta}).
+    order cukup punya restaurant_id, driver_id, picked_at; entered_at adalah
+    waktu order masuk status lama (hanya untuk event status).
+    """
+    changes = []
+    hour = {'hour': hour_bucket(event.created_at)}
+
+    if event.event_type == OrderEvent.TYPE_CREATED:
+        changes.append((HourlyOrderStats, hour, {'created_count': 1}))
+
+    elif event.event_type == OrderEvent.TYPE_STATUS:
+        if event.old_value == Order.STATUS_PREPARING and entered_at is not None:
+            changes.append((RestaurantPrepStats, {'restaurant_id': order.restaurant_id}, {
+                'prepared_count': 1,
+                'total_prep_seconds': (event.created_at - entered_at).total_seconds(),
+            }))
+        if event.new_value == Order.STATUS_DELIVERED and order.driver_id and order.picked_at:
+            changes.append((DriverDeliveryStats, {'driver_id': order.driver_id}, {
+                'delivered_count': 1,
+                'total_delivery_seconds': (event.created_at - order.picked_at).total_seconds(),
+            }))
+        if event.new_value == Order.STATUS_COMPLETED:
+            changes.append((HourlyOrderStats, hour, {'completed_count': 1}))
+        elif event.new_value == Order.STATUS_CANCELLED:
+            changes.append((HourlyOrderStats, hour, {'cancelled_count': 1}))
+
+    return changes
+
+
+def _bump(model, key, deltas):
+    """UPDATE baris proyeksi += deltas; buat barisnya kalau belum ada."""
+    increments = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**key).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # dibuat proses lain di antara UPDATE dan INSERT
+        model.objects.filter(**key).update(**increments)
+
+
+def _status_entered_at(order):
+    """Waktu order masuk status saat ini: event status/created terakhirnya."""
+    entered_at = (
+        OrderEvent.objects.filter(
+            order_id=order.pk,
+            event_type__in=(OrderEvent.TYPE_CREATED, OrderEvent.TYPE_STATUS),
+        )
+        .order_by('-id')
+        .values_list('created_at', flat=True)
+        .first()
+    )
+    return entered_at or order.created_at
+
+
+def record_many(events, saved=False):
+    """
+    Simpan banyak OrderEvent sekaligus (bulk_create) dan terapkan proyeksinya,
+    digabung per baris proyeksi. Event status harus membawa instance order.
+    saved=True: event sudah ditulis pemanggil (orders/ingest.py), di
+    transaksi yang sama.
+    """
+    if not events:
+        return []
+
+    totals = {}
+    entered = {}
+    for event in events:
+        entered_at = None
+        if event.event_type == OrderEvent.TYPE_STATUS:
+            entered_at = entered.get(event.order_id) or _status_entered_at(event.order)
+        if event.event_type in (OrderEvent.TYPE_CREATED, OrderEvent.TYPE_STATUS):
+            entered[event.order_id] = event.created_at
+
+        order = event.order if event.event_type == OrderEvent.TYPE_STATUS else None
+        if order is not None and event.new_value == Order.STATUS_DELIVERED:
+            # driver bisa di-set lewat queryset.update (klaim); instance bisa basi
+            order.refresh_from_db(fields=['driver', 'picked_at'])
+        for model, key, deltas in projection_deltas(event, order, entered_at):
+            bucket = totals.setdefault((model, tuple(key.items())), {})
+            for field, value in deltas.items():
+                bucket[field] = bucket.get(field, 0) + value
+
+    with transaction.atomic():
+        if not saved:
+            OrderEvent.objects.bulk_create(events)
+        for (model, key), deltas in totals.items():
+            _bump(model, dict(key), deltas)
+        if any(event.event_type in FEED_EVENT_TYPES for event in events):
+            from .feed import bump_version
+            transaction.on_commit(bump_version)
+        # bangunkan stream SSE order di proses ini (orders/realtime.py)
+        transaction.on_commit(order_broker.notify)
+    return events
+
+
+def record(order, event_type, old_value='', new_value='', actor=None, at=None):
+    target = {'order': order} if isinstance(order, Order) else {'order_id': order}
+    event = OrderEvent(
+        **target,
+        event_type=event_type,
+        old_value='' if old_value is None else str(old_value),
+        new_value='' if new_value is None else str(new_value),
+        actor=actor,
+        created_at=at or timezone.now(),
+    )
+    return record_many([event])[0]
+
+
+def rebuild_projections(chunk_size=5000):
+    """Kosongkan proyeksi lalu hitung ulang dari seluruh OrderEvent. Return jumlah event."""
+    rows = (
+        OrderEvent.objects.order_by('order_id', 'id')
+        .values_list(
+            'order_id', 'event_type', 'old_value', 'new_value', 'created_at',
+            'order__restaurant_id', 'order__driver_id', 'order__picked_at',
+        )
+    )
+
+    totals = {}
+    current_order = None
+    entered_at = None
+    count = 0
+    for order_id, event_type, old_value, new_value, created_at, restaurant_id, driver_id, picked_at in rows.iterator(chunk_size=chunk_size):
+        if order_id != current_order:
+            current_order, entered_at = order_id, None
+        event = SimpleNamespace(event_type=event_type, old_value=old_value, new_value=new_value, created_at=created_at)
+        order = SimpleNamespace(restaurant_id=restaurant_id, driver_id=driver_id, picked_at=picked_at)
+
+        for model, key, deltas in projection_deltas(event, order, entered_at):
+            bucket = totals.setdefault((model, tuple(key.items())), {})
+            for field, value in deltas.items():
+                bucket[field] = bucket.get(field, 0) + value
+        if event_type in (OrderEvent.TYPE_CREATED, OrderEvent.TYPE_STATUS):
+            entered_at = created_at
+        count += 1
+
+    with transaction.atomic():
+        for model in PROJECTION_MODELS:
+            model.objects.all().delete()
+        for model in PROJECTION_MODELS:
+            model.objects.bulk_create(
+                [model(**dict(key), **deltas) for (m, key), deltas in totals.items() if m is model],
+                batch_size=1000,
+            )
+    return count
+
+
+def backfill_created_events(batch_size=2000):
+    """Buat event 'created' untuk order lama yang belum punya event sama sekali."""
+    missing = (
+        Order.objects.filter(events__isnull=True)
+        .order_by('id')
+        .values_list('id', 'status', 'created_at')
+    )
+    batch = []
+    total = 0
+    for order_id, status, created_at in missing.iterator(chunk_size=batch_size):
+        batch.append(OrderEvent(
+            order_id=order_id, event_type=OrderEvent.TYPE_CREATED,
+            new_value=status, created_at=created_at,
+        ))
+        if len(batch) >= batch_size:
+            OrderEvent.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        OrderEvent.objects.bulk_create(batch)
+        total += len(batch)
+    return total
@@ -0,0 +1,84 @@
+"""
+Feed order yang bisa diambil driver (dashboard driver).
+
+Daftarnya sama untuk semua driver, jadi dihitung sekali lalu di-cache per
+versi: 'driver_feed:available:<versi>'. Versi dinaikkan (cache.incr) setiap
+ada event order yang bisa mengubah isi feed (order baru, perubahan status,
+driver di-assign), setelah transaksinya commit (lihat orders/events.py).
+
+Saat versi baru belum ter-cache, hanya satu request yang menghitung ulang
+(lock cache.add); request lain memakai feed versi sebelumnya supaya banyak
+driver yang refresh bersamaan tidak menghantam database.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .claims import available_orders
+
+AVAILABLE_FEED_LIMIT = 50
+AVAILABLE_FEED_TTL = getattr(settings, 'DRIVER_FEED_CACHE_TTL', 60)
+
+FEED_VERSION_KEY = 'driver_feed:available:version'
+FEED_KEY = 'driver_feed:available:{}'
+FEED_LAST_KEY = 'driver_feed:available:last'
+FEED_LOCK_KEY = 'driver_feed:available:lock'
+FEED_LOCK_TIMEOUT = 10
+
+
+def feed_version():
+    version = cache.get(FEED_VERSION_KEY)
+    if version is None:
+        # key hilang (restart/eviction): mulai dari angka baru supaya feed lama tidak terpakai
+        cache.add(FEED_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(FEED_VERSION_KEY)
+    return version
+
+
+def bump_version():
+    try:
+        cache.incr(FEED_VERSION_KEY)
+    except ValueError:
+        feed_version()
+
+
+def _compute():
+    rows = available_orders().values(
+        'id', 'status', 'total_price', 'created_at',
+        'restaurant__restaurant_profile__name', 'customer__username',
+    )[:AVAILABLE_FEED_LIMIT]
+    return [
+        {
+            'id': row['id'],
+            'status': row['status'],
+            'total_price': row['total_price'],
+            'created_at': row['created_at'],
+            'restaurant_name': row['restaurant__restaurant_profile__name'],
+            'customer_username': row['customer__username'],
+        }
+        for row in rows
+    ]
+
+
+def available_feed():
+    """List dict order yang bisa diklaim (maks. AVAILABLE_FEED_LIMIT), terlama dulu."""
+    version = feed_version()
+    key = FEED_KEY.format(version)
+    feed = cache.get(key)
+    if feed is not None:
+        return feed
+
+    locked = cache.add(FEED_LOCK_KEY, version, FEED_LOCK_TIMEOUT)
+    if not locked:
+        last = cache.get(FEED_LAST_KEY)
+        if last is not None:
+            return last[1]
+
+    try:
+        feed = _compute()
+        cache.set_many({key: feed, FEED_LAST_KEY: (version, feed)}, AVAILABLE_FEED_TTL)
+    finally:
+        if locked:
+            cache.delete(FEED_LOCK_KEY)
+    return feed
@@ -0,0 +1,283 @@
+"""
+Ingest order massal (integrasi partner, backfill).
+
+Satu batch divalidasi di Python dengan satu query user (role customer /
+restaurant / driver), lalu semua baris valid ditulis dalam satu transaksi:
+INSERT multi-row untuk Order (RETURNING id), OrderItem dan event 'created',
+lalu proyeksi per jam diterapkan sekali per batch (events.record_many).
+Total order dihitung dari item dengan Decimal saat validasi, tanpa query
+per order.
+
+INSERT ditulis langsung lewat cursor karena di volume ini kompilasi nilai
+per field oleh bulk_create lebih mahal dari query-nya sendiri. Butuh
+INSERT ... RETURNING (SQLite >= 3.35, PostgreSQL).
+
+Baris yang tidak valid dilaporkan per index ({index, errors}) dan tidak
+membatalkan baris lain.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+from django.db.models import DateTimeField
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import User
+from . import events
+from .models import Order, OrderEvent, OrderItem
+
+INGEST_BATCH_SIZE = 2000
+MAX_ITEMS_PER_ORDER = 100
+
+ORDER_FIELDS = (
+    'customer', 'restaurant', 'driver', 'total_price', 'status', 'payment_status',
+    'created_at', 'updated_at', 'notes',
+)
+ITEM_FIELDS = ('order', 'item_name', 'quantity', 'price')
+EVENT_FIELDS = ('order', 'event_type', 'old_value', 'new_value', 'created_at')
+
+CENT = Decimal('0.01')
+# batas kolom: OrderItem.price (10 digit), Order.total_price (12 digit),
+# OrderItem.quantity (IntegerField) dan primary key user (BigAutoField)
+MAX_PRICE = Decimal('99999999.99')
+MAX_TOTAL = Decimal('9999999999.99')
+MAX_QUANTITY = 2147483647
+MAX_USER_ID = 9223372036854775807
+
+STATUSES = dict(Order.STATUS_CHOICES)
+PAYMENT_STATUSES = dict(Order.PAYMENT_CHOICES)
+
+
+def _decimal(value):
+    try:
+        number = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return None
+    if not number.is_finite() or number < 0 or number > MAX_PRICE:
+        return None
+    return number.quantize(CENT)
+
+
+def _user_id(row, field, errors, required=True):
+    value = row.get(field)
+    if value in (None, ''):
+        if required:
+            errors[field] = 'Required.'
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)) or not (str(value).isascii() and str(value).isdigit()):
+        errors[field] = 'Must be a user id.'
+        return None
+    if int(value) > MAX_USER_ID:
+        errors[field] = 'Must be a user id.'
+        return None
+    return int(value)
+
+
+def _validate_items(raw, errors):
+    if raw is None:
+        return []
+    if not isinstance(raw, list) or len(raw) > MAX_ITEMS_PER_ORDER:
+        errors['items'] = f'Must be a list of at most {MAX_ITEMS_PER_ORDER} items.'
+        return []
+
+    items = []
+    for position, item in enumerate(raw):
+        if not isinstance(item, dict):
+            errors[f'items[{position}]'] = 'Must be an object.'
+            continue
+        name = item.get('item_name') or item.get('name')
+        quantity = item.get('quantity', 1)
+        price = _decimal(item.get('price'))
+        if not isinstance(name, str) or not name.strip() or len(name) > 200:
+            errors[f'items[{position}].item_name'] = 'Required, max 200 characters.'
+        elif isinstance(quantity, bool) or not isinstance(quantity, int) or not 1 <= quantity <= MAX_QUANTITY:
+            errors[f'items[{position}].quantity'] = f'Must be an integer between 1 and {MAX_QUANTITY}.'
+        elif price is None:
+            errors[f'items[{position}].price'] = 'Must be a non-negative number.'
+        else:
+            items.append((name.strip(), quantity, price))
+    return items
+
+
+def validate_row(row):
+    """
+    Return (data, errors) untuk satu baris input. data berisi field Order,
+    'items' [(nama, qty, harga)] dan 'created_at' opsional; role user dicek
+    terpisah secara batch (check_users).
+    """
+    if not isinstance(row, dict):
+        return None, {'row': 'Must be an object.'}
+
+    errors = {}
+    data = {
+        'customer_id': _user_id(row, 'customer_id', errors),
+        'restaurant_id': _user_id(row, 'restaurant_id', errors),
+        'driver_id': _user_id(row, 'driver_id', errors, required=False),
+    }
+
+    status = row.get('status', Order.STATUS_PENDING)
+    if status not in STATUSES:
+        errors['status'] = 'Invalid status.'
+    payment_status = row.get('payment_status', Order.PAYMENT_UNPAID)
+    if payment_status not in PAYMENT_STATUSES:
+        errors['payment_status'] = 'Invalid payment status.'
+    notes = row.get('notes')
+    if notes is not None and not isinstance(notes, str):
+        errors['notes'] = 'Must be a string.'
+
+    created_at = row.get('created_at')
+    if created_at is not None:
+        try:
+            created_at = parse_datetime(created_at) if isinstance(created_at, str) else None
+        except ValueError:
+            # format benar tapi tanggal tidak ada, mis. bulan 13
+            created_at = None
+        if created_at is None:
+            errors['created_at'] = 'Must be an ISO 8601 datetime.'
+        elif timezone.is_naive(created_at):
+            created_at = timezone.make_aware(created_at)
+
+    items = _validate_items(row.get('items'), errors)
+    if items:
+        total = sum((quantity * price for _, quantity, price in items), Decimal('0'))
+        if total > MAX_TOTAL:
+            errors['total_price'] = f'Order total must not exceed {MAX_TOTAL}.'
+    else:
+        total = _decimal(row.get('total_price', 0))
+        if total is None:
+            errors['total_price'] = 'Must be a non-negative number.'
+
+    if errors:
+        return None, errors
+    data.update(
+        status=status, payment_status=payment_status, notes=notes,
+        total_price=total, items=items, created_at=created_at,
+    )
+    return data, {}
+
+
+def check_users(rows):
+    """Cek role semua user di batch dengan satu query. rows: list (index, data)."""
+    ids = {data[field] for _, data in rows for field in ('customer_id', 'restaurant_id', 'driver_id') if data[field]}
+    roles = dict(User.objects.filter(id__in=ids).values_list('id', 'role'))
+
+    valid, errors = [], []
+    for index, data in rows:
+        row_errors = {}
+        for field, role in (('customer_id', 'customer'), ('restaurant_id', 'restaurant'), ('driver_id', 'driver')):
+            user_id = data[field]
+            if user_id is not None and roles.get(user_id) != role:
+                row_errors[field] = f'Unknown {role}.'
+        if row_errors:
+            errors.append({'index': index, 'errors': row_errors})
+        else:
+            valid.append((index, data))
+    return valid, errors
+
+
+def _fast_insert(model, fields, rows, returning=False):
+    """
+    INSERT multi-row langsung lewat cursor: nilai sudah bertipe Python yang
+    benar, jadi kompilasi ORM per nilai (bulk_create) dilewati. Return list
+    pk baris (urut input) kalau returning.
+    """
+    opts = model._meta
+    columns = [opts.get_field(name) for name in fields]
+    adapters = [
+        connection.ops.adapt_datetimefield_value if isinstance(field, DateTimeField) else None
+        for field in columns
+    ]
+    quote = connection.ops.quote_name
+    head = 'INSERT INTO {} ({}) VALUES '.format(
+        quote(opts.db_table), ', '.join(quote(field.column) for field in columns),
+    )
+    tail = ' RETURNING {}'.format(quote(opts.pk.column)) if returning else ''
+    row_sql = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    per_statement = max(connection.features.max_query_params // len(columns), 1)
+
+    # satu batch umumnya memakai timestamp yang sama: adaptasi sekali per nilai
+    adapted = {}
+
+    def prepare(value, adapt):
+        if adapt is None or value is None:
+            return value
+        if value not in adapted:
+            adapted[value] = adapt(value)
+        return adapted[value]
+
+    pks = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), per_statement):
+            chunk = rows[start:start + per_statement]
+            params = [prepare(value, adapt) for row in chunk for value, adapt in zip(row, adapters)]
+            cursor.execute(head + ', '.join([row_sql] * len(chunk)) + tail, params)
+            if returning:
+                pks.extend(pk for pk, in cursor.fetchall())
+    return pks
+
+
+def _insert(valid):
+    """Tulis baris valid dalam satu transaksi. Return list pk order (urut input)."""
+    now = timezone.now()
+    with transaction.atomic():
+        order_ids = _fast_insert(Order, ORDER_FIELDS, [
+            (
+                data['customer_id'], data['restaurant_id'], data['driver_id'], data['total_price'],
+                data['status'], data['payment_status'], data['created_at'] or now, now, data['notes'],
+            )
+            for _, data in valid
+        ], returning=True)
+
+        _fast_insert(OrderItem, ITEM_FIELDS, [
+            (order_id, name, quantity, price)
+            for order_id, (_, data) in zip(order_ids, valid)
+            for name, quantity, price in data['items']
+        ])
+
+        created = [
+            OrderEvent(order_id=order_id, event_type=OrderEvent.TYPE_CREATED,
+                       new_value=data['status'], created_at=data['created_at'] or now)
+            for order_id, (_, data) in zip(order_ids, valid)
+        ]
+        _fast_insert(OrderEvent, EVENT_FIELDS, [
+            (event.order_id, event.event_type, event.old_value, event.new_value, event.created_at)
+            for event in created
+        ])
+        # event sudah ditulis di atas; record_many hanya menerapkan proyeksi & notifikasi
+        events.record_many(created, saved=True)
+    return order_ids
+
+
+def ingest(rows, offset=0):
+    """
+    Validasi & simpan satu batch. offset = index baris pertama (untuk laporan
+    error di batch yang dipecah). Return {'created': [id...], 'errors': [...]}.
+    """
+    parsed, errors = [], []
+    for index, row in enumerate(rows, start=offset):
+        data, row_errors = validate_row(row)
+        if row_errors:
+            errors.append({'index': index, 'errors': row_errors})
+        else:
+            parsed.append((index, data))
+
+    valid, user_errors = check_users(parsed)
+    errors.extend(user_errors)
+    errors.sort(key=lambda error: error['index'])
+
+    created = _insert(valid) if valid else []
+    return {'created': created, 'errors': errors}
+
+
+def ingest_stream(rows, batch_size=INGEST_BATCH_SIZE):
+    """Ingest iterable panjang per batch; yield hasil ingest() tiap batch."""
+    batch = []
+    offset = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield ingest(batch, offset)
+            offset += len(batch)
+            batch = []
+    if batch:
+        yield ingest(batch, offset)
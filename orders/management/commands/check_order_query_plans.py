@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from orders import queryplans
+
+class Command(BaseCommand):
+    help = "Cek EXPLAIN QUERY PLAN query order yang panas; gagal kalau ada full table scan"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help="Tampilkan plan lengkap tiap query")
+        parser.add_argument('--benchmark', action='store_true',
+                            help="Ukur juga latensi tiap query di database saat ini (median)")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        failed = []
+        for name, plan, scans in queryplans.check_plans():
+            if scans:
+                failed.append(name)
+                self.stdout.write(self.style.ERROR(f"FULL SCAN {name}: {', '.join(scans)}"))
+            else:
+                self.stdout.write(f"ok        {name}")
+            if options['verbose_plans'] or scans:
+                for line in plan.splitlines():
+                    self.stdout.write(f"          {line}")
+
+        if options['benchmark']:
+            for name, ms in queryplans.time_queries(repeat=options['repeat']):
+                self.stdout.write(f"{ms:9.2f} ms  {name}")
+
+        if failed:
+            raise CommandError(f"{len(failed)} query order memakai full table scan")
+        self.stdout.write(self.style.SUCCESS("Semua query order panas memakai index."))
@@ -0,0 +1,61 @@
+import itertools
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from orders import ingest
+
+class Command(BaseCommand):
+    help = "Ingest order massal dari file JSONL (satu order per baris) atau JSON array"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File .jsonl / .json, atau '-' untuk stdin")
+        parser.add_argument('--batch-size', type=int, default=ingest.INGEST_BATCH_SIZE)
+        parser.add_argument('--max-errors', type=int, default=20, help="Jumlah error yang ditampilkan")
+
+    def _rows(self, stream):
+        head = stream.read(1)
+        while head.isspace():
+            head = stream.read(1)
+        if head == '[':
+            # JSON array dibaca utuh; untuk file besar pakai JSONL
+            try:
+                rows = json.loads(head + stream.read())
+            except ValueError as e:
+                raise CommandError(f"Invalid JSON: {e}")
+            yield from rows
+            return
+        for line in itertools.chain([head + stream.readline()], stream):
+            if line.strip():
+                yield self._parse(line)
+
+    def _parse(self, line):
+        try:
+            return json.loads(line)
+        except ValueError:
+            # diteruskan ke validasi supaya dilaporkan per baris
+            return None
+
+    def handle(self, *args, **options):
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        created = 0
+        errors = []
+        error_count = 0
+        started = time.perf_counter()
+        try:
+            for result in ingest.ingest_stream(self._rows(stream), options['batch_size']):
+                created += len(result['created'])
+                error_count += len(result['errors'])
+                errors.extend(result['errors'][:max(options['max_errors'] - len(errors), 0)])
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.perf_counter() - started
+        for error in errors:
+            self.stderr.write(f"row {error['index']}: {json.dumps(error['errors'])}")
+        rate = created / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created} orders, {error_count} rows rejected, {elapsed:.1f}s ({rate:.0f} orders/s)."
+        ))
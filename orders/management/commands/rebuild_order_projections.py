@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from orders import events
+
+class Command(BaseCommand):
+    help = "Hitung ulang proyeksi statistik order dari log OrderEvent"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', action='store_true',
+                            help="Buat dulu event 'created' untuk order lama yang belum punya event")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            created = events.backfill_created_events()
+            self.stdout.write(f"Backfilled {created} created events.")
+
+        total = events.rebuild_projections(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Order projections rebuilt from {total} events."))
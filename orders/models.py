@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from accounts.models import User
 from django.conf import settings
 from django.utils import timezone
@@ -53,6 +53,15 @@ from django.utils import timezone
 #         return self.status not in ['completed', 'cancelled']
 
 
+class InvalidTransition(ValueError):
+    """Perubahan status yang tidak ada di Order.TRANSITIONS."""
+
+    def __init__(self, old_status, new_status):
+        self.old_status = old_status
+        self.new_status = new_status
+        super().__init__(f"Invalid status transition: {old_status} -> {new_status}")
+
+
 class Order(models.Model):
     STATUS_PENDING = 'pending'            # dibuat customer, menunggu restoran konfirmasi
     STATUS_ACCEPTED = 'accepted'          # restoran setuju
@@ -76,6 +85,31 @@ class Order(models.Model):
         (STATUS_CANCELLED, 'Cancelled'),
     ]
 
+    # Edge status yang sah: status asal -> status tujuan yang boleh
+    TRANSITIONS = {
+        STATUS_PENDING: (STATUS_ACCEPTED, STATUS_CANCELLED),
+        STATUS_ACCEPTED: (STATUS_PREPARING, STATUS_CANCELLED),
+        STATUS_PREPARING: (STATUS_READY, STATUS_CANCELLED),
+        STATUS_READY: (STATUS_PICKED, STATUS_CANCELLED),
+        STATUS_PICKED: (STATUS_DELIVERING,),
+        STATUS_DELIVERING: (STATUS_DELIVERED,),
+        STATUS_DELIVERED: (STATUS_COMPLETED,),
+        STATUS_COMPLETED: (),
+        STATUS_CANCELLED: (),
+    }
+
+    # Kolom waktu yang diisi saat order masuk status tertentu
+    TRANSITION_TIMESTAMPS = {
+        STATUS_PICKED: 'picked_at',
+        STATUS_DELIVERED: 'delivered_at',
+        STATUS_COMPLETED: 'completed_at',
+    }
+
+    ACTIVE_STATUSES = (
+        STATUS_PENDING, STATUS_ACCEPTED, STATUS_PREPARING,
+        STATUS_READY, STATUS_PICKED, STATUS_DELIVERING,
+    )
+
     PAYMENT_UNPAID = 'unpaid'
     PAYMENT_PAID = 'paid'
 
@@ -101,26 +135,136 @@ class Order(models.Model):
 
     notes = models.TextField(blank=True, null=True)
 
-    def mark_picked(self):
-        self.status = self.STATUS_PICKED
-        self.picked_at = timezone.now()
-        self.save(update_fields=['status','picked_at','updated_at'])
+    class Meta:
+        indexes = [
+            # listing admin: keyset (created_at, id) + filter status/restaurant/driver
+            models.Index(fields=['-created_at', '-id'], name='order_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='order_status_created_idx'),
+            models.Index(fields=['restaurant', '-created_at', '-id'], name='order_rest_created_idx'),
+            models.Index(fields=['driver', '-created_at', '-id'], name='order_driver_created_idx'),
+            # hot path status + driver: order aktif driver, driver sibuk (covering) dan
+            # order tanpa driver per status (feed klaim, dispatcher: urut updated_at)
+            models.Index(fields=['status', 'driver', 'updated_at'], name='order_status_driver_idx'),
+        ]
+
+    def can_transition_to(self, new_status):
+        return new_status in self.TRANSITIONS.get(self.status, ())
 
-    def mark_delivered(self):
-        self.status = self.STATUS_DELIVERED
-        self.delivered_at = timezone.now()
-        self.save(update_fields=['status','delivered_at','updated_at'])
+    def transition_to(self, new_status, actor=None, **guards):
+        """
+        Pindahkan order ke new_status dengan satu UPDATE bersyarat
+        (WHERE status = status saat ini [AND guards]). Raise InvalidTransition
+        kalau edge tidak sah; return False kalau order sudah diubah proses lain.
+        Sukses mengirim signal order_status_changed dalam transaksi yang sama.
+        """
+        from .signals import order_status_changed
+
+        if not self.can_transition_to(new_status):
+            raise InvalidTransition(self.status, new_status)
+
+        now = timezone.now()
+        values = {'status': new_status, 'updated_at': now}
+        timestamp_field = self.TRANSITION_TIMESTAMPS.get(new_status)
+        if timestamp_field:
+            values[timestamp_field] = now
+
+        old_status = self.status
+        with transaction.atomic():
+            updated = Order.objects.filter(pk=self.pk, status=old_status, **guards).update(**values)
+            if not updated:
+                return False
+            for field, value in values.items():
+                setattr(self, field, value)
+            order_status_changed.send(
+                sender=Order, order=self, old_status=old_status,
+                new_status=new_status, actor=actor,
+            )
+        return True
+
+    def mark_picked(self, actor=None):
+        return self.transition_to(self.STATUS_PICKED, actor=actor)
+
+    def mark_delivered(self, actor=None):
+        return self.transition_to(self.STATUS_DELIVERED, actor=actor)
 
     def __str__(self):
         return f"Order #{self.id} ({self.status})"
 
 
+class OrderEvent(models.Model):
+    """
+    Log perubahan order (append-only). Ditulis oleh orders/events.py pada
+    setiap perubahan status, driver dan pembayaran; sumber untuk proyeksi
+    statistik di bawah.
+    """
+    TYPE_CREATED = 'created'
+    TYPE_STATUS = 'status'
+    TYPE_DRIVER = 'driver'
+    TYPE_PAYMENT = 'payment'
+
+    TYPE_CHOICES = [
+        (TYPE_CREATED, 'Created'),
+        (TYPE_STATUS, 'Status changed'),
+        (TYPE_DRIVER, 'Driver changed'),
+        (TYPE_PAYMENT, 'Payment changed'),
+    ]
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='events')
+    event_type = models.CharField(max_length=16, choices=TYPE_CHOICES)
+    old_value = models.CharField(max_length=32, blank=True, default='')
+    new_value = models.CharField(max_length=32, blank=True, default='')
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # bukan auto_now_add supaya bulk insert / replay bisa mengisi waktu aslinya
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['order', '-id'], name='orderevent_order_idx'),
+        ]
+
+    def __str__(self):
+        return f"Order #{self.order_id} {self.event_type}: {self.old_value} -> {self.new_value}"
+
+
+# =============================
+# PROYEKSI DARI OrderEvent
+# =============================
+class RestaurantPrepStats(models.Model):
+    """Waktu order berada di status 'preparing', per restoran."""
+    restaurant = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    prepared_count = models.PositiveIntegerField(default=0)
+    total_prep_seconds = models.FloatField(default=0)
+
+    def avg_prep_seconds(self):
+        return self.total_prep_seconds / self.prepared_count if self.prepared_count else None
+
+
+class DriverDeliveryStats(models.Model):
+    """Waktu dari picked sampai delivered, per driver."""
+    driver = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    delivered_count = models.PositiveIntegerField(default=0)
+    total_delivery_seconds = models.FloatField(default=0)
+
+    def avg_delivery_seconds(self):
+        return self.total_delivery_seconds / self.delivered_count if self.delivered_count else None
+
+
+class HourlyOrderStats(models.Model):
+    """Throughput order per jam (awal jam, UTC)."""
+    hour = models.DateTimeField(primary_key=True)
+    created_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    cancelled_count = models.PositiveIntegerField(default=0)
+
+
 class OrderItem(models.Model):
     """Items dalam order"""
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
     item_name = models.CharField(max_length=200)
     quantity = models.IntegerField(default=1)
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    # menu asal (checkout customer), untuk mengembalikan stok saat order dibatalkan
+    menu_item = models.ForeignKey('restaurants.MenuItem', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     
     def __str__(self):
         return f"{self.quantity}x {self.item_name}"
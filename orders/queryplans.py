@@ -0,0 +1,96 @@
+"""
+Query plan query order yang panas (dashboard driver/restoran/admin, feed,
+dispatcher, sync).
+
+HOT_QUERIES berisi queryset yang sama dengan yang dipakai view, dengan user
+contoh (tidak perlu data). check_plans() menjalankan EXPLAIN QUERY PLAN
+(SQLite) untuk masing-masing dan menandai full table scan ("SCAN tabel" tanpa
+index). Dipakai oleh `manage.py check_order_query_plans`, yang gagal (exit
+code 1) kalau ada query yang kehilangan index-nya.
+"""
+import re
+import time
+
+from django.db import connection
+from django.db.models import Q
+
+FULL_SCAN = re.compile(r'\bSCAN (\w+)(?! USING)(?:\s|$)')
+
+
+def _user(pk, role):
+    from accounts.models import User
+    return User(pk=pk, role=role)
+
+
+def hot_queries():
+    """List (nama, queryset). Queryset di-slice seperti di view."""
+    from drivers import dispatch
+    from drivers.views import HISTORY_STATUSES
+    from .claims import CLAIMABLE_STATUSES, available_orders
+    from .models import Order, OrderEvent
+
+    driver = _user(1, 'driver')
+    restaurant = _user(2, 'restaurant')
+    orders = Order.objects.order_by('-created_at', '-id')
+
+    return [
+        # drivers.views.driver_dashboard
+        ('driver active order', Order.objects.filter(driver=driver, status__in=Order.ACTIVE_STATUSES).order_by('pk')[:1]),
+        ('driver history', Order.objects.filter(driver=driver, status__in=HISTORY_STATUSES).order_by('-created_at', '-id')[:21]),
+        ('available orders feed', available_orders()[:50]),
+        # drivers.dispatch
+        ('dispatch ready orders', dispatch.ready_orders()[:1000]),
+        ('dispatch busy drivers', Order.objects.filter(driver__isnull=False, status__in=Order.ACTIVE_STATUSES).values('driver_id')),
+        # restaurants.views
+        ('restaurant orders', Order.objects.filter(restaurant=restaurant).order_by('-created_at')[:50]),
+        ('restaurant active queue', Order.objects.filter(restaurant=restaurant, status__in=Order.ACTIVE_STATUSES).order_by('created_at', 'id')),
+        # accounts.views.manage_orders
+        ('admin orders', orders[:21]),
+        ('admin orders by status', orders.filter(status=Order.STATUS_PENDING)[:21]),
+        ('admin orders by restaurant', orders.filter(restaurant=restaurant)[:21]),
+        ('admin orders by driver', orders.filter(driver=driver)[:21]),
+        ('admin orders without driver', orders.filter(driver__isnull=True)[:21]),
+        # orders.sync
+        ('sync driver snapshot', Order.objects.filter(
+            Q(driver=driver) | Q(driver__isnull=True, status__in=CLAIMABLE_STATUSES),
+            status__in=Order.ACTIVE_STATUSES,
+        ).order_by('-created_at', '-id')[:201]),
+        ('sync restaurant changes', OrderEvent.objects.filter(order__restaurant=restaurant, id__gt=0).order_by('id')[:201]),
+        # orders.events
+        ('order status entered', OrderEvent.objects.filter(
+            order_id=1, event_type__in=(OrderEvent.TYPE_CREATED, OrderEvent.TYPE_STATUS),
+        ).order_by('-id')[:1]),
+    ]
+
+
+def explain(queryset):
+    return queryset.explain()
+
+
+def full_scans(plan):
+    return FULL_SCAN.findall(plan)
+
+
+def check_plans(queries=None):
+    """Return list (nama, plan, tabel yang di-scan penuh)."""
+    if connection.vendor != 'sqlite':
+        raise RuntimeError('check_plans() membaca format EXPLAIN QUERY PLAN SQLite')
+    results = []
+    for name, queryset in queries or hot_queries():
+        plan = explain(queryset)
+        results.append((name, plan, full_scans(plan)))
+    return results
+
+
+def time_queries(queries=None, repeat=5):
+    """Return list (nama, median ms) tiap query, dieksekusi penuh."""
+    results = []
+    for name, queryset in queries or hot_queries():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        results.append((name, timings[len(timings) // 2]))
+    return results
@@ -0,0 +1,153 @@
+"""
+Broker realtime untuk tracking order (Server-Sent Events).
+
+Sama seperti chats/realtime.py: setiap proses worker punya satu OrderBroker,
+koneksi SSE mendaftar per channel ('order', order_id) atau
+('restaurant', restaurant_id) dan menerima event lewat asyncio.Queue.
+Fan-out antar proses memakai tabel OrderEvent sebagai log bersama: satu task
+per proses membaca event baru (id > last_id) untuk semua order & restoran
+yang sedang di-subscribe dalam satu query. Event yang dicatat di proses yang
+sama membangunkan task itu setelah commit (orders/events.py), jadi langsung
+terkirim tanpa menunggu interval polling.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+
+ORDER_CHANNEL = 'order'
+RESTAURANT_CHANNEL = 'restaurant'
+
+EVENT_FIELDS = (
+    'id', 'order_id', 'event_type', 'old_value', 'new_value', 'created_at',
+    'order__restaurant_id', 'order__status',
+)
+
+
+def event_to_dict(row):
+    return {
+        'id': row['id'],
+        'order_id': row['order_id'],
+        'restaurant_id': row['order__restaurant_id'],
+        'type': row['event_type'],
+        'old_value': row['old_value'],
+        'new_value': row['new_value'],
+        'status': row['order__status'],
+        'created_at': row['created_at'].isoformat(),
+    }
+
+
+def latest_event_id():
+    from .models import OrderEvent
+    return OrderEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def fetch_events(after_id, order_ids=(), restaurant_ids=(), until_id=None):
+    from .models import OrderEvent
+    events = OrderEvent.objects.filter(id__gt=after_id)
+    if until_id is not None:
+        events = events.filter(id__lte=until_id)
+    events = (
+        events
+        .filter(Q(order_id__in=list(order_ids)) | Q(order__restaurant_id__in=list(restaurant_ids)))
+        .order_by('id')
+        .values(*EVENT_FIELDS)
+    )
+    return [event_to_dict(row) for row in events]
+
+
+def _poll(after_id, order_ids, restaurant_ids):
+    """
+    Return (cursor baru, event). Cursor maju sampai event terakhir di tabel,
+    bukan hanya yang di-subscribe, supaya event order lain tidak di-scan ulang.
+    """
+    latest = latest_event_id()
+    if latest <= after_id:
+        return after_id, []
+    return latest, fetch_events(after_id, order_ids, restaurant_ids, until_id=latest)
+
+
+class OrderBroker:
+    """Pub/sub in-process per order / restoran, disuplai dari OrderEvent."""
+
+    def __init__(self, poll_interval=None):
+        self.poll_interval = poll_interval or getattr(settings, 'ORDER_STREAM_POLL_INTERVAL', 1.0)
+        self.subscribers = {}  # (channel, id) -> set(asyncio.Queue)
+        self.last_id = None
+        self._loop = None
+        self._wakeup = None
+        self._task = None
+
+    async def subscribe(self, channel, key):
+        self._ensure_started()
+        queue = asyncio.Queue()
+        self.subscribers.setdefault((channel, key), set()).add(queue)
+        if self.last_id is None:
+            self.last_id = await sync_to_async(latest_event_id)()
+        return queue
+
+    def unsubscribe(self, channel, key, queue):
+        queues = self.subscribers.get((channel, key))
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[(channel, key)]
+
+    def notify(self):
+        """Bangunkan task fan-out. Aman dipanggil dari thread mana pun."""
+        if self._loop is None or self._wakeup is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            # event loop sudah ditutup
+            pass
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self.last_id = None
+        self._task = loop.create_task(self._run())
+
+    def _subscribed(self, channel):
+        return [key for kind, key in self.subscribers if kind == channel]
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            if not self.subscribers:
+                # Tidak ada yang mendengarkan: jangan query, mulai ulang cursor nanti
+                self.last_id = None
+                continue
+
+            if self.last_id is None:
+                # cursor awal masih diambil oleh subscribe()
+                continue
+
+            try:
+                latest, events = await sync_to_async(_poll)(
+                    self.last_id,
+                    self._subscribed(ORDER_CHANNEL),
+                    self._subscribed(RESTAURANT_CHANNEL),
+                )
+            except Exception:
+                continue
+
+            self.last_id = max(self.last_id, latest)
+            for event in events:
+                for channel in ((ORDER_CHANNEL, event['order_id']), (RESTAURANT_CHANNEL, event['restaurant_id'])):
+                    for queue in self.subscribers.get(channel, ()):
+                        queue.put_nowait(event)
+
+
+order_broker = OrderBroker()
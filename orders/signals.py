@@ -0,0 +1,42 @@
+"""
+Signal order.
+
+order_status_changed dikirim oleh Order.transition_to() setelah UPDATE status
+berhasil, masih di dalam transaksinya. Argumen: order, old_status,
+new_status, actor (user yang melakukan perubahan, boleh None).
+
+Receiver di bawah menulis OrderEvent (orders/events.py) dan mengembalikan
+stok menu saat order dibatalkan (restaurants/stock.py).
+"""
+from django.db.models.signals import post_save
+from django.dispatch import Signal, receiver
+
+order_status_changed = Signal()
+
+
+@receiver(order_status_changed)
+def log_status_change(sender, order, old_status, new_status, actor=None, **kwargs):
+    from . import events
+    from .models import OrderEvent
+    events.record(order, OrderEvent.TYPE_STATUS, old_status, new_status, actor=actor, at=order.updated_at)
+
+
+@receiver(order_status_changed)
+def restore_stock_on_cancel(sender, order, old_status, new_status, **kwargs):
+    from restaurants import stock
+    from .models import Order, OrderItem
+    if new_status != Order.STATUS_CANCELLED:
+        return
+    quantities = {}
+    for menu_item_id, quantity in OrderItem.objects.filter(order=order, menu_item__isnull=False).values_list('menu_item_id', 'quantity'):
+        quantities[menu_item_id] = quantities.get(menu_item_id, 0) + quantity
+    stock.release(quantities)
+
+
+@receiver(post_save, sender='orders.Order')
+def log_order_created(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    from . import events
+    from .models import OrderEvent
+    events.record(instance, OrderEvent.TYPE_CREATED, new_value=instance.status, at=instance.created_at)
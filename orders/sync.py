@@ -0,0 +1,185 @@
+"""
+Delta sync order untuk aplikasi driver & restoran.
+
+Penanda perubahan adalah OrderEvent.id: log append-only yang naik monoton
+dan sudah ter-index (primary key). Setiap order baru, perubahan status,
+assign driver dan pembayaran menambah satu event, jadi "order yang berubah
+sejak token T" = order dari event dengan id > T.
+
+- Tanpa token: snapshot order aktif milik user + token = id event terakhir
+  (dibaca sebelum snapshot, jadi perubahan di antaranya ikut terkirim lagi).
+  Snapshot dipotong per SYNC_PAGE_SIZE order (terbaru dulu); selama
+  has_more, client meminta halaman berikutnya dengan token yang sama +
+  cursor=next_cursor (keyset (created_at, id)), baru setelah itu delta.
+- Dengan token: order yang punya event id > token, dalam scope user.
+
+Client menyimpan order berdasarkan id (upsert), jadi order yang terkirim dua
+kali tidak masalah. Order yang keluar dari scope driver (diambil driver lain)
+dikirim sebagai tombstone {"id", "available": false} tanpa detail order. Token tidak dimajukan melewati event yang lebih muda dari
+SYNC_SETTLE_SECONDS: event dengan id lebih kecil dari transaksi yang belum
+commit bisa muncul belakangan, dan akan ikut terkirim di sync berikutnya.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .claims import CLAIMABLE_STATUSES
+from .models import Order, OrderEvent
+
+SYNC_PAGE_SIZE = 200
+SYNC_SETTLE_SECONDS = getattr(settings, 'ORDER_SYNC_SETTLE_SECONDS', 2)
+
+SYNC_ROLES = ('driver', 'restaurant')
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+def parse_token(raw):
+    """Token dari client: string angka >= 0, kosong = belum pernah sync."""
+    if raw in (None, ''):
+        return None
+    try:
+        token = int(raw)
+    except (TypeError, ValueError):
+        raise InvalidSyncToken(raw)
+    if token < 0:
+        raise InvalidSyncToken(raw)
+    return token
+
+
+def parse_cursor(raw):
+    """Cursor halaman snapshot: "<created_at iso>|<id>", kosong = halaman pertama."""
+    if raw in (None, ''):
+        return None
+    try:
+        created_at, order_id = raw.split('|')
+        # '+' offset zona waktu yang tidak di-URL-encode terbaca sebagai spasi
+        created_at, order_id = datetime.fromisoformat(created_at.replace(' ', '+')), int(order_id)
+    except (TypeError, ValueError):
+        raise InvalidSyncToken(raw)
+    if timezone.is_naive(created_at) and settings.USE_TZ:
+        raise InvalidSyncToken(raw)
+    return created_at, order_id
+
+
+def _scope(user, prefix=''):
+    """Filter order yang relevan untuk user; prefix 'order__' untuk query OrderEvent."""
+    if user.role == 'restaurant':
+        return Q(**{f'{prefix}restaurant': user})
+    # driver: order miliknya + order tanpa driver (feed order yang bisa diambil)
+    return Q(**{f'{prefix}driver': user}) | Q(**{f'{prefix}driver__isnull': True})
+
+
+def _in_scope(order, user):
+    if user.role == 'restaurant':
+        return order.restaurant_id == user.pk
+    return order.driver_id == user.pk or (order.driver_id is None and order.status in CLAIMABLE_STATUSES)
+
+
+def _serialize(orders, user):
+    return [{
+        'id': order.id,
+        'status': order.status,
+        'payment_status': order.payment_status,
+        'total_price': str(order.total_price),
+        'restaurant_id': order.restaurant_id,
+        'restaurant_name': getattr(getattr(order.restaurant, 'restaurant_profile', None), 'name', None),
+        'customer': order.customer.username,
+        'mine': order.driver_id == user.pk,
+        'available': order.driver_id is None and order.status in CLAIMABLE_STATUSES,
+        'created_at': order.created_at.isoformat(),
+        'updated_at': order.updated_at.isoformat(),
+    } if _in_scope(order, user) else {
+        # bukan (lagi) untuk user ini: client cukup menghapusnya
+        'id': order.id,
+        'available': False,
+    } for order in orders]
+
+
+def _orders(ids):
+    return (
+        Order.objects.filter(id__in=ids)
+        .select_related('restaurant__restaurant_profile', 'customer')
+        .order_by('id')
+    )
+
+
+def snapshot(user, limit=SYNC_PAGE_SIZE, token=None, cursor=None):
+    """
+    Sync pertama: order aktif dalam scope user, satu halaman. Halaman
+    berikutnya (cursor) memakai token dari halaman pertama.
+    """
+    if token is None:
+        token = OrderEvent.objects.aggregate(last=Max('id'))['last'] or 0
+    if user.role == 'driver':
+        scope = Q(driver=user) | Q(driver__isnull=True, status__in=CLAIMABLE_STATUSES)
+    else:
+        scope = _scope(user)
+    orders = Order.objects.filter(scope, status__in=Order.ACTIVE_STATUSES)
+    if cursor is not None:
+        created_at, order_id = cursor
+        orders = orders.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=order_id))
+    rows = list(orders.order_by('-created_at', '-id').values_list('id', 'created_at')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = f"{rows[-1][1].isoformat()}|{rows[-1][0]}" if has_more else None
+    return {
+        'token': str(token),
+        'reset': cursor is None,
+        'has_more': has_more,
+        'next_cursor': next_cursor,
+        'orders': _serialize(_orders([order_id for order_id, _ in rows]), user),
+    }
+
+
+def changes_since(user, token, limit=SYNC_PAGE_SIZE):
+    """Order yang berubah setelah token. has_more = masih ada event setelah token baru."""
+    scope = _scope(user, 'order__')
+    if user.role == 'driver':
+        # order yang diambil driver lain harus hilang dari feed client
+        scope |= Q(event_type=OrderEvent.TYPE_DRIVER)
+    rows = list(
+        OrderEvent.objects.filter(scope, id__gt=token)
+        .order_by('id')
+        .values_list('id', 'order_id', 'created_at')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    settled_before = timezone.now() - timedelta(seconds=SYNC_SETTLE_SECONDS)
+    new_token = token
+    for event_id, _, created_at in rows:
+        if created_at > settled_before:
+            break
+        new_token = event_id
+    if has_more and new_token == token and rows:
+        # satu halaman penuh event baru: tetap maju supaya client tidak macet
+        new_token = rows[-1][0]
+    # berhenti di event yang belum settle: client menunggu interval poll biasa
+    has_more = has_more and new_token == rows[-1][0]
+
+    ids = {order_id for _, order_id, _ in rows}
+    return {
+        'token': str(new_token),
+        'reset': False,
+        'has_more': has_more,
+        'orders': _serialize(_orders(ids), user) if ids else [],
+    }
+
+
+def sync(user, raw_token, limit=SYNC_PAGE_SIZE, raw_cursor=None):
+    """Raise InvalidSyncToken kalau token / cursor rusak."""
+    token = parse_token(raw_token)
+    cursor = parse_cursor(raw_cursor)
+    if cursor is not None:
+        # halaman lanjutan snapshot: token dari halaman pertama wajib ikut
+        if token is None:
+            raise InvalidSyncToken(raw_cursor)
+        return snapshot(user, limit, token, cursor)
+    if token is None:
+        return snapshot(user, limit)
+    return changes_since(user, token, limit)
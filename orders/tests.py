@@ -1,3 +1,53 @@
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+from . import queryplans
+
+
+class HotQueryPlanTests(TestCase):
+    """Query order yang panas harus tetap memakai index (orders/queryplans.py)."""
+
+    def test_no_full_table_scans(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('check_plans() membaca format EXPLAIN QUERY PLAN SQLite')
+        scans = {name: found for name, plan, found in queryplans.check_plans() if found}
+        self.assertEqual(scans, {}, 'Query order memakai full table scan')
+
+
+class SnapshotPagingTests(TestCase):
+    """Snapshot sync yang lebih dari satu halaman bisa diambil seluruhnya lewat cursor."""
+
+    def test_snapshot_pages_cover_all_active_orders(self):
+        from django.urls import reverse
+        from django.utils import timezone
+        from accounts.models import User
+        from .models import Order
+        from .sync import SYNC_PAGE_SIZE
+
+        restaurant = User.objects.create(username='resto', role='restaurant')
+        customer = User.objects.create(username='customer', role='customer')
+        Order.objects.bulk_create([
+            Order(customer=customer, restaurant=restaurant, total_price=1, status=Order.STATUS_PREPARING)
+            for _ in range(SYNC_PAGE_SIZE * 2 + 5)
+        ])
+        # created_at kembar: urutan ditentukan id
+        Order.objects.update(created_at=timezone.now())
+        expected = set(Order.objects.values_list('id', flat=True))
+
+        self.client.force_login(restaurant)
+        url = reverse('accounts:order_sync_api')
+        data = self.client.get(url).json()
+        token, seen, pages = data['token'], [], 1
+        seen += [order['id'] for order in data['orders']]
+        while data['has_more']:
+            data = self.client.get(url, {'token': token, 'cursor': data['next_cursor']}).json()
+            self.assertEqual(data['token'], token)
+            seen += [order['id'] for order in data['orders']]
+            pages += 1
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(seen), len(expected))
+        self.assertEqual(set(seen), expected)
+
+        self.assertEqual(self.client.get(url, {'cursor': 'x|1', 'token': token}).status_code, 400)
+        # cursor tanpa token
+        self.assertEqual(self.client.get(url, {'cursor': f'{timezone.now().isoformat()}|1'}).status_code, 400)
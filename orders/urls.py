@@ -0,0 +1,12 @@
+from django.urls import path
+from . import views
+
+app_name = 'orders'
+
+urlpatterns = [
+    path('<int:order_id>/stream/', views.order_stream, name='order_stream'),
+    path('restaurant/stream/', views.restaurant_stream, name='restaurant_stream'),
+    # keranjang & checkout customer
+    path('cart/', views.cart_api, name='cart'),
+    path('checkout/', views.checkout_api, name='checkout'),
+]
@@ -1,3 +1,194 @@
-from django.shortcuts import render
+import asyncio
+import json
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+
+from accounts.decorators import idempotent, role_required
+from . import checkout
+from .models import Order
+from .realtime import ORDER_CHANNEL, RESTAURANT_CHANNEL, fetch_events, latest_event_id, order_broker
+
+# Kirim komentar keepalive supaya proxy tidak memutus stream yang idle
+STREAM_KEEPALIVE = 15
+
+
+def _last_event_id(request):
+    """Last-Event-ID dari browser saat reconnect (atau ?last_event_id=)."""
+    raw = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        return int(raw) if raw else None
+    except ValueError:
+        return None
+
+
+def _event_stream_response(channel, key, initial, watermark, last_event_id):
+    """
+    initial: payload event 'snapshot' pertama, dibaca SETELAH watermark (id
+    OrderEvent terakhir) diambil. Event sesudah watermark dikirim ulang dari
+    OrderEvent, jadi perubahan di antara snapshot dan subscribe tidak hilang.
+    Kalau client reconnect dengan Last-Event-ID, replay mulai dari sana.
+    """
+    replay_from = watermark if last_event_id is None else min(last_event_id, watermark)
+
+    async def event_stream():
+        # subscribe dulu baru replay, supaya tidak ada celah; duplikat dibuang lewat id
+        queue = await order_broker.subscribe(channel, key)
+        sent_id = replay_from
+        try:
+            yield 'retry: 3000\n\n'
+            yield f'event: snapshot\ndata: {json.dumps(initial)}\n\n'
+            filters = {'order_ids': [key]} if channel == ORDER_CHANNEL else {'restaurant_ids': [key]}
+            for event in await sync_to_async(fetch_events)(replay_from, **filters):
+                sent_id = max(sent_id, event['id'])
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                if event['id'] <= sent_id:
+                    continue
+                sent_id = event['id']
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            order_broker.unsubscribe(channel, key, queue)
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+async def order_stream(request, order_id):
+    """
+    Stream Server-Sent Events perubahan satu order (status, driver,
+    pembayaran) untuk customer, restoran, driver order itu dan admin.
+    Perlu dijalankan lewat ASGI (foodorder.asgi); di WSGI dijawab 204
+    (lihat chats.views.chat_stream) dan client memakai delta sync.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    user = await request.auser()
+    orders = Order.objects.filter(id=order_id)
+    if user.role != 'admin':
+        orders = orders.filter(Q(customer=user) | Q(restaurant=user) | Q(driver=user))
+    watermark = await sync_to_async(latest_event_id)()
+    order = await orders.values('id', 'status', 'payment_status', 'driver_id', 'updated_at').afirst()
+    if order is None:
+        return JsonResponse({'error': 'Order not found'}, status=404)
+
+    order['updated_at'] = order['updated_at'].isoformat()
+    return _event_stream_response(ORDER_CHANNEL, order['id'], order, watermark, _last_event_id(request))
+
+
+@login_required
+async def restaurant_stream(request):
+    """
+    Stream Server-Sent Events antrean restoran: order baru dan setiap
+    perubahan order milik restoran yang login (admin: ?restaurant=<id>).
+    Di WSGI dijawab 204 seperti order_stream.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    user = await request.auser()
+    restaurant_id = user.pk
+    if user.role == 'admin' and request.GET.get('restaurant', '').isdigit():
+        restaurant_id = int(request.GET['restaurant'])
+    elif user.role != 'restaurant':
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+
+    watermark = await sync_to_async(latest_event_id)()
+    queue = [
+        order async for order in Order.objects.filter(
+            restaurant_id=restaurant_id,
+            status__in=Order.ACTIVE_STATUSES,
+        ).order_by('created_at', 'id').values('id', 'status', 'driver_id')
+    ]
+    return _event_stream_response(
+        RESTAURANT_CHANNEL, restaurant_id, {'restaurant_id': restaurant_id, 'orders': queue},
+        watermark, _last_event_id(request),
+    )
+
+
+def _cart_payload(cart):
+    from restaurants.models import MenuItem
+
+    menu = MenuItem.objects.only('id', 'name', 'price', 'is_available').in_bulk(list(cart['items']))
+    lines, total = checkout.priced_lines(cart, menu)
+    return {
+        'restaurant_id': cart['restaurant_id'],
+        'items': [
+            {
+                'menu_item_id': item.id,
+                'name': item.name,
+                'price': str(item.price),
+                'quantity': quantity,
+                'subtotal': str(item.price * quantity),
+                'is_available': item.is_available,
+            }
+            for item, quantity in lines
+        ],
+        # menu yang sudah dihapus restoran; checkout akan menolaknya
+        'missing': [item_id for item_id in cart['items'] if item_id not in menu],
+        'total_price': str(total),
+    }
+
+
+@role_required(['customer'])
+def cart_api(request):
+    """
+    GET: isi keranjang dengan harga saat ini. POST {"menu_item_id", "quantity"}:
+    set jumlah satu menu (0 = hapus). DELETE: kosongkan keranjang.
+    """
+    if request.method == 'DELETE':
+        checkout.clear_cart(request.session)
+        return JsonResponse(_cart_payload(checkout.get_cart(request.session)))
+    if request.method == 'POST':
+        try:
+            body = json.loads(request.body)
+            menu_item_id = int(body['menu_item_id'])
+            quantity = body.get('quantity', 1)
+        except (ValueError, TypeError, KeyError):
+            return JsonResponse({'error': 'Expected {"menu_item_id": id, "quantity": n}'}, status=400)
+        try:
+            cart = checkout.set_quantity(request.session, menu_item_id, quantity)
+        except checkout.CheckoutError as e:
+            return JsonResponse({'error': str(e), 'items': e.errors}, status=400)
+        return JsonResponse(_cart_payload(cart))
+    return JsonResponse(_cart_payload(checkout.get_cart(request.session)))
+
+
+@role_required(['customer'])
+@require_POST
+@idempotent('checkout')
+def checkout_api(request):
+    """
+    Checkout keranjang di session jadi satu order (orders/checkout.py).
+    Body opsional: {"notes": "..."}. Keranjang dikosongkan kalau berhasil.
+    """
+    try:
+        body = json.loads(request.body) if request.content_type == 'application/json' and request.body else {}
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    notes = body.get('notes') if isinstance(body, dict) else None
+    if notes is not None and not isinstance(notes, str):
+        return JsonResponse({'error': 'notes must be a string'}, status=400)
+
+    try:
+        order = checkout.checkout(request.user, checkout.get_cart(request.session), notes)
+    except checkout.CheckoutError as e:
+        return JsonResponse({'error': str(e), 'items': e.errors}, status=409 if e.errors else 400)
+
+    checkout.clear_cart(request.session)
+    return JsonResponse({
+        'order_id': order.id,
+        'status': order.status,
+        'total_price': str(order.total_price),
+    }, status=201)
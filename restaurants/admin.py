@@ -4,6 +4,13 @@ from .models import Restaurant, MenuCategory, MenuItem
 
 admin.site.register(Restaurant)
 admin.site.register(MenuCategory)
-admin.site.register(MenuItem)
 
 
+@admin.register(MenuItem)
+class MenuItemAdmin(admin.ModelAdmin):
+    def save_model(self, request, obj, form, change):
+        if change:
+            # hanya field yang diedit: stock/sold_out ikut ditulis kalau memang diubah
+            obj.save(update_fields=form.changed_data)
+        else:
+            obj.save()
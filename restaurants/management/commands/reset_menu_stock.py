@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from restaurants import stock
+
+class Command(BaseCommand):
+    help = "Reset stok menu ke kapasitas harian (jalankan tiap hari sebelum buka, mis. via cron)"
+
+    def handle(self, *args, **options):
+        count = stock.reset_daily()
+        self.stdout.write(self.style.SUCCESS(f"Stock reset for {count} menu items."))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0002_alter_menucategory_restaurant_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuitem',
+            name='stock',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='daily_capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
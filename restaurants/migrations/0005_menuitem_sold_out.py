@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 21:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0004_sync_models_with_migrations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuitem',
+            name='sold_out',
+            field=models.BooleanField(default=False),
+        ),
+    ]
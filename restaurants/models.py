@@ -27,7 +27,34 @@ class MenuItem(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     description = models.TextField(blank=True)
     is_available = models.BooleanField(default=True)
+    # stok tersisa, None = tidak dibatasi. Hanya diubah lewat UPDATE ... F()
+    # (restaurants/stock.py); jadi tidak tersedia otomatis saat habis
+    stock = models.PositiveIntegerField(null=True, blank=True)
+    # kapasitas harian: stok di-reset ke nilai ini oleh `manage.py reset_menu_stock`
+    daily_capacity = models.PositiveIntegerField(null=True, blank=True)
+    # True = is_available dimatikan otomatis karena stok habis (bukan oleh
+    # restoran); hanya menu ini yang diaktifkan lagi saat stok kembali
+    sold_out = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # diubah lewat UPDATE ... F() di restaurants/stock.py; save() biasa tidak
+    # menulisnya kecuali disebut di update_fields
+    STOCK_FIELDS = ('stock', 'sold_out')
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and not self._state.adding:
+            # instance bisa basi: jangan timpa stok yang sedang dikurangi checkout
+            update_fields = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.STOCK_FIELDS
+            ]
+            kwargs['update_fields'] = update_fields
+        elif update_fields is not None and 'is_available' in update_fields:
+            # is_available diatur manual: jangan diaktifkan lagi oleh restoks
+            self.sold_out = False
+            kwargs['update_fields'] = {*update_fields, 'sold_out'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} ({self.restaurant.username})"
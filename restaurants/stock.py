@@ -0,0 +1,95 @@
+"""
+Stok menu (MenuItem.stock / daily_capacity).
+
+Stok hanya diubah dengan UPDATE bersyarat, satu statement untuk semua menu
+di satu checkout:
+
+    UPDATE restaurants_menuitem
+    SET stock = stock - CASE id WHEN ? THEN ? ... END,
+        is_available = CASE WHEN stock = <qty> THEN false ELSE is_available END,
+        sold_out = CASE WHEN stock = <qty> THEN true ELSE sold_out END
+    WHERE id IN (...) AND is_available AND stock >= CASE id WHEN ? THEN ? ... END
+
+Database yang menjamin stok tidak pernah minus; tidak ada SELECT ... FOR
+UPDATE, jadi baris menu hanya terkunci sebentar di akhir transaksi checkout
+dan order untuk menu lain tidak ikut antre. Menu yang habis otomatis jadi
+tidak tersedia di UPDATE yang sama dan ditandai sold_out; saat stok kembali
+hanya menu bertanda sold_out yang diaktifkan lagi, menu yang dimatikan
+restoran secara manual tetap mati.
+
+Stok dikembalikan saat order dibatalkan (orders/signals.py) dan di-reset ke
+daily_capacity oleh `manage.py reset_menu_stock`.
+"""
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import MenuItem
+
+
+class OutOfStock(Exception):
+    """Sebagian menu tidak cukup stok. shortages: {menu_item_id: sisa stok}."""
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        super().__init__(f"Out of stock: {sorted(shortages)}")
+
+
+def _per_item(quantities):
+    return Case(
+        *[When(id=item_id, then=Value(quantity)) for item_id, quantity in quantities.items()],
+        output_field=IntegerField(),
+    )
+
+
+def reserve(quantities):
+    """
+    Kurangi stok {menu_item_id: qty} untuk menu yang stoknya dihitung, semua
+    atau tidak sama sekali. Harus dipanggil di dalam transaksi: kalau ada yang
+    kurang raise OutOfStock, dan caller wajib rollback (UPDATE sebagian sudah
+    jalan untuk menu lain).
+    """
+    if not quantities:
+        return
+    quantity = _per_item(quantities)
+    updated = MenuItem.objects.filter(
+        id__in=list(quantities), is_available=True, stock__gte=quantity,
+    ).update(
+        stock=F('stock') - quantity,
+        is_available=Case(When(stock=quantity, then=Value(False)), default=F('is_available')),
+        sold_out=Case(When(stock=quantity, then=Value(True)), default=F('sold_out')),
+    )
+    if updated == len(quantities):
+        return
+
+    # menu yang tidak tersedia dihitung sisa 0
+    remaining = {
+        item_id: stock if is_available else 0
+        for item_id, stock, is_available in MenuItem.objects.filter(
+            id__in=list(quantities),
+        ).values_list('id', 'stock', 'is_available')
+    }
+    raise OutOfStock({
+        item_id: remaining.get(item_id) or 0
+        for item_id, wanted in quantities.items()
+        if (remaining.get(item_id) or 0) < wanted
+    })
+
+
+def release(quantities):
+    """Kembalikan stok {menu_item_id: qty}; menu yang habis (sold_out) tersedia lagi."""
+    if not quantities:
+        return 0
+    quantity = _per_item(quantities)
+    return MenuItem.objects.filter(id__in=list(quantities), stock__isnull=False).update(
+        stock=F('stock') + quantity,
+        is_available=Case(When(sold_out=True, then=Value(True)), default=F('is_available')),
+        sold_out=False,
+    )
+
+
+def reset_daily():
+    """stock = daily_capacity untuk semua menu berkapasitas harian. Return jumlah menu."""
+    return MenuItem.objects.filter(daily_capacity__isnull=False).update(
+        stock=F('daily_capacity'),
+        is_available=Case(When(sold_out=True, then=Value(True)), default=F('is_available')),
+        sold_out=False,
+    )
@@ -1,3 +1,119 @@
-from django.test import TestCase
+import threading
 
-# Create your tests here.
+from django.db import connections
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from accounts.models import User
+from orders import checkout
+from orders.models import Order, OrderEvent, OrderItem, Payment
+from . import stock
+from .models import MenuItem
+
+
+class MenuStockTests(TransactionTestCase):
+    """Stok menu (restaurants/stock.py) lewat checkout customer."""
+
+    def setUp(self):
+        self.restaurant = User.objects.create(username='resto', role='restaurant')
+        self.item = MenuItem.objects.create(restaurant=self.restaurant, name='Nasi goreng', price='15000.00', stock=20)
+        self.side = MenuItem.objects.create(restaurant=self.restaurant, name='Es teh', price='5000.00')
+
+    def _cart(self, quantity=1):
+        return {'restaurant_id': self.restaurant.pk, 'items': {self.item.pk: quantity, self.side.pk: 1}}
+
+    def test_parallel_checkouts_do_not_oversell(self):
+        customers = User.objects.bulk_create([User(username=f'customer{i}', role='customer') for i in range(40)])
+        sold, rejected, failures = [], [], []
+
+        def run(customer):
+            try:
+                checkout.checkout(customer, self._cart())
+                sold.append(customer.pk)
+            except checkout.CheckoutError:
+                rejected.append(customer.pk)
+            except Exception as e:
+                failures.append(repr(e))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=run, args=(customer,)) for customer in customers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(failures, [])
+        self.assertEqual((len(sold), len(rejected)), (20, 20))
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.stock, 0)
+        self.assertFalse(self.item.is_available)
+        self.assertTrue(self.item.sold_out)
+        self.assertEqual(Order.objects.count(), 20)
+        self.assertEqual(sum(OrderItem.objects.filter(menu_item=self.item).values_list('quantity', flat=True)), 20)
+
+    def test_cancel_restores_stock_and_sold_out_item(self):
+        customer = User.objects.create(username='customer', role='customer')
+        order = checkout.checkout(customer, self._cart(quantity=20))
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.stock, self.item.is_available), (0, False))
+
+        order.transition_to(Order.STATUS_CANCELLED)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.stock, self.item.is_available, self.item.sold_out), (20, True, False))
+
+    def test_restock_keeps_manually_disabled_item_off(self):
+        MenuItem.objects.filter(pk=self.item.pk).update(stock=0)
+        self.item.refresh_from_db()
+        self.item.is_available = False
+        self.item.save()
+
+        stock.release({self.item.pk: 5})
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.stock, self.item.is_available), (5, False))
+
+    def test_stale_save_keeps_reserved_stock(self):
+        stale = MenuItem.objects.get(pk=self.item.pk)
+        stock.reserve({self.item.pk: 20})
+
+        stale.name = 'Nasi goreng spesial'
+        stale.save()
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.name, 'Nasi goreng spesial')
+        self.assertEqual((self.item.stock, self.item.sold_out), (0, True))
+
+        stale.stock = 5
+        stale.save(update_fields=['stock'])
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.stock, 5)
+
+    def test_checkout_rejects_more_than_stock(self):
+        customer = User.objects.create(username='customer', role='customer')
+        with self.assertRaises(checkout.CheckoutError):
+            checkout.checkout(customer, self._cart(quantity=21))
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.stock, 20)
+        self.assertEqual(Order.objects.count(), 0)
+
+
+class PaymentViewTests(TestCase):
+    """Konfirmasi pembayaran: Payment, status order dan event dalam satu transaksi."""
+
+    def setUp(self):
+        restaurant = User.objects.create(username='resto', role='restaurant')
+        customer = User.objects.create(username='customer', role='customer')
+        self.order = Order.objects.create(customer=customer, restaurant=restaurant, total_price='20000.00')
+        self.client.force_login(restaurant)
+        self.url = reverse('restaurants:payment_view', args=[self.order.id])
+
+    def test_missing_method_is_bad_request(self):
+        self.assertEqual(self.client.post(self.url).status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'method': 'gold'}).status_code, 400)
+        self.assertFalse(Payment.objects.exists())
+
+    def test_payment_records_event(self):
+        self.client.post(self.url, {'method': 'cash'})
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, 'paid')
+        self.assertEqual(self.order.payment.amount, self.order.total_price)
+        self.assertTrue(self.order.events.filter(event_type=OrderEvent.TYPE_PAYMENT, new_value='paid').exists())
@@ -1,5 +1,10 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from accounts.decorators import role_required
+from django.contrib import messages
+from django.db import transaction
+from django.http import HttpResponseBadRequest
+from accounts.decorators import idempotent, role_required
+from orders import events
+from orders.models import Order, OrderEvent, Payment, InvalidTransition
 from .models import Restaurant, MenuItem
 from django.utils import timezone
 
@@ -45,7 +50,8 @@ def menu_edit(request, resto_id, id):
         menu.name = request.POST.get('name')
         menu.price = request.POST.get('price')
         menu.description = request.POST.get('description')
-        menu.save()
+        # jangan tulis ulang stock: bisa sedang dikurangi checkout
+        menu.save(update_fields=['name', 'price', 'description'])
 
         return redirect('restaurants:menu_list', resto_id=resto.id)
 
@@ -137,49 +143,70 @@ def dashboard(request):
 # ORDER MANAGEMENT RESTAURANT
 # ============================
 
-def restaurant_orders(request):
+@role_required(['restaurant'])
+def restaurant_orders(request, resto_id=None):
     orders = Order.objects.filter(restaurant=request.user).order_by("-created_at")
     return render(request, "restaurant/orders.html", {"orders": orders})
 
-def accept_order(request, order_id):
+
+def _orders_redirect(request):
+    resto_id = Restaurant.objects.filter(owner=request.user).values_list("id", flat=True).first()
+    if resto_id is None:
+        return redirect("restaurants:dashboard")
+    return redirect("restaurants:restaurant_orders", resto_id=resto_id)
+
+
+def _restaurant_transition(request, order_id, new_status):
+    """Satu UPDATE bersyarat; order harus milik restoran ini."""
     order = get_object_or_404(Order, id=order_id, restaurant=request.user)
-    order.status = "accepted"
-    order.save()
-    return redirect("restaurants:restaurant_orders")
+    try:
+        if not order.transition_to(new_status, actor=request.user, restaurant=request.user):
+            messages.error(request, f"Order #{order_id} was changed, please reload.")
+    except InvalidTransition as e:
+        messages.error(request, str(e))
+    return _orders_redirect(request)
 
+@role_required(['restaurant'])
+def accept_order(request, order_id):
+    return _restaurant_transition(request, order_id, Order.STATUS_ACCEPTED)
+
+@role_required(['restaurant'])
 def prepare_order(request, order_id):
-    order = get_object_or_404(Order, id=order_id, restaurant=request.user)
-    order.status = "preparing"
-    order.save()
-    return redirect("restaurants:restaurant_orders")
+    return _restaurant_transition(request, order_id, Order.STATUS_PREPARING)
 
+@role_required(['restaurant'])
 def ready_order(request, order_id):
-    order = get_object_or_404(Order, id=order_id, restaurant=request.user)
-    order.status = "ready_for_pickup"
-    order.save()
-    return redirect("restaurants:restaurant_orders")
+    return _restaurant_transition(request, order_id, Order.STATUS_READY)
 
+@idempotent('payment')
 def payment_view(request, order_id):
     order = get_object_or_404(Order, id=order_id)
 
     if request.method == "POST":
-        method = request.POST["method"]
-        amount = order.total_price
-
-        Payment.objects.update_or_create(
-            order=order,
-            defaults={
-                "method": method,
-                "status": "paid",
-                "amount": amount,
-                "paid_at": timezone.now()
-            }
-        )
-
-        order.payment_status = "paid"
-        order.save()
+        method = request.POST.get("method")
+        if method not in dict(Payment._meta.get_field("method").choices):
+            return HttpResponseBadRequest("Invalid payment method.")
+
+        # Payment, status order dan event pembayaran commit bersama
+        with transaction.atomic():
+            order = Order.objects.select_for_update().get(id=order_id)
+            Payment.objects.update_or_create(
+                order=order,
+                defaults={
+                    "method": method,
+                    "status": "paid",
+                    "amount": order.total_price,
+                    "paid_at": timezone.now()
+                }
+            )
+
+            old_payment_status = order.payment_status
+            order.payment_status = "paid"
+            order.save(update_fields=["payment_status", "updated_at"])
+            if old_payment_status != order.payment_status:
+                events.record(order, OrderEvent.TYPE_PAYMENT, old_payment_status, order.payment_status, actor=request.user)
 
         messages.success(request, "Payment confirmed!")
-        return redirect("restaurants:restaurant_orders")
+        return _orders_redirect(request)
 
     return render(request, "restaurant/payment.html", {"order": order})
\ No newline at end of file